@@ -4,7 +4,7 @@ from django.core.exceptions import ValidationError
 from .models import (
     Driver, Trip, CityList, TripStop, Booking, Seat, Bus, BusOperator,
     Passenger, OTPAttempt, Profile, OperatorMetrics, UpgradeRequest,
-    DriverInvitation, TripReview
+    DriverInvitation, TripReview, TripSchedule, OutboxMessage, BookingNotification
 )
 
 # Customize admin site
@@ -39,28 +39,20 @@ class TripAdmin(admin.ModelAdmin):
     actions = ['submit_to_google_index', 'remove_from_google_index']
     
     def submit_to_google_index(self, request, queryset):
-        from .utils.google_indexing import notify_google_indexing
-        import os
-        site_url = os.getenv('SITE_URL', 'https://yallabus.app')
-        success = 0
-        for trip in queryset:
-            trip_url = f'{site_url}/bus_list/{trip.id}'
-            if notify_google_indexing(trip_url, 'URL_UPDATED'):
-                success += 1
-        self.message_user(request, f"{success}/{queryset.count()} trips submitted to Google Index.")
+        self._notify_google(request, queryset, 'URL_UPDATED', "submitted to")
     submit_to_google_index.short_description = "Submit to Google Index"
     
     def remove_from_google_index(self, request, queryset):
-        from .utils.google_indexing import notify_google_indexing
-        import os
-        site_url = os.getenv('SITE_URL', 'https://yallabus.app')
-        success = 0
-        for trip in queryset:
-            trip_url = f'{site_url}/bus_list/{trip.id}'
-            if notify_google_indexing(trip_url, 'URL_DELETED'):
-                success += 1
-        self.message_user(request, f"{success}/{queryset.count()} trips removed from Google Index.")
+        self._notify_google(request, queryset, 'URL_DELETED', "removed from")
     remove_from_google_index.short_description = "Remove from Google Index"
+    
+    def _notify_google(self, request, queryset, action, verb):
+        from .utils.google_indexing import notify_google_indexing_batch
+        from .utils.publication_utils import trip_url
+        trip_ids = list(queryset.values_list('id', flat=True))
+        results = notify_google_indexing_batch([trip_url(trip_id) for trip_id in trip_ids], action)
+        success = sum(1 for result in results if result)
+        self.message_user(request, f"{success}/{len(trip_ids)} trips {verb} Google Index.")
 
 
 @admin.register(TripStop)
@@ -73,6 +65,25 @@ class TripStopAdmin(admin.ModelAdmin):
     autocomplete_fields = ['trip', 'city']
 
 
+@admin.register(TripSchedule)
+class TripScheduleAdmin(admin.ModelAdmin):
+    list_display = ['id', 'from_city', 'to_city', 'operator', 'weekdays', 'departure_times', 'horizon_days', 'auto_publish', 'is_active']
+    list_filter = ['is_active', 'auto_publish', 'operator']
+    search_fields = ['from_city__city', 'to_city__city', 'operator__name', 'planned_route_name']
+    ordering = ['-created_at']
+    list_per_page = 50
+    readonly_fields = ['created_at']
+    autocomplete_fields = ['from_city', 'to_city', 'operator', 'bus', 'driver']
+    actions = ['generate_trips']
+    
+    def generate_trips(self, request, queryset):
+        from .services.schedule_service import TripScheduleService
+        service = TripScheduleService()
+        created = sum(len(service.generate(schedule)) for schedule in queryset.filter(is_active=True))
+        self.message_user(request, f"{created} trips created.")
+    generate_trips.short_description = "Generate upcoming trips"
+
+
 @admin.register(CityList)
 class CityListAdmin(admin.ModelAdmin):
     list_display = ['id', 'city', 'latitude', 'longitude']
@@ -213,7 +224,8 @@ class OTPAttemptAdmin(admin.ModelAdmin):
     is_blocked.short_description = 'Blocked'
     
     def unblock_numbers(self, request, queryset):
-        queryset.update(blocked_until=None, attempt_count=0)
+        from .services.otp_rate_limit_service import OTPRateLimitService
+        OTPRateLimitService.unblock(list(queryset.values_list('mobile_number', flat=True)))
         self.message_user(request, f"{queryset.count()} numbers unblocked.")
     unblock_numbers.short_description = "Unblock selected numbers"
 
@@ -248,12 +260,13 @@ class ProfileAdmin(admin.ModelAdmin):
 
 @admin.register(OperatorMetrics)
 class OperatorMetricsAdmin(admin.ModelAdmin):
-    list_display = ['id', 'operator', 'health_score', 'cancellation_rate', 'strikes', 'is_suspended']
+    list_display = ['id', 'operator', 'health_score', 'cancellation_rate', 'total_trips', 'cancelled_trips', 'strikes', 'is_suspended']
     list_filter = ['is_suspended']
     search_fields = ['operator__name']
     ordering = ['-health_score']
     list_per_page = 50
     autocomplete_fields = ['operator']
+    readonly_fields = ['total_trips', 'cancelled_trips']
     actions = ['suspend_operators', 'unsuspend_operators', 'reset_strikes']
     
     def suspend_operators(self, request, queryset):
@@ -320,3 +333,30 @@ class TripReviewAdmin(admin.ModelAdmin):
         return obj.booking.user.username if obj.booking else '-'
     get_user.short_description = 'User'
     get_user.admin_order_field = 'booking__user__username'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'channel', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['channel', 'status']
+    ordering = ['-created_at']
+    list_per_page = 100
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_messages']
+    
+    def retry_messages(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} messages queued for retry.")
+    retry_messages.short_description = "Retry selected messages"
+
+
+@admin.register(BookingNotification)
+class BookingNotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'booking', 'kind', 'channel', 'recipient', 'status', 'provider', 'attempts', 'sent_at']
+    list_filter = ['kind', 'channel', 'status']
+    search_fields = ['recipient', 'booking__id']
+    ordering = ['-created_at']
+    list_per_page = 100
+    raw_id_fields = ['booking']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
@@ -0,0 +1,28 @@
+"""Management command to materialize upcoming trips from recurring schedules"""
+from django.core.management.base import BaseCommand, CommandError
+from mishwari_main_app.models import TripSchedule
+from mishwari_main_app.services.schedule_service import TripScheduleService
+
+
+class Command(BaseCommand):
+    help = 'Create missing trips for active trip schedules (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', type=int, help='Only generate trips for this schedule ID')
+        parser.add_argument('--days', type=int, help='Override each schedule horizon (days ahead)')
+
+    def handle(self, *args, **options):
+        schedules = TripSchedule.objects.filter(is_active=True).select_related('operator', 'bus', 'driver')
+        if options['schedule']:
+            schedules = schedules.filter(id=options['schedule'])
+            if not schedules.exists():
+                raise CommandError(f'Active schedule {options["schedule"]} does not exist')
+
+        service = TripScheduleService()
+        total = 0
+        for schedule in schedules:
+            created = service.generate(schedule, horizon_days=options['days'])
+            total += len(created)
+            self.stdout.write(f'Schedule {schedule.id} ({schedule}): {len(created)} trips created')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {total} trips'))
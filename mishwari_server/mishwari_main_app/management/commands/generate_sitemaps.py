@@ -0,0 +1,16 @@
+"""Management command to pre-render the sitemap files"""
+from django.core.management.base import BaseCommand
+from mishwari_main_app.services.sitemap_service import SitemapService
+from mishwari_main_app.sitemaps import SITEMAPS
+
+
+class Command(BaseCommand):
+    help = 'Re-render every sitemap page and drop departed trips (run daily and after deploys)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', choices=sorted(SITEMAPS), action='append', help='Only render this section (repeatable)')
+
+    def handle(self, *args, **options):
+        counts = SitemapService().generate(options['section'])
+        for section, pages in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'Rendered {pages} {section} sitemap pages'))
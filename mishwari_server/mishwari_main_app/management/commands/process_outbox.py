@@ -0,0 +1,25 @@
+"""Management command to deliver queued outbound notifications"""
+import time
+from django.core.management.base import BaseCommand
+from mishwari_main_app.services.outbox_service import OutboxService
+
+
+class Command(BaseCommand):
+    help = 'Deliver due outbox messages (search-engine pings); run continuously with --loop or from cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Messages per batch (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting after one batch')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls when idle (default: 5)')
+
+    def handle(self, *args, **options):
+        service = OutboxService(batch_size=options['limit'])
+        while True:
+            counts = service.process()
+            if counts:
+                summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+                self.stdout.write(self.style.SUCCESS(f'Outbox: {summary}'))
+            if not options['loop']:
+                return
+            if not counts:
+                time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+"""Management command to recompute operator health scores in bulk"""
+from django.core.management.base import BaseCommand
+from mishwari_main_app.services.operator_metrics_service import OperatorMetricsService
+
+
+class Command(BaseCommand):
+    help = 'Refresh every operator health score from its metrics counters (run every few minutes; --recount nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='Recount trip counters from Trip first')
+
+    def handle(self, *args, **options):
+        updated = OperatorMetricsService().recompute_health_scores(recount=options['recount'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed health scores for {updated} operators'))
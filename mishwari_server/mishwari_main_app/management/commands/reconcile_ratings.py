@@ -0,0 +1,12 @@
+"""Management command to recompute rating aggregates from the reviews"""
+from django.core.management.base import BaseCommand
+from mishwari_main_app.services.rating_service import RatingService
+
+
+class Command(BaseCommand):
+    help = 'Recompute bus, driver and operator rating sums, counts and averages from TripReview (run nightly)'
+
+    def handle(self, *args, **options):
+        fixed = RatingService().reconcile()
+        for model_name, count in fixed.items():
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: corrected {count} rows'))
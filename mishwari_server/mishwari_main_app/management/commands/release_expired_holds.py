@@ -0,0 +1,14 @@
+"""Management command to release expired seat holds"""
+from django.core.management.base import BaseCommand
+from mishwari_main_app.services.seat_hold_service import SeatHoldService
+
+
+class Command(BaseCommand):
+    help = 'Drop expired seat holds from every bookable trip (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trip', type=int, action='append', help='Only sweep this trip ID (repeatable)')
+
+    def handle(self, *args, **options):
+        released = SeatHoldService().reap_expired(options['trip'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired seat holds'))
@@ -1,7 +1,7 @@
 """Management command to submit trips to Google Indexing API"""
 from django.core.management.base import BaseCommand
 from mishwari_main_app.models import Trip
-from mishwari_main_app.utils.google_indexing import notify_google_indexing
+from mishwari_main_app.utils.google_indexing import notify_google_indexing, notify_google_indexing_batch
 import os
 
 
@@ -43,18 +43,18 @@ class Command(BaseCommand):
         
         # All published trips
         if options['all']:
-            trips = Trip.objects.filter(status='published')
-            total = trips.count()
+            trip_ids = list(Trip.objects.filter(status='published').order_by('id').values_list('id', flat=True))
+            total = len(trip_ids)
             self.stdout.write(f'Submitting {total} published trips...')
             
+            results = notify_google_indexing_batch([f'{site_url}/bus_list/{trip_id}' for trip_id in trip_ids], 'URL_UPDATED')
             success = 0
-            for trip in trips:
-                trip_url = f'{site_url}/bus_list/{trip.id}'
-                if notify_google_indexing(trip_url, 'URL_UPDATED'):
+            for trip_id, result in zip(trip_ids, results):
+                if result:
                     success += 1
-                    self.stdout.write(f'  ✓ {trip.id}')
+                    self.stdout.write(f'  ✓ {trip_id}')
                 else:
-                    self.stdout.write(f'  ✗ {trip.id}')
+                    self.stdout.write(f'  ✗ {trip_id}')
             
             self.stdout.write(self.style.SUCCESS(f'\nCompleted: {success}/{total} trips submitted'))
             return
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.1 on 2026-10-16 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_segment_pairs(apps, schema_editor):
+    """Backfill the city-pair index for existing trips"""
+    Trip = apps.get_model('mishwari_main_app', 'Trip')
+    TripStop = apps.get_model('mishwari_main_app', 'TripStop')
+    TripSegmentPair = apps.get_model('mishwari_main_app', 'TripSegmentPair')
+
+    for trip in Trip.objects.all().iterator():
+        first_stops = []
+        seen_cities = set()
+        for stop in TripStop.objects.filter(trip_id=trip.id).order_by('sequence'):
+            if stop.city_id not in seen_cities:
+                seen_cities.add(stop.city_id)
+                first_stops.append(stop)
+
+        TripSegmentPair.objects.bulk_create([
+            TripSegmentPair(
+                trip_id=trip.id,
+                from_stop_id=from_stop.id,
+                to_stop_id=to_stop.id,
+                from_city_id=from_stop.city_id,
+                to_city_id=to_stop.city_id,
+                journey_date=trip.journey_date,
+                status=trip.status,
+                fare=to_stop.price_from_start - from_stop.price_from_start,
+                departure_time=from_stop.planned_departure,
+                arrival_time=to_stop.planned_arrival,
+            )
+            for i, from_stop in enumerate(first_stops)
+            for to_stop in first_stops[i + 1:]
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0018_add_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSegmentPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journey_date', models.DateField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('active', 'Active'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('fare', models.IntegerField(default=0)),
+                ('departure_time', models.DateTimeField()),
+                ('arrival_time', models.DateTimeField()),
+                ('from_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mishwari_main_app.citylist')),
+                ('from_stop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mishwari_main_app.tripstop')),
+                ('to_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mishwari_main_app.citylist')),
+                ('to_stop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mishwari_main_app.tripstop')),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_pairs', to='mishwari_main_app.trip')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['from_city', 'to_city', 'status', 'journey_date'], name='mishwari_ma_from_ci_d1e073_idx')],
+                'unique_together': {('trip', 'from_city', 'to_city')},
+            },
+        ),
+        migrations.RunPython(build_segment_pairs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-16 22:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0019_trip_segment_pair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('planned_polyline', models.TextField(blank=True, default='')),
+                ('planned_route_name', models.CharField(default='مسار غير معروف', max_length=100)),
+                ('price_per_km', models.DecimalField(decimal_places=2, default=50.0, max_digits=6)),
+                ('total_distance_km', models.FloatField(default=0.0)),
+                ('stop_template', models.JSONField(default=list)),
+                ('weekdays', models.JSONField(default=list)),
+                ('departure_times', models.JSONField(default=list)),
+                ('horizon_days', models.PositiveIntegerField(default=14)),
+                ('auto_publish', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bus', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trip_schedules', to='mishwari_main_app.bus')),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trip_schedules', to='mishwari_main_app.driver')),
+                ('from_city', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='mishwari_main_app.citylist')),
+                ('operator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trip_schedules', to='mishwari_main_app.busoperator')),
+                ('to_city', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='mishwari_main_app.citylist')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='mishwari_main_app.tripschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='trip',
+            constraint=models.UniqueConstraint(fields=('schedule', 'planned_departure'), name='unique_schedule_departure'),
+        ),
+    ]
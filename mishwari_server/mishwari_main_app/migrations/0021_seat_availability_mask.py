@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+def segments_to_mask(apps, schema_editor):
+    """Pack each seat's available_segments list into availability_mask"""
+    Seat = apps.get_model('mishwari_main_app', 'Seat')
+
+    batch = []
+    for seat in Seat.objects.only('id', 'available_segments').iterator(chunk_size=2000):
+        mask = 0
+        for segment in seat.available_segments or []:
+            mask |= 1 << int(segment.split('-')[0])
+        seat.availability_mask = mask
+        batch.append(seat)
+        if len(batch) >= 2000:
+            Seat.objects.bulk_update(batch, ['availability_mask'])
+            batch = []
+    Seat.objects.bulk_update(batch, ['availability_mask'])
+
+
+def mask_to_segments(apps, schema_editor):
+    """Unpack availability_mask back into available_segments"""
+    Seat = apps.get_model('mishwari_main_app', 'Seat')
+
+    batch = []
+    for seat in Seat.objects.only('id', 'availability_mask').iterator(chunk_size=2000):
+        mask = seat.availability_mask
+        seat.available_segments = [f"{i}-{i+1}" for i in range(mask.bit_length()) if mask >> i & 1]
+        batch.append(seat)
+        if len(batch) >= 2000:
+            Seat.objects.bulk_update(batch, ['available_segments'])
+            batch = []
+    Seat.objects.bulk_update(batch, ['available_segments'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0020_trip_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seat',
+            name='availability_mask',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(segments_to_mask, mask_to_segments),
+        migrations.RemoveField(
+            model_name='seat',
+            name='available_segments',
+        ),
+    ]
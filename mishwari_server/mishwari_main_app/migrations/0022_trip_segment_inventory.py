@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_inventory(apps, schema_editor):
+    """Seed per-segment inventory from each trip's seat_matrix"""
+    Trip = apps.get_model('mishwari_main_app', 'Trip')
+    TripSegmentInventory = apps.get_model('mishwari_main_app', 'TripSegmentInventory')
+
+    rows = []
+    for trip in Trip.objects.select_related('bus').only('id', 'seat_matrix', 'bus__capacity').iterator(chunk_size=500):
+        capacity = trip.bus.capacity if trip.bus else 40
+        for segment, remaining in (trip.seat_matrix or {}).items():
+            rows.append(TripSegmentInventory(
+                trip_id=trip.id,
+                segment_index=int(segment.split('-')[0]),
+                capacity=max(capacity, remaining),
+                remaining=remaining,
+            ))
+        if len(rows) >= 2000:
+            TripSegmentInventory.objects.bulk_create(rows)
+            rows = []
+    TripSegmentInventory.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0021_seat_availability_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSegmentInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segment_index', models.PositiveSmallIntegerField()),
+                ('capacity', models.IntegerField()),
+                ('remaining', models.IntegerField()),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_inventory', to='mishwari_main_app.trip')),
+            ],
+            options={
+                'unique_together': {('trip', 'segment_index')},
+            },
+        ),
+        migrations.RunPython(build_inventory, migrations.RunPython.noop),
+    ]
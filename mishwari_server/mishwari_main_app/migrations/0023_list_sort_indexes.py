@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0022_trip_segment_inventory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driverinvitation',
+            index=models.Index(fields=['operator', '-created_at'], name='mishwari_ma_operato_1a2a75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['operator', '-created_at'], name='mishwari_ma_operato_90d026_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:40
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# (model, review FK to it, review score field)
+TARGETS = (
+    ('Bus', 'bus_snapshot', 'bus_condition_rating'),
+    ('Driver', 'driver_snapshot', 'driver_rating'),
+    ('BusOperator', 'operator_snapshot', 'overall_rating'),
+)
+
+
+def backfill_rating_sums(apps, schema_editor):
+    TripReview = apps.get_model('mishwari_main_app', 'TripReview')
+    for model_name, review_field, score_field in TARGETS:
+        model = apps.get_model('mishwari_main_app', model_name)
+        totals = (
+            TripReview.objects.filter(**{f'{review_field}__isnull': False})
+            .values_list(review_field).annotate(rating_sum=Sum(score_field), count=Count('id')).order_by()
+        )
+        for target_id, rating_sum, count in totals:
+            model.objects.filter(id=target_id).update(rating_sum=rating_sum, total_reviews=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0024_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='busoperator',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sums, migrations.RunPython.noop),
+    ]
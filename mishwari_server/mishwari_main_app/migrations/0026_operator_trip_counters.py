@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:55
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_trip_counters(apps, schema_editor):
+    Trip = apps.get_model('mishwari_main_app', 'Trip')
+    BusOperator = apps.get_model('mishwari_main_app', 'BusOperator')
+    OperatorMetrics = apps.get_model('mishwari_main_app', 'OperatorMetrics')
+    totals = (
+        Trip.objects.values_list('operator_id')
+        .annotate(total=Count('id'), cancelled=Count('id', filter=Q(status='cancelled'))).order_by()
+    )
+    for operator_id, total, cancelled in totals:
+        OperatorMetrics.objects.get_or_create(operator_id=operator_id)
+        OperatorMetrics.objects.filter(operator_id=operator_id).update(
+            total_trips=total,
+            cancelled_trips=cancelled,
+            cancellation_rate=cancelled * 100 / total
+        )
+    missing = BusOperator.objects.filter(metrics__isnull=True).values_list('id', flat=True)
+    OperatorMetrics.objects.bulk_create([OperatorMetrics(operator_id=operator_id) for operator_id in missing])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0025_rating_sums'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operatormetrics',
+            name='total_trips',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='operatormetrics',
+            name='cancelled_trips',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_trip_counters, migrations.RunPython.noop),
+    ]
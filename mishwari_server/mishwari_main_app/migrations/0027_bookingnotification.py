@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mishwari_main_app', '0026_operator_trip_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='channel',
+            field=models.CharField(choices=[('google_indexing', 'Google Indexing API'), ('indexnow', 'IndexNow'), ('feed_ping', 'Feed Ping'), ('trip_notification', 'Trip Notification')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='BookingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('departure', 'Departure')], max_length=20)),
+                ('channel', models.CharField(choices=[('sms', 'SMS')], default='sms', max_length=10)),
+                ('recipient', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('provider', models.CharField(blank=True, max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='mishwari_main_app.booking')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('booking', 'kind', 'channel'), name='unique_booking_notification')],
+            },
+        ),
+    ]
@@ -13,7 +13,7 @@ from .operator import BusOperator, OperatorMetrics, UpgradeRequest
 from .fleet import Bus, Driver, DriverInvitation
 
 # Trip models
-from .trip import Trip, TripStop, Seat
+from .trip import Trip, TripStop, Seat, TripSegmentPair, TripSegmentInventory, TripSchedule
 
 # Booking models
 from .booking import Booking, Passenger
@@ -21,7 +21,11 @@ from .booking import Booking, Passenger
 # Review models
 from .review import TripReview
 
+# Outbound notification models
+from .outbox import OutboxMessage
+from .notification import BookingNotification
+
 __all__ = [
     'OTPAttempt', 'Profile', 'CityList', 'BusOperator', 'OperatorMetrics', 'UpgradeRequest',
-    'Bus', 'Driver', 'DriverInvitation', 'Trip', 'TripStop', 'Seat', 'Passenger', 'Booking', 'TripReview',
+    'Bus', 'Driver', 'DriverInvitation', 'Trip', 'TripStop', 'Seat', 'TripSegmentPair', 'TripSegmentInventory', 'TripSchedule', 'Passenger', 'Booking', 'TripReview', 'OutboxMessage', 'BookingNotification',
 ]
@@ -12,6 +12,7 @@ class Bus(models.Model):
     verification_documents = models.JSONField(default=dict, blank=True)
     avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_reviews = models.IntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
     has_wifi = models.BooleanField(default=False)
     has_ac = models.BooleanField(default=False)
     has_usb_charging = models.BooleanField(default=False)
@@ -31,6 +32,7 @@ class Driver(models.Model):
     is_verified = models.BooleanField(default=True)
     verification_documents = models.JSONField(default=dict, blank=True)
     total_reviews = models.IntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.profile.full_name}"
@@ -61,6 +63,7 @@ class DriverInvitation(models.Model):
         indexes = [
             models.Index(fields=['invite_code']),
             models.Index(fields=['mobile_number', 'status']),
+            models.Index(fields=['operator', '-created_at']),
         ]
     
     def __str__(self):
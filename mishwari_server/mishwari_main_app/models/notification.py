@@ -0,0 +1,45 @@
+"""Notification models - per-booking delivery records of passenger notifications"""
+from django.db import models
+
+
+class BookingNotification(models.Model):
+    """
+    Delivery state of one notification to one booking's passenger
+
+    Rows are created by the fan-out worker, one per booking, kind and
+    channel; the unique constraint makes re-running a fan-out send only
+    what is still pending.
+    """
+    KIND_CHOICES = [
+        ('departure', 'Departure'),
+    ]
+    
+    CHANNEL_CHOICES = [
+        ('sms', 'SMS'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    
+    booking = models.ForeignKey('Booking', on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='sms')
+    recipient = models.CharField(max_length=20, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    provider = models.CharField(max_length=20, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'kind', 'channel'], name='unique_booking_notification'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.channel} for booking {self.booking_id} - {self.status}"
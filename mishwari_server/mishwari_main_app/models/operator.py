@@ -11,6 +11,7 @@ class BusOperator(models.Model):
     is_verified = models.BooleanField(default=True)
     avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00, db_index=True)
     total_reviews = models.IntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
     platform_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='owned_operator')
     api_url = models.URLField(max_length=200, blank=True, null=True)
     api_key = models.CharField(max_length=200, blank=True, null=True)
@@ -24,6 +25,8 @@ class OperatorMetrics(models.Model):
     operator = models.OneToOneField(BusOperator, on_delete=models.CASCADE, related_name='metrics')
     health_score = models.IntegerField(default=100)
     cancellation_rate = models.FloatField(default=0.0)
+    total_trips = models.PositiveIntegerField(default=0)
+    cancelled_trips = models.PositiveIntegerField(default=0)
     double_booking_count = models.IntegerField(default=0)
     strikes = models.IntegerField(default=0)
     is_suspended = models.BooleanField(default=False)
@@ -35,13 +38,13 @@ class OperatorMetrics(models.Model):
     def __str__(self):
         return f"{self.operator.name} - Score: {self.health_score}"
     
-    def recalculate_health_score(self):
+    def recalculate_health_score(self, update_fields=None):
         rating_score = float(self.operator.avg_rating) * 10
         cancellation_penalty = self.cancellation_rate * 2
         strike_penalty = self.strikes * 15
         score = rating_score - cancellation_penalty - strike_penalty
         self.health_score = max(0, min(100, int(score)))
-        self.save()
+        self.save(update_fields=update_fields)
 
 
 class UpgradeRequest(models.Model):
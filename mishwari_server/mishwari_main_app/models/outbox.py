@@ -0,0 +1,43 @@
+"""Outbox models - durable queue of outbound notifications"""
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    One outbound call owed to an external service
+
+    Rows are written in the same transaction as the change they announce
+    and drained by the process_outbox worker, so requests never wait on
+    the remote side and nothing is lost if it is down.
+    """
+    CHANNEL_CHOICES = [
+        ('google_indexing', 'Google Indexing API'),
+        ('indexnow', 'IndexNow'),
+        ('feed_ping', 'Feed Ping'),
+        ('trip_notification', 'Trip Notification'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} #{self.id} ({self.status})"
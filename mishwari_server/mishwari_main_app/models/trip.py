@@ -1,6 +1,7 @@
 """Trip-related models"""
 from django.db import models
 from django.core.exceptions import ValidationError
+from datetime import datetime
 
 
 class Trip(models.Model):
@@ -38,15 +39,21 @@ class Trip(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    schedule = models.ForeignKey('TripSchedule', on_delete=models.SET_NULL, null=True, blank=True, related_name='trips')
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._previous_status = self.status
+        self._previous_journey_date = self.journey_date
     
     class Meta:
         indexes = [
             models.Index(fields=['from_city', 'to_city', 'journey_date']),
             models.Index(fields=['status']),
+            models.Index(fields=['operator', '-created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'planned_departure'], name='unique_schedule_departure'),
         ]
     
     def __str__(self):
@@ -59,6 +66,7 @@ class Trip(models.Model):
         super().save(*args, **kwargs)
         # Update _previous_status after save
         self._previous_status = self.status
+        self._previous_journey_date = self.journey_date
     
     def clean(self):
         if self.status == 'published':
@@ -86,6 +94,8 @@ class Trip(models.Model):
         capacity = self.bus.capacity if self.bus else 40
         self.seat_matrix = {f"{i}-{i+1}": capacity for i in range(num_stops - 1)}
         self.save()
+        TripSegmentInventory.objects.filter(trip=self).delete()
+        TripSegmentInventory.objects.bulk_create(TripSegmentInventory.build_for_trip(self))
     
     def get_min_available_seats(self):
         return min(self.seat_matrix.values()) if self.seat_matrix else 0
@@ -122,9 +132,12 @@ class TripStop(models.Model):
 
 
 class Seat(models.Model):
+    MAX_SEGMENTS = 62  # Bits usable in a signed 64-bit mask
+    
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="seats")
     seat_number = models.CharField(max_length=3)
-    available_segments = models.JSONField(default=list)
+    # Bit i set = segment "i-(i+1)" is free on this seat
+    availability_mask = models.BigIntegerField(default=0)
     
     class Meta:
         unique_together = ['trip', 'seat_number']
@@ -132,5 +145,125 @@ class Seat(models.Model):
     def __str__(self):
         return f"{self.trip} - Seat {self.seat_number}"
     
+    @staticmethod
+    def mask_for_segments(segments):
+        """Bitmask of "i-(i+1)" segment labels"""
+        mask = 0
+        for segment in segments:
+            index = int(segment.split('-')[0])
+            if index >= Seat.MAX_SEGMENTS:
+                raise ValueError(f"Seats support at most {Seat.MAX_SEGMENTS} segments")
+            mask |= 1 << index
+        return mask
+    
+    @property
+    def available_segments(self):
+        mask = self.availability_mask
+        return [f"{i}-{i+1}" for i in range(mask.bit_length()) if mask >> i & 1]
+    
+    @available_segments.setter
+    def available_segments(self, segments):
+        self.availability_mask = self.mask_for_segments(segments)
+    
     def is_available_for_segments(self, segments):
-        return all(seg in self.available_segments for seg in segments)
+        mask = self.mask_for_segments(segments)
+        return self.availability_mask & mask == mask
+
+
+class TripSegmentInventory(models.Model):
+    """
+    Remaining seats on one segment of a trip
+
+    Bookings decrement these rows with conditional UPDATEs, so bookings on
+    different legs of the same trip never wait on each other.
+    Trip.seat_matrix is a read projection of these rows.
+    """
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='segment_inventory')
+    segment_index = models.PositiveSmallIntegerField()
+    capacity = models.IntegerField()
+    remaining = models.IntegerField()
+    
+    class Meta:
+        unique_together = ['trip', 'segment_index']
+    
+    def __str__(self):
+        return f"{self.trip_id} - Segment {self.segment_index}-{self.segment_index + 1}: {self.remaining}/{self.capacity}"
+    
+    @staticmethod
+    def build_for_trip(trip, capacity=None):
+        """Unsaved inventory rows mirroring a trip's seat_matrix"""
+        if capacity is None:
+            capacity = trip.bus.capacity if trip.bus_id and trip.bus else 40
+        return [
+            TripSegmentInventory(
+                trip=trip,
+                segment_index=int(segment.split('-')[0]),
+                capacity=max(capacity, remaining),
+                remaining=remaining
+            )
+            for segment, remaining in (trip.seat_matrix or {}).items()
+        ]
+
+
+class TripSegmentPair(models.Model):
+    """Denormalized city-to-city pair of a trip, used as the trip search index"""
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='segment_pairs')
+    from_stop = models.ForeignKey(TripStop, on_delete=models.CASCADE, related_name='+')
+    to_stop = models.ForeignKey(TripStop, on_delete=models.CASCADE, related_name='+')
+    from_city = models.ForeignKey('CityList', on_delete=models.CASCADE, related_name='+')
+    to_city = models.ForeignKey('CityList', on_delete=models.CASCADE, related_name='+')
+    journey_date = models.DateField()
+    status = models.CharField(max_length=20, choices=Trip.STATUS_CHOICES)
+    fare = models.IntegerField(default=0)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['trip', 'from_city', 'to_city']
+        indexes = [
+            models.Index(fields=['from_city', 'to_city', 'status', 'journey_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.trip_id}: {self.from_city_id} → {self.to_city_id} ({self.journey_date})"
+
+
+class TripSchedule(models.Model):
+    """Recurring route template that the schedule generator turns into trips"""
+    WEEKDAY_CHOICES = [(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]
+    
+    operator = models.ForeignKey('BusOperator', on_delete=models.CASCADE, related_name='trip_schedules')
+    bus = models.ForeignKey('Bus', on_delete=models.SET_NULL, null=True, blank=True, related_name='trip_schedules')
+    driver = models.ForeignKey('Driver', on_delete=models.SET_NULL, null=True, blank=True, related_name='trip_schedules')
+    from_city = models.ForeignKey('CityList', on_delete=models.PROTECT, related_name='+')
+    to_city = models.ForeignKey('CityList', on_delete=models.PROTECT, related_name='+')
+    planned_polyline = models.TextField(blank=True, default='')
+    planned_route_name = models.CharField(max_length=100, default="مسار غير معروف")
+    price_per_km = models.DecimalField(max_digits=6, decimal_places=2, default=50.00)
+    total_distance_km = models.FloatField(default=0.0)
+    # [{"city": id, "offset_minutes": int, "distance_from_start_km": float, "price_from_start": int}, ...]
+    stop_template = models.JSONField(default=list)
+    weekdays = models.JSONField(default=list)  # 0=Monday ... 6=Sunday
+    departure_times = models.JSONField(default=list)  # ["HH:MM", ...]
+    horizon_days = models.PositiveIntegerField(default=14)
+    auto_publish = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.from_city} → {self.to_city} ({', '.join(self.departure_times)})"
+    
+    def clean(self):
+        if len(self.stop_template) < 2:
+            raise ValidationError("Schedule needs at least two stops")
+        if self.stop_template[0].get('city') != self.from_city_id or self.stop_template[-1].get('city') != self.to_city_id:
+            raise ValidationError("Stop template must start at from_city and end at to_city")
+        if not self.weekdays or any(day not in range(7) for day in self.weekdays):
+            raise ValidationError("weekdays must be a non-empty list of 0-6")
+        if not self.departure_times:
+            raise ValidationError("At least one departure time is required")
+        for value in self.departure_times:
+            try:
+                datetime.strptime(value, '%H:%M')
+            except (TypeError, ValueError):
+                raise ValidationError(f"Invalid departure time: {value}")
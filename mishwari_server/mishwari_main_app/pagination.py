@@ -0,0 +1,42 @@
+"""Cursor pagination classes for list endpoints"""
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """
+    Keyset pagination on an indexed sort key
+
+    Page tokens encode the last position rather than an offset, so pages
+    stay stable while rows are added and deep pages cost the same as the
+    first one. Subclasses set `ordering`, ending with a unique tiebreaker.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class BookingCursorPagination(BaseCursorPagination):
+    """Newest bookings first"""
+    ordering = ('-booking_time', '-id')
+
+
+class TripCursorPagination(BaseCursorPagination):
+    """Most recently created trips first"""
+    ordering = ('-created_at', '-id')
+
+
+class InvitationCursorPagination(BaseCursorPagination):
+    """Most recent driver invitations first"""
+    ordering = ('-created_at', '-id')
+
+
+class PassengerCursorPagination(BaseCursorPagination):
+    """Saved passengers in the order they were added"""
+    ordering = ('id',)
+
+
+class CityCursorPagination(BaseCursorPagination):
+    """Cities alphabetically; pages are large as clients fill pickers from them"""
+    page_size = 200
+    max_page_size = 1000
+    ordering = ('city',)
@@ -1,3 +1,4 @@
+import time
 import stripe
 from django.http import JsonResponse
 from django.conf import settings
@@ -9,9 +10,20 @@ from ..models import Booking
 
 class StripePaymentGateway:
 
+    # Stripe rejects an expires_at less than 30 minutes after the session is created
+    MIN_SESSION_SECONDS = 31 * 60
+
     @staticmethod
     def initiate_payment( booking_details):
         stripe.api_key = settings.STRIPE_SECRET_KEY # random token by Tabnine
+        # Checkouts for seat holds carry the hold ID; the booking is created on payment
+        reference = booking_details.get('hold_id') or booking_details['booking_id']
+        metadata = {key: booking_details[key] for key in ('booking_id', 'hold_id') if booking_details.get(key)}
+        # Close the checkout when its seat hold lapses instead of Stripe's default 24 hours
+        expires_at = booking_details.get('expires_at')
+        session_options = {}
+        if expires_at:
+            session_options['expires_at'] = int(max(expires_at, time.time() + StripePaymentGateway.MIN_SESSION_SECONDS))
 
         session = stripe.checkout.Session.create(
             payment_method_types=['card'],
@@ -22,7 +34,7 @@ class StripePaymentGateway:
                         'unit_amount': int(booking_details['amount'] * 100), 
                         # multiply by no of passengers or add total_price field on booking
                         'product_data': {
-                            'name': f'Booking {booking_details["booking_id"]}',
+                            'name': f'Booking {reference}',
                         },
                     },
                     'quantity': 1,
@@ -30,14 +42,20 @@ class StripePaymentGateway:
             ],
             mode='payment',
             
-            metadata={"booking_id":booking_details["booking_id"]},
+            metadata=metadata,
             success_url='http://localhost:3000/checkout/success?session_id={CHECKOUT_SESSION_ID}',
             cancel_url='http://localhost:3000/checkout/cancel',
             customer_email='husni.abad@gmail.com',
-            
+            **session_options
         )
 
         return session.url
+
+    @staticmethod
+    def refund(payment_intent, metadata=None):
+        """Refund a checkout's payment in full"""
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        return stripe.Refund.create(payment_intent=payment_intent, metadata=metadata or {})
     
 
     # def handle_webhook(self, request):
@@ -1,37 +1,40 @@
-from django.db import transaction
-
 from rest_framework.exceptions import ValidationError
 
 from .payment_gateway import PaymentGateway
-from wallet.models import Wallet, WalletTransaction
+from wallet.models import Wallet
+from wallet.services import WalletLedger, InsufficientFundsError, IdempotencyConflictError
 
 
 
 class WalletPaymentGateway(PaymentGateway):
     def initiate_payment(self,booking_details):
         user = booking_details['user']
-        trip = booking_details['trip']
         amount = booking_details['amount']  # Ensure the trip price is properly set
+        booking_id = booking_details.get('booking_id')
         # payment_method = booking_details['payment_method']
-        wallet = Wallet.objects.get(user=user)
-
-        if wallet.balance <= amount:
+        try:
+            wallet = Wallet.objects.get(user=user)
+        except Wallet.DoesNotExist:
             raise ValidationError('insufficient wallet balance')
-        
-        with transaction.atomic():
-            wallet.balance -= amount
-            wallet.save()
-            # booking_details.status = 'active' # if booking.data
-
-            WalletTransaction.objects.create(
-                amount=amount,
-                wallet=wallet,
-                transaction_type='debit',
-            )
 
+        if not amount:
+            return "wallet_payment_success"
+
+        # One conditional UPDATE on this wallet's row; keyed by booking, so one booking is debited at most once
+        try:
+            WalletLedger().debit(
+                wallet, amount,
+                title='trip booking',
+                reference_id=booking_id or 'unknown',
+                idempotency_key=f'booking:{booking_id}' if booking_id else None
+            )
+        except InsufficientFundsError:
+            raise ValidationError('insufficient wallet balance')
+        except (IdempotencyConflictError, ValueError) as e:
+            raise ValidationError(str(e))
 
         return "wallet_payment_success"
 
     def handle_webhook(self, request):
         # Logic to handle wallet payment webhook
-        pass
\ No newline at end of file
+        pass
@@ -27,6 +27,8 @@ from .booking_serializers import (
     BookingTripSerializer,
     PassengerSerializer,
     BookingSerializer,
+    BookingListSerializer,
+    BookingTripSnapshotSerializer,
 )
 
 # Review serializers
@@ -49,4 +51,6 @@ __all__ = [
     'PassengerSerializer',
     'TripReviewSerializer',
     'BookingSerializer',
+    'BookingListSerializer',
+    'BookingTripSnapshotSerializer',
 ]
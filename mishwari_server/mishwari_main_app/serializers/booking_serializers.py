@@ -109,3 +109,60 @@ class BookingSerializer(serializers.ModelSerializer):
         representation['to_stop'] = TripStopSerializer(instance.to_stop).data
         representation['passengers'] = instance.passengers_data
         return representation
+
+
+class BookingTripSnapshotSerializer(serializers.ModelSerializer):
+    """Trip summary sent once per distinct trip alongside a booking list"""
+    from_city = serializers.CharField(source='from_city.city', read_only=True)
+    to_city = serializers.CharField(source='to_city.city', read_only=True)
+    operator = serializers.CharField(source='operator.name', read_only=True)
+    bus_number = serializers.CharField(source='bus.bus_number', read_only=True, default=None)
+
+    class Meta:
+        model = Trip
+        fields = ['id', 'status', 'journey_date', 'planned_departure', 'planned_route_name',
+                  'from_city', 'to_city', 'operator', 'bus_number']
+
+
+class BookingListSerializer(serializers.ModelSerializer):
+    """Compact booking row for list screens; the trip is referenced by ID"""
+    from_stop = serializers.SerializerMethodField()
+    to_stop = serializers.SerializerMethodField()
+    passenger_count = serializers.SerializerMethodField()
+    has_review = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'trip', 'status', 'total_fare', 'is_paid', 'payment_method', 'booking_source',
+                  'booking_time', 'contact_name', 'contact_phone', 'from_stop', 'to_stop',
+                  'passenger_count', 'has_review']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load stops, review and trip snapshot fields in the list query"""
+        return queryset.select_related(
+            'from_stop__city', 'to_stop__city', 'review',
+            'trip__from_city', 'trip__to_city', 'trip__operator', 'trip__bus'
+        )
+
+    def _stop_data(self, stop):
+        if not stop:
+            return None
+        return {
+            'id': stop.id,
+            'sequence': stop.sequence,
+            'city': stop.city.city,
+            'planned_departure': stop.planned_departure
+        }
+
+    def get_from_stop(self, obj):
+        return self._stop_data(obj.from_stop)
+
+    def get_to_stop(self, obj):
+        return self._stop_data(obj.to_stop)
+
+    def get_passenger_count(self, obj):
+        return len(obj.passengers_data)
+
+    def get_has_review(self, obj):
+        return hasattr(obj, 'review')
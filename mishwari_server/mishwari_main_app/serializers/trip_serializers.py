@@ -1,4 +1,5 @@
 """Trip-related serializers"""
+from django.db.models import Prefetch
 from rest_framework import serializers
 from ..models import Trip, TripStop, CityList, Seat
 from .operator_serializers import BusOperatorSerializer, BusSerializer, DriverSerializer
@@ -39,6 +40,28 @@ class TripsSerializer(serializers.ModelSerializer):
                   'trip_type', 'planned_departure', 'departure_window_start', 'departure_window_end', 'actual_departure',
                   'can_publish', 'stops', 'seat_matrix']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything the serializer reads in a fixed number of queries
+
+        Stops are prefetched in sequence order into `ordered_stops`, which
+        the stop-based fields read instead of querying per trip.
+        """
+        driver_related = ('profile', 'user', 'operator')
+        return queryset.select_related(
+            'operator', 'from_city', 'to_city', 'bus', 'actual_bus',
+            *[f'{driver}__{field}' for driver in ('driver', 'actual_driver') for field in driver_related]
+        ).prefetch_related(
+            Prefetch('stops', queryset=TripStop.objects.select_related('city').order_by('sequence'), to_attr='ordered_stops'),
+            'driver__buses', 'actual_driver__buses'
+        )
+
+    def _ordered_stops(self, obj):
+        if not hasattr(obj, 'ordered_stops'):
+            obj.ordered_stops = list(obj.stops.select_related('city').order_by('sequence'))
+        return obj.ordered_stops
+    
     def get_bus(self, obj):
         resources = obj.get_resources()
         return BusSerializer(resources['bus']).data if resources['bus'] else None
@@ -48,25 +71,24 @@ class TripsSerializer(serializers.ModelSerializer):
         return DriverSerializer(resources['driver']).data if resources['driver'] else None
     
     def get_departure_time(self, obj):
-        first_stop = obj.stops.order_by('sequence').first()
-        return first_stop.planned_departure if first_stop else None
+        stops = self._ordered_stops(obj)
+        return stops[0].planned_departure if stops else None
     
     def get_arrival_time(self, obj):
-        last_stop = obj.stops.order_by('sequence').last()
-        return last_stop.planned_arrival if last_stop else None
+        stops = self._ordered_stops(obj)
+        return stops[-1].planned_arrival if stops else None
     
     def get_available_seats(self, obj):
         return obj.get_min_available_seats()
     
     def get_price(self, obj):
-        last_stop = obj.stops.order_by('sequence').last()
-        return last_stop.price_from_start if last_stop else 0
+        stops = self._ordered_stops(obj)
+        return stops[-1].price_from_start if stops else 0
     
     def get_can_publish(self, obj):
         return obj.can_publish()
     
     def get_stops(self, obj):
-        stops = obj.stops.order_by('sequence').all()
         return [{
             'id': stop.id,
             'city': {'id': stop.city.id, 'name': stop.city.city},
@@ -75,7 +97,7 @@ class TripsSerializer(serializers.ModelSerializer):
             'price_from_start': stop.price_from_start,
             'planned_arrival': stop.planned_arrival,
             'planned_departure': stop.planned_departure
-        } for stop in stops]
+        } for stop in self._ordered_stops(obj)]
 
 
 class SeatSerializer(serializers.ModelSerializer):
@@ -2,8 +2,23 @@
 
 from .booking_service import BookingService, InsufficientSeatsError, BookingAlreadyCancelledError
 from .trip_service import TripService
+from .trip_index_service import TripIndexService
+from .trip_search_service import TripSearchService
+from .schedule_service import TripScheduleService
+from .seat_hold_service import SeatHoldService, SeatHoldError
+from .otp_rate_limit_service import OTPRateLimitService
+from .sms_dispatch_service import SMSDispatchService
+from .city_locator_service import CityLocatorService
+from .city_picker_service import CityPickerService
+from .search_cache_service import SearchCacheService
+from .recent_trips_service import RecentTripsService
+from .sitemap_service import SitemapService
+from .outbox_service import OutboxService
+from .rating_service import RatingService
+from .operator_metrics_service import OperatorMetricsService
 from .payment_service import PaymentService
 from .route_service import RouteService
+from .route_catalogue_service import RouteCatalogueService
 from .notification_service import NotificationService
 
 __all__ = [
@@ -11,7 +26,23 @@ __all__ = [
     'InsufficientSeatsError',
     'BookingAlreadyCancelledError',
     'TripService',
+    'TripIndexService',
+    'TripSearchService',
+    'TripScheduleService',
+    'SeatHoldService',
+    'SeatHoldError',
+    'OTPRateLimitService',
+    'SMSDispatchService',
+    'CityLocatorService',
+    'CityPickerService',
+    'SearchCacheService',
+    'RecentTripsService',
+    'SitemapService',
+    'OutboxService',
+    'RatingService',
+    'OperatorMetricsService',
     'PaymentService',
     'RouteService',
+    'RouteCatalogueService',
     'NotificationService',
 ]
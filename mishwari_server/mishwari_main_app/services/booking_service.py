@@ -1,9 +1,12 @@
 """Booking service - business logic for booking operations"""
 
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from ..models import Trip, TripStop, Booking, Seat
+from ..models import Trip, TripStop, Booking, Seat, TripSegmentInventory
 from ..utils.constants import BookingStatus, BusinessRules
+from .search_cache_service import SearchCacheService
+from .recent_trips_service import RecentTripsService
 
 
 class InsufficientSeatsError(Exception):
@@ -16,15 +19,27 @@ class BookingAlreadyCancelledError(Exception):
     pass
 
 
+class SeatAssignmentConflictError(Exception):
+    """Raised when a chosen seat was taken by a concurrent booking"""
+    pass
+
+
 class BookingService:
     """Service for booking operations"""
-    
-    @transaction.atomic
-    def create_booking(self, trip_id, from_stop_id, to_stop_id, user, passengers_data, 
-                      payment_method='cash', contact_name=None, contact_phone=None, contact_email=None):
+
+    SEAT_ASSIGNMENT_ATTEMPTS = 3
+
+    def create_booking(self, trip_id, from_stop_id, to_stop_id, user, passengers_data,
+                      payment_method='cash', contact_name=None, contact_phone=None, contact_email=None,
+                      hold_id=None):
         """
         Create booking with atomic seat reduction
-        
+
+        Seats are reserved with conditional per-segment UPDATEs instead of
+        locking the Trip row, so bookings on disjoint legs run in parallel.
+        Seats under active holds are left alone, except those of `hold_id`
+        when a hold is being converted into this booking.
+
         Args:
             trip_id: Trip ID
             from_stop_id: Starting TripStop ID
@@ -32,36 +47,46 @@ class BookingService:
             user: User object
             passengers_data: List of passenger dicts
             payment_method: Payment method choice
-            
+            hold_id: Seat hold this booking is converted from, if any
+
         Returns:
             Booking object
-            
+
         Raises:
             InsufficientSeatsError: If not enough seats available
         """
-        trip = Trip.objects.select_for_update().get(id=trip_id)
+        for attempt in range(self.SEAT_ASSIGNMENT_ATTEMPTS):
+            try:
+                return self._create_booking(
+                    trip_id, from_stop_id, to_stop_id, user, passengers_data,
+                    payment_method, contact_name, contact_phone, contact_email, hold_id
+                )
+            except SeatAssignmentConflictError:
+                if attempt == self.SEAT_ASSIGNMENT_ATTEMPTS - 1:
+                    raise InsufficientSeatsError("Seats are being booked by others, please retry")
+
+    @transaction.atomic
+    def _create_booking(self, trip_id, from_stop_id, to_stop_id, user, passengers_data,
+                        payment_method, contact_name, contact_phone, contact_email, hold_id):
+        trip = Trip.objects.get(id=trip_id)
         from_stop = TripStop.objects.get(id=from_stop_id, trip=trip)
         to_stop = TripStop.objects.get(id=to_stop_id, trip=trip)
-        
-        segments = [f"{i}-{i+1}" for i in range(from_stop.sequence, to_stop.sequence)]
+
+        segment_indexes = list(range(from_stop.sequence, to_stop.sequence))
+        segments = [f"{i}-{i+1}" for i in segment_indexes]
         checked_passengers = [p for p in passengers_data if p.get('is_checked', True)]
         passenger_count = len(checked_passengers)
-        
-        if not trip.seat_matrix:
-            raise InsufficientSeatsError("Seat matrix not initialized")
-        
-        min_seats = min(trip.seat_matrix.get(seg, 0) for seg in segments)
-        if min_seats < passenger_count:
-            raise InsufficientSeatsError(f"Only {min_seats} seats available")
-        
-        # Reduce seats atomically
-        for seg in segments:
-            trip.seat_matrix[seg] -= passenger_count
-        trip.save()
-        
+
+        self._reserve_segments(trip, segment_indexes, passenger_count, hold_id)
+
         fare = (to_stop.price_from_start - from_stop.price_from_start) * passenger_count
-        available_seats = self._get_available_seats_for_segments(trip, segments, passenger_count)
-        
+        available_seats = self._get_available_seats_for_segments(trip, segments, passenger_count, lock=True)
+        if len(available_seats) < passenger_count and Seat.objects.filter(trip=trip).exists():
+            # skip_locked passed over seats a booking on another leg is assigning; pick again
+            raise SeatAssignmentConflictError()
+        if self._assign_seats(available_seats, segments) != len(available_seats):
+            raise SeatAssignmentConflictError()
+
         passengers_with_seats = []
         for i, passenger_data in enumerate(checked_passengers):
             seat = available_seats[i] if i < len(available_seats) else None
@@ -71,11 +96,7 @@ class BookingService:
                 'gender': passenger_data.get('gender'),
                 'seat_number': seat.seat_number if seat else None
             })
-            
-            if seat:
-                seat.available_segments = [s for s in seat.available_segments if s not in segments]
-                seat.save()
-        
+
         booking = Booking.objects.create(
             user=user,
             trip=trip,
@@ -90,57 +111,150 @@ class BookingService:
             payment_method=payment_method,
             is_paid=False
         )
-        
+
+        self._refresh_seat_matrix_on_commit(trip.id)
         return booking
-    
+
     @transaction.atomic
     def cancel_booking(self, booking_id):
         """Cancel booking and restore seats atomically"""
-        booking = Booking.objects.select_related('trip').get(id=booking_id)
-        
+        booking = Booking.objects.select_for_update().select_related('from_stop', 'to_stop').get(id=booking_id)
+
         if booking.status == BookingStatus.CANCELLED:
             raise BookingAlreadyCancelledError("Booking already cancelled")
-        
-        trip = Trip.objects.select_for_update().get(id=booking.trip.id)
+
         segments = booking.get_crossed_segments()
         passenger_count = len(booking.passengers_data)
-        
-        for seg in segments:
-            trip.seat_matrix[seg] = trip.seat_matrix.get(seg, 0) + passenger_count
-        trip.save()
-        
+
+        TripSegmentInventory.objects.filter(
+            trip_id=booking.trip_id,
+            segment_index__in=range(booking.from_stop.sequence, booking.to_stop.sequence)
+        ).update(remaining=F('remaining') + passenger_count)
+
         # Release seat assignments
-        for passenger in booking.passengers_data:
-            seat_number = passenger.get('seat_number')
-            if seat_number:
-                seat = Seat.objects.filter(trip=trip, seat_number=seat_number).first()
-                if seat:
-                    seat.available_segments.extend(segments)
-                    seat.save()
-        
+        seat_numbers = [p.get('seat_number') for p in booking.passengers_data if p.get('seat_number')]
+        self._release_seats(booking.trip_id, seat_numbers, segments)
+
         booking.status = BookingStatus.CANCELLED
         booking.cancelled_at = timezone.now()
         booking.save()
-        
+
+        self._refresh_seat_matrix_on_commit(booking.trip_id)
         return booking
-    
+
     def get_available_seats_for_journey(self, trip, from_stop, to_stop):
-        """Get available seats for a journey between two stops"""
+        """Get available seats for a journey between two stops, net of active seat holds"""
+        from .seat_hold_service import SeatHoldService
+
         if not trip.seat_matrix:
             return 0
-        
-        segments = [f"{i}-{i+1}" for i in range(from_stop.sequence, to_stop.sequence)]
-        return min(trip.seat_matrix.get(seg, 0) for seg in segments) if segments else 0
-    
-    def _get_available_seats_for_segments(self, trip, segments, count):
-        """Get available seats for given segments"""
-        all_seats = Seat.objects.filter(trip=trip)
-        available = []
-        
-        for seat in all_seats:
-            if len(available) >= count:
-                break
-            if seat.is_available_for_segments(segments):
-                available.append(seat)
-        
-        return available
+
+        segment_indexes = range(from_stop.sequence, to_stop.sequence)
+        if not segment_indexes:
+            return 0
+
+        remaining = self.remaining_by_segment(trip, segment_indexes)
+        held = SeatHoldService().held_segments(trip.id)
+        return max(min(remaining[i] - held.get(i, 0) for i in segment_indexes), 0)
+
+    def remaining_by_segment(self, trip, segment_indexes):
+        """Unbooked seats per segment index, from the inventory or else seat_matrix"""
+        remaining = dict(TripSegmentInventory.objects.filter(
+            trip_id=trip.id, segment_index__in=segment_indexes
+        ).values_list('segment_index', 'remaining'))
+        return {
+            i: remaining[i] if i in remaining else trip.seat_matrix.get(f"{i}-{i+1}", 0)
+            for i in segment_indexes
+        }
+
+    def refresh_seat_matrix(self, trip_id):
+        """
+        Rewrite Trip.seat_matrix from the segment inventory under a brief row lock
+
+        Cached search responses listing the trip are dropped afterwards and
+        the recent trips projection takes the new counts, so both follow it.
+        """
+        with transaction.atomic():
+            Trip.objects.select_for_update().filter(id=trip_id).values_list('id', flat=True).first()
+            inventory = TripSegmentInventory.objects.filter(trip_id=trip_id).values_list('segment_index', 'remaining')
+            seat_matrix = {f"{index}-{index+1}": remaining for index, remaining in inventory}
+            if seat_matrix:
+                Trip.objects.filter(id=trip_id).update(seat_matrix=seat_matrix)
+        SearchCacheService.invalidate_trips([trip_id])
+        if seat_matrix:
+            RecentTripsService().update_seats(trip_id, seat_matrix)
+
+    def _reserve_segments(self, trip, segment_indexes, count, hold_id=None):
+        """Decrement every segment's remaining seats, or raise if any segment is short of unheld seats"""
+        from .seat_hold_service import SeatHoldService
+
+        held = SeatHoldService().held_segments(trip.id, exclude=hold_id)
+        if self._decrement_segments(trip, segment_indexes, count, held):
+            return
+
+        if not TripSegmentInventory.objects.filter(trip_id=trip.id).exists():
+            # Trip predates the inventory table: seed it from seat_matrix once
+            if not trip.seat_matrix:
+                raise InsufficientSeatsError("Seat matrix not initialized")
+            TripSegmentInventory.objects.bulk_create(TripSegmentInventory.build_for_trip(trip), ignore_conflicts=True)
+            if self._decrement_segments(trip, segment_indexes, count, held):
+                return
+
+        remaining = self.remaining_by_segment(trip, segment_indexes)
+        min_seats = min((remaining[i] - held.get(i, 0) for i in segment_indexes), default=0)
+        raise InsufficientSeatsError(f"Only {max(min_seats, 0)} seats available")
+
+    def _decrement_segments(self, trip, segment_indexes, count, held=None):
+        """Conditionally decrement all segments, keeping `held` seats free; undo the partial update if any is short"""
+        held = held or {}
+        if held and segment_indexes:
+            enough = Q()
+            for index in segment_indexes:
+                enough |= Q(segment_index=index, remaining__gte=count + held.get(index, 0))
+        else:
+            enough = Q(segment_index__in=segment_indexes, remaining__gte=count)
+        with transaction.atomic():
+            updated = TripSegmentInventory.objects.filter(enough, trip_id=trip.id).update(remaining=F('remaining') - count)
+            if updated != len(segment_indexes):
+                transaction.set_rollback(True)
+                return False
+        return True
+
+    def _refresh_seat_matrix_on_commit(self, trip_id):
+        # robust: a failed projection refresh must not surface as a failed (committed) booking
+        transaction.on_commit(lambda: self.refresh_seat_matrix(trip_id), robust=True)
+
+    def _get_available_seats_for_segments(self, trip, segments, count, lock=False):
+        """Get up to `count` seats free on every given segment (one query)"""
+        mask = Seat.mask_for_segments(segments)
+        seats = Seat.objects.filter(trip=trip)
+        if lock:
+            # Concurrent bookings skip seats another booking is assigning
+            seats = seats.select_for_update(skip_locked=True)
+        return list(
+            seats.annotate(free_bits=F('availability_mask').bitand(mask))
+            .filter(free_bits=mask)
+            .order_by('id')[:count]
+        )
+
+    def _assign_seats(self, seats, segments):
+        """Mark segments as taken on the given seats in one conditional UPDATE"""
+        if not seats:
+            return 0
+        mask = Seat.mask_for_segments(segments)
+        for seat in seats:
+            seat.availability_mask &= ~mask
+        return Seat.objects.filter(id__in=[seat.id for seat in seats]).annotate(
+            free_bits=F('availability_mask').bitand(mask)
+        ).filter(free_bits=mask).update(
+            availability_mask=F('availability_mask').bitand(~mask)
+        )
+
+    def _release_seats(self, trip_id, seat_numbers, segments):
+        """Mark segments as free again on the given seats in one UPDATE"""
+        if not seat_numbers or not segments:
+            return 0
+        mask = Seat.mask_for_segments(segments)
+        return Seat.objects.filter(trip_id=trip_id, seat_number__in=seat_numbers).update(
+            availability_mask=F('availability_mask').bitor(mask)
+        )
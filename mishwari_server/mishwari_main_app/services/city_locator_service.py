@@ -0,0 +1,176 @@
+"""City locator service - nearest-city lookups over an in-memory spatial grid"""
+
+import math
+import threading
+import uuid
+from collections import defaultdict
+from django.core.cache import cache
+from ..models import CityList
+from ..utils.cache_keys import CacheKeys
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CityGrid:
+    """
+    Fixed-size lat/lon bucket grid of city waypoints
+
+    Lookups only visit the cells around the query point, expanding ring by
+    ring until no unvisited cell can hold a closer city. Past MAX_RINGS a
+    far-away query scans every waypoint instead, so its cost stays linear.
+    """
+
+    MAX_RINGS = 40
+
+    def __init__(self, cities, cell_deg=0.5):
+        self.cell_deg = cell_deg
+        self.cities = {}
+        self.cells = defaultdict(list)
+
+        for city in cities:
+            for waypoint in city.waypoints or []:
+                try:
+                    lat, lon = float(waypoint['lat']), float(waypoint['lon'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self.cities[city.id] = city
+                self.cells[self._cell(lat, lon)].append((lat, lon, city.id))
+
+        if self.cells:
+            rows = [row for row, _ in self.cells]
+            cols = [col for _, col in self.cells]
+            self.bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return len(self.cities)
+
+    def nearest(self, lat, lon, k=1):
+        """Return up to k (distance_km, city) tuples, closest first"""
+        if not self.cells or k < 1:
+            return []
+
+        row, col = self._cell(lat, lon)
+        best = {}
+        for ring in range(self.MAX_RINGS + 1):
+            for cell in self._ring_cells(row, col, ring):
+                self._collect(cell, lat, lon, best)
+
+            ranked = sorted(best.items(), key=lambda item: item[1])
+            if len(ranked) >= min(k, len(self.cities)) and ranked[min(k, len(ranked)) - 1][1] <= self._ring_bound_km(lat, lon, ring):
+                break
+            if self._covers_grid(row, col, ring):
+                break
+        else:
+            for cell in self.cells:
+                self._collect(cell, lat, lon, best)
+            ranked = sorted(best.items(), key=lambda item: item[1])
+
+        return [(distance, self.cities[city_id]) for city_id, distance in ranked[:k]]
+
+    def within(self, lat, lon, radius_km):
+        """Return (distance_km, city) tuples within radius_km, closest first"""
+        if not self.cells or radius_km < 0:
+            return []
+
+        lat_span = radius_km / KM_PER_DEGREE
+        max_abs_lat = min(89.0, abs(lat) + lat_span)
+        lon_span = min(180.0, lat_span / max(math.cos(math.radians(max_abs_lat)), 1e-6))
+
+        min_row, min_col = self._cell(lat - lat_span, lon - lon_span)
+        max_row, max_col = self._cell(lat + lat_span, lon + lon_span)
+
+        best = {}
+        for cell_row in range(max(min_row, self.bounds[0]), min(max_row, self.bounds[1]) + 1):
+            for cell_col in range(max(min_col, self.bounds[2]), min(max_col, self.bounds[3]) + 1):
+                self._collect((cell_row, cell_col), lat, lon, best)
+
+        matches = sorted((distance, city_id) for city_id, distance in best.items() if distance <= radius_km)
+        return [(distance, self.cities[city_id]) for distance, city_id in matches]
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _collect(self, cell, lat, lon, best):
+        for point_lat, point_lon, city_id in self.cells.get(cell, ()):
+            distance = haversine_km(lat, lon, point_lat, point_lon)
+            if distance < best.get(city_id, float('inf')):
+                best[city_id] = distance
+
+    def _ring_cells(self, row, col, ring):
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for offset in range(-ring, ring + 1):
+            cells.extend([(row - ring, col + offset), (row + ring, col + offset)])
+        for offset in range(-ring + 1, ring):
+            cells.extend([(row + offset, col - ring), (row + offset, col + ring)])
+        return cells
+
+    def _ring_bound_km(self, lat, lon, ring):
+        """Lower bound on the distance to any point outside the visited rings"""
+        row, col = self._cell(lat, lon)
+        lat_gap = min(lat - (row - ring) * self.cell_deg, (row + ring + 1) * self.cell_deg - lat)
+        lon_gap = min(lon - (col - ring) * self.cell_deg, (col + ring + 1) * self.cell_deg - lon)
+        max_abs_lat = min(89.0, abs(lat) + (ring + 1) * self.cell_deg)
+        # Slight safety margin: great-circle paths are shorter than parallels
+        return 0.99 * KM_PER_DEGREE * min(lat_gap, lon_gap * math.cos(math.radians(max_abs_lat)))
+
+    def _covers_grid(self, row, col, ring):
+        min_row, max_row, min_col, max_col = self.bounds
+        return (row - ring <= min_row and row + ring >= max_row and
+                col - ring <= min_col and col + ring >= max_col)
+
+
+class CityLocatorService:
+    """Nearest-city lookups shared by every request in the process"""
+
+    _grid = None
+    _grid_version = None
+    _lock = threading.Lock()
+
+    def nearest_city(self, lat, lon):
+        """Return (city, distance_km) of the closest city, or (None, None)"""
+        matches = self.nearest_cities(lat, lon, k=1)
+        return matches[0] if matches else (None, None)
+
+    def nearest_cities(self, lat, lon, k=5):
+        """Return up to k (city, distance_km) tuples, closest first"""
+        return [(city, distance) for distance, city in self._get_grid().nearest(lat, lon, k)]
+
+    def cities_within(self, lat, lon, radius_km):
+        """Return (city, distance_km) tuples within radius_km, closest first"""
+        return [(city, distance) for distance, city in self._get_grid().within(lat, lon, radius_km)]
+
+    @staticmethod
+    def invalidate():
+        """Force every process to rebuild its grid on next lookup"""
+        cache.set(CacheKeys.city_locator_version(), uuid.uuid4().hex, timeout=None)
+
+    @classmethod
+    def _get_grid(cls):
+        # Random tokens (not counters) so a flushed cache never revives an old version
+        key = CacheKeys.city_locator_version()
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+
+        grid = cls._grid
+        if grid is not None and cls._grid_version == version:
+            return grid
+
+        with cls._lock:
+            if cls._grid is None or cls._grid_version != version:
+                cls._grid = CityGrid(CityList.objects.all())
+                cls._grid_version = version
+            return cls._grid
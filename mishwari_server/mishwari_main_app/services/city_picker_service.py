@@ -0,0 +1,70 @@
+"""City picker service - departure/destination cities with bookable trips on a date"""
+
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from ..models import TripSegmentPair
+from ..utils.cache_keys import CacheKeys
+from ..utils.constants import TripStatus
+
+
+class CityPickerService:
+    """
+    Grouped city lists for the home-page pickers, cached per journey date
+
+    Both lists come from the city-pair index in one grouped query. Entries
+    live under a per-date version token, so publishing, cancelling or
+    moving a trip invalidates every list of the dates it touches at once.
+    """
+
+    DEFAULT_TTL = 3600
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'CITY_PICKER_TTL', self.DEFAULT_TTL)
+
+    def departure_cities(self, journey_date):
+        """Cities a published trip leaves from on a date: [{id, city, trip_count}]"""
+        key = CacheKeys.departure_cities(journey_date, self._version(journey_date))
+        cities = cache.get(key)
+        if cities is None:
+            cities = self._grouped(self._pairs(journey_date), 'from_city')
+            cache.set(key, cities, timeout=self.ttl)
+        return cities
+
+    def destination_cities(self, from_city, journey_date):
+        """Cities reachable from `from_city` by a published trip on a date: [{id, city, trip_count}]"""
+        key = CacheKeys.destination_cities(from_city.id, journey_date, self._version(journey_date))
+        cities = cache.get(key)
+        if cities is None:
+            cities = self._grouped(self._pairs(journey_date).filter(from_city=from_city), 'to_city')
+            cache.set(key, cities, timeout=self.ttl)
+        return cities
+
+    @staticmethod
+    def invalidate(*journey_dates):
+        """Drop cached city lists for the given dates"""
+        cache.set_many(
+            {CacheKeys.city_picker_version(journey_date): uuid.uuid4().hex for journey_date in journey_dates if journey_date},
+            timeout=None
+        )
+
+    def _version(self, journey_date):
+        key = CacheKeys.city_picker_version(journey_date)
+        version = cache.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key)
+        return version
+
+    def _pairs(self, journey_date):
+        return TripSegmentPair.objects.filter(journey_date=journey_date, status=TripStatus.PUBLISHED)
+
+    def _grouped(self, pairs, city_field):
+        rows = (
+            pairs.values_list(f'{city_field}_id', f'{city_field}__city')
+            .annotate(trip_count=Count('trip_id', distinct=True))
+            .order_by(f'{city_field}__city')
+        )
+        return [{'id': city_id, 'city': city, 'trip_count': trip_count} for city_id, city, trip_count in rows]
@@ -1,6 +1,7 @@
 import os
 import requests
 from typing import Dict
+from ..utils.sms_providers import SMSProvider
 
 class GoogleIdentityProxyService:
     """Proxy service for Google Identity Toolkit REST API"""
@@ -8,6 +9,7 @@ class GoogleIdentityProxyService:
     FIREBASE_API_KEY = os.getenv('FIREBASE_WEB_API_KEY')
     VERIFY_CODE_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:sendVerificationCode?key={FIREBASE_API_KEY}"
     SIGN_IN_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPhoneNumber?key={FIREBASE_API_KEY}"
+    TIMEOUT = (3.05, 5)
     
     @classmethod
     def send_otp(cls, phone_number: str, recaptcha_token: str) -> Dict:
@@ -21,7 +23,7 @@ class GoogleIdentityProxyService:
         }
         
         try:
-            response = requests.post(cls.VERIFY_CODE_URL, json=payload, timeout=10)
+            response = SMSProvider.session().post(cls.VERIFY_CODE_URL, json=payload, timeout=cls.TIMEOUT)
             response.raise_for_status()
             data = response.json()
             return {
@@ -39,7 +41,8 @@ class GoogleIdentityProxyService:
             return {
                 'success': False,
                 'error': error_msg,
-                'message': 'Failed to send OTP via Firebase'
+                'message': 'Failed to send OTP via Firebase',
+                'server_error': e.response is None or e.response.status_code >= 500
             }
     
     @classmethod
@@ -51,7 +54,7 @@ class GoogleIdentityProxyService:
         }
         
         try:
-            response = requests.post(cls.SIGN_IN_URL, json=payload, timeout=10)
+            response = SMSProvider.session().post(cls.SIGN_IN_URL, json=payload, timeout=cls.TIMEOUT)
             response.raise_for_status()
             data = response.json()
             
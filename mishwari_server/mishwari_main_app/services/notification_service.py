@@ -1,31 +1,117 @@
 """Notification service for SMS and push notifications"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.utils import timezone
-from ..models import Trip, Booking
+from ..models import Trip, Booking, BookingNotification, OutboxMessage
+from .sms_dispatch_service import SMSDispatchService
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationService:
+    """
+    Fans trip notifications out to every confirmed booking
+
+    Requests only queue a trip_notification outbox message. The outbox
+    worker then calls fan_out(), which resolves every recipient in one
+    query, records one BookingNotification per booking, renders the text
+    once per template and sends in batches of NOTIFICATION_BATCH_SIZE
+    with at most NOTIFICATION_CONCURRENCY[channel] sends in flight. Each
+    row keeps its own status, so a retry only sends what is still pending.
+    """
+
+    TEMPLATES = {
+        'departure': "Your shuttle to {to_city} is departing in 10 minutes. Please board Bus {bus_number} now.",
+    }
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_CONCURRENCY = {'sms': 8}
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, dispatcher=None):
+        self.dispatcher = dispatcher or SMSDispatchService()
+        self.batch_size = getattr(settings, 'NOTIFICATION_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        self.concurrency = {**self.DEFAULT_CONCURRENCY, **getattr(settings, 'NOTIFICATION_CONCURRENCY', {})}
+
     def send_departure_notification(self, trip_id):
-        """Send SMS/Push notification when flexible trip departs"""
-        trip = Trip.objects.get(id=trip_id)
-        bookings = Booking.objects.filter(trip=trip, status='confirmed')
-        
-        for booking in bookings:
-            message = f"Your shuttle to {trip.to_city.city} is departing in 10 minutes. Please board Bus {trip.bus.bus_number} now."
-            # TODO: Integrate with Infobip SMS API
-            # TODO: Integrate with Push Notification service
-            print(f"Notification sent to {booking.user.username}: {message}")
-        
-        trip.actual_departure = timezone.now()
-        trip.save()
-        
-        return len(bookings)
-    
+        """Queue the departure notice for a trip's passengers; returns how many will be notified"""
+        OutboxMessage.objects.create(channel='trip_notification', payload={'trip_id': trip_id, 'kind': 'departure'})
+        return Booking.objects.filter(trip_id=trip_id, status='confirmed').count()
+
+    def fan_out(self, trip_id, kind):
+        """
+        Deliver a trip notification to every confirmed booking not yet notified
+
+        Returns True once no row is left pending, False if some should be
+        retried, or None if no SMS provider is configured.
+        """
+        trip = Trip.objects.select_related('to_city', 'bus').get(id=trip_id)
+        self._create_recipients(trip, kind)
+
+        pending = list(
+            BookingNotification.objects.filter(booking__trip_id=trip_id, kind=kind, status='pending').order_by('id')
+        )
+        if not pending:
+            return True
+        if not self.dispatcher.available():
+            BookingNotification.objects.filter(id__in=[row.id for row in pending]).update(
+                status='skipped', last_error='No SMS provider configured'
+            )
+            return None
+
+        text = self.render(kind, trip)
+        with ThreadPoolExecutor(max_workers=self.concurrency['sms'], thread_name_prefix='notify-sms') as executor:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                providers = executor.map(lambda row: self._send(row.recipient, text), batch)
+                self._settle(batch, list(providers))
+        return not any(row.status == 'pending' for row in pending)
+
+    def render(self, kind, trip):
+        return self.TEMPLATES[kind].format(
+            to_city=trip.to_city.city if trip.to_city_id else '',
+            bus_number=trip.bus.bus_number if trip.bus_id else ''
+        )
+
+    def _create_recipients(self, trip, kind):
+        rows = (
+            Booking.objects.filter(trip=trip, status='confirmed')
+            .values_list('id', 'contact_phone', 'user__profile__mobile_number', 'user__username')
+        )
+        notifications = []
+        for booking_id, contact_phone, mobile_number, username in rows:
+            recipient = contact_phone or mobile_number or username
+            notifications.append(BookingNotification(
+                booking_id=booking_id, kind=kind, channel='sms', recipient=recipient or '',
+                status='pending' if recipient else 'skipped', last_error='' if recipient else 'No phone number'
+            ))
+        BookingNotification.objects.bulk_create(notifications, ignore_conflicts=True)
+
+    def _send(self, recipient, text):
+        try:
+            return self.dispatcher.deliver_text(recipient, text)
+        except Exception:
+            logger.exception('Notification to %s raised', recipient)
+            return None
+
+    def _settle(self, rows, providers):
+        now = timezone.now()
+        for row, provider in zip(rows, providers):
+            row.attempts += 1
+            if provider:
+                row.status, row.provider, row.sent_at, row.last_error = 'sent', provider, now, ''
+            else:
+                row.last_error = 'No provider accepted the message'
+                if row.attempts >= self.MAX_ATTEMPTS:
+                    row.status = 'failed'
+        BookingNotification.objects.bulk_update(rows, ['status', 'provider', 'attempts', 'sent_at', 'last_error'])
+
     def send_booking_confirmation(self, booking):
         """Send booking confirmation notification"""
         message = f"Booking confirmed for trip to {booking.to_stop.city.city} on {booking.trip.journey_date}"
         # TODO: Implement SMS/Push
         print(f"Confirmation sent to {booking.user.username}: {message}")
-    
+
     def send_cancellation_notification(self, booking):
         """Send booking cancellation notification"""
         message = f"Your booking for trip to {booking.to_stop.city.city} has been cancelled"
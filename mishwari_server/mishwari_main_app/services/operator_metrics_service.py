@@ -0,0 +1,97 @@
+"""Operator metrics service - trip counters and batch health-score recomputation"""
+
+from django.db.models import F, Count, OuterRef, Subquery, FloatField, IntegerField, Value
+from django.db.models.functions import Cast, Coalesce, Floor, Greatest, Least, NullIf
+from ..models import Trip, BusOperator, OperatorMetrics
+from ..utils.constants import TripStatus
+
+
+class OperatorMetricsService:
+    """
+    Keeps OperatorMetrics trip counters current and recomputes health scores in bulk
+
+    Trip events adjust total_trips and cancelled_trips, and the
+    cancellation rate derived from them, in one UPDATE of the operator's
+    metrics row, so their cost does not grow with the operator's trip
+    history. Health scores are refreshed for every operator at once by
+    recompute_health_scores(), run periodically by the
+    recompute_health_scores command.
+    """
+
+    def trip_created(self, trip):
+        self._adjust(trip.operator_id, total=1, cancelled=int(trip.status == TripStatus.CANCELLED))
+
+    def trips_created(self, operator_id, count):
+        """Count trips created in bulk, which post_save receivers never see"""
+        self._adjust(operator_id, total=count)
+
+    def trip_status_changed(self, trip, previous_status):
+        was_cancelled = previous_status == TripStatus.CANCELLED
+        is_cancelled = trip.status == TripStatus.CANCELLED
+        if was_cancelled != is_cancelled:
+            self._adjust(trip.operator_id, cancelled=1 if is_cancelled else -1)
+
+    def trip_deleted(self, trip):
+        self._adjust(trip.operator_id, total=-1, cancelled=-int(trip.status == TripStatus.CANCELLED))
+
+    def recompute_health_scores(self, recount=False):
+        """
+        Refresh health_score of every operator in one UPDATE; returns rows updated
+
+        With `recount`, trip counters and cancellation rates are first
+        recomputed exactly from Trip, correcting drift from bulk updates
+        that bypass signals.
+        """
+        self._create_missing()
+        if recount:
+            self._recount()
+        avg_rating = Subquery(BusOperator.objects.filter(id=OuterRef('operator_id')).values('avg_rating')[:1])
+        score = Cast(avg_rating, FloatField()) * 10 - F('cancellation_rate') * 2 - F('strikes') * 15
+        # Floor then clamp matches int() truncation for every score that survives the clamp
+        return OperatorMetrics.objects.update(
+            health_score=Greatest(Value(0), Least(Value(100), Cast(Floor(score), IntegerField())))
+        )
+
+    def _adjust(self, operator_id, total=0, cancelled=0):
+        if not (total or cancelled):
+            return
+        # A missing row has nothing to decrement; it is created only to count new trips
+        if not self._update_counters(operator_id, total, cancelled) and total >= 0 and cancelled >= 0:
+            OperatorMetrics.objects.get_or_create(operator_id=operator_id)
+            self._update_counters(operator_id, total, cancelled)
+
+    def _update_counters(self, operator_id, total, cancelled):
+        # Every right-hand side reads the row as it was before this UPDATE; the
+        # floor at zero absorbs decrements of trips counted before the backfill
+        counters = {
+            field: Greatest(F(field) + delta, Value(0)) if delta else F(field)
+            for field, delta in (('total_trips', total), ('cancelled_trips', cancelled))
+        }
+        return OperatorMetrics.objects.filter(operator_id=operator_id).update(
+            cancellation_rate=self._rate(counters['cancelled_trips'], counters['total_trips']),
+            **{field: value for field, value in counters.items() if not isinstance(value, F)}
+        )
+
+    def _recount(self):
+        trips = Trip.objects.filter(operator_id=OuterRef('operator_id')).order_by().values('operator_id')
+        total_trips = Coalesce(Subquery(trips.annotate(count=Count('id')).values('count')), 0)
+        cancelled_trips = Coalesce(
+            Subquery(trips.filter(status=TripStatus.CANCELLED).annotate(count=Count('id')).values('count')), 0
+        )
+        OperatorMetrics.objects.update(total_trips=total_trips, cancelled_trips=cancelled_trips)
+        OperatorMetrics.objects.update(cancellation_rate=self._rate(F('cancelled_trips'), F('total_trips')))
+
+    @staticmethod
+    def _create_missing():
+        missing = BusOperator.objects.filter(metrics__isnull=True).values_list('id', flat=True)
+        OperatorMetrics.objects.bulk_create(
+            [OperatorMetrics(operator_id=operator_id) for operator_id in missing], ignore_conflicts=True
+        )
+
+    @staticmethod
+    def _rate(cancelled_trips, total_trips):
+        return Coalesce(
+            Cast(cancelled_trips, FloatField()) * 100 / NullIf(total_trips, 0),
+            Value(0.0),
+            output_field=FloatField()
+        )
@@ -0,0 +1,112 @@
+"""OTP rate limit service - per-number and per-IP throttling of OTP requests"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from ..models import OTPAttempt
+from ..utils.cache_keys import CacheKeys
+from ..utils.rate_limiter import SlidingWindowLimiter
+
+
+class OTPRateLimitService:
+    """
+    Decides whether an OTP may be sent to a number from a client IP
+
+    Short-term limits per number and per IP, and the daily cap per number,
+    are sliding windows in the cache, so a flood of requests costs cache
+    increments only. Exceeding the daily cap blocks the number for
+    OTP_BLOCK_SECONDS; only that transition is written to OTPAttempt,
+    which keeps blocks across cache flushes and lets admins lift them.
+    Block state is cached per number, so the database is read at most
+    once per OTP_BLOCK_CHECK_TTL for numbers that are not blocked.
+    """
+
+    # scope: (limit, window seconds)
+    DEFAULT_LIMITS = {
+        'mobile': (5, 600),
+        'ip': (30, 600),
+        'mobile_daily': (20, 86400),
+    }
+    DEFAULT_BLOCK_SECONDS = 86400
+    DEFAULT_BLOCK_CHECK_TTL = 300
+    DEFAULT_TRUSTED_PROXIES = 0
+
+    def __init__(self):
+        limits = {**self.DEFAULT_LIMITS, **getattr(settings, 'OTP_RATE_LIMITS', {})}
+        self.limiters = {
+            scope: SlidingWindowLimiter(f'otp:{scope}', limit, window)
+            for scope, (limit, window) in limits.items()
+        }
+        self.block_seconds = getattr(settings, 'OTP_BLOCK_SECONDS', self.DEFAULT_BLOCK_SECONDS)
+        self.block_check_ttl = getattr(settings, 'OTP_BLOCK_CHECK_TTL', self.DEFAULT_BLOCK_CHECK_TTL)
+        self.trusted_proxies = getattr(settings, 'OTP_TRUSTED_PROXIES', self.DEFAULT_TRUSTED_PROXIES)
+
+    def check(self, mobile_number, ip=None):
+        """Count an OTP request; returns 0 if it may proceed, else seconds to wait"""
+        if ip:
+            retry_after = self.limiters['ip'].hit(ip)
+            if retry_after:
+                return retry_after
+
+        retry_after = self._blocked_for(mobile_number)
+        if retry_after:
+            return retry_after
+
+        retry_after = self.limiters['mobile'].hit(mobile_number)
+        if retry_after:
+            return retry_after
+
+        if self.limiters['mobile_daily'].hit(mobile_number):
+            return self._block(mobile_number)
+        return 0
+
+    def reset(self, mobile_number):
+        """Clear the short-term window of a number after a successful login"""
+        self.limiters['mobile'].reset(mobile_number)
+
+    @staticmethod
+    def unblock(mobile_numbers):
+        OTPAttempt.objects.filter(mobile_number__in=mobile_numbers).update(blocked_until=None, attempt_count=0)
+        cache.delete_many([CacheKeys.otp_block(mobile_number) for mobile_number in mobile_numbers])
+
+    def client_ip(self, request):
+        """
+        Address of the client, skipping OTP_TRUSTED_PROXIES reverse proxies
+
+        Only the entries those proxies appended to X-Forwarded-For are
+        trusted; anything further left is client-supplied.
+        """
+        if self.trusted_proxies:
+            forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        return request.META.get('REMOTE_ADDR')
+
+    def _blocked_for(self, mobile_number):
+        key = CacheKeys.otp_block(mobile_number)
+        blocked_until = cache.get(key)
+        if blocked_until is None:
+            row = OTPAttempt.objects.filter(mobile_number=mobile_number).values_list('blocked_until', flat=True).first()
+            blocked_until = row.timestamp() if row and row > timezone.now() else 0
+            # 0 caches "not blocked", so unblocked numbers skip the database
+            cache.set(key, blocked_until, timeout=self._remaining(blocked_until) or self.block_check_ttl)
+        return self._remaining(blocked_until)
+
+    def _block(self, mobile_number):
+        blocked_until = timezone.now() + timedelta(seconds=self.block_seconds)
+        updated = OTPAttempt.objects.filter(mobile_number=mobile_number).update(
+            blocked_until=blocked_until, attempt_count=F('attempt_count') + 1
+        )
+        if not updated:
+            OTPAttempt.objects.get_or_create(
+                mobile_number=mobile_number, defaults={'blocked_until': blocked_until, 'attempt_count': 1}
+            )
+        cache.set(CacheKeys.otp_block(mobile_number), blocked_until.timestamp(), timeout=self.block_seconds)
+        return self.block_seconds
+
+    @staticmethod
+    def _remaining(blocked_until):
+        remaining = blocked_until - timezone.now().timestamp()
+        return max(1, int(remaining)) if remaining > 0 else 0
@@ -0,0 +1,168 @@
+"""Outbox service - durable, rate-limited delivery of outbound notifications"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models import OutboxMessage
+from ..utils.indexing_client import IndexingClient, DEFERRED
+from ..utils.publication_utils import trip_url, ping_feed
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    Queues search-engine and passenger notifications and drains them in the background
+
+    Producers write OutboxMessage rows inside their own transaction, so a
+    notification exists exactly when the change it announces committed.
+    The process_outbox worker claims due rows under a lease, batches them
+    per channel (IndexNow takes many URLs per call, feed pings collapse
+    into one, Google takes batches), spaces calls per channel and retries
+    failures with exponential backoff until MAX_ATTEMPTS. Rows held back
+    by a daily indexing quota wait for the quota to reset without using
+    up an attempt.
+    """
+
+    DEFAULT_BATCH_SIZE = 100
+    MAX_ATTEMPTS = 8
+    BACKOFF_BASE = 30
+    BACKOFF_MAX = 3600
+    LEASE_SECONDS = 300
+    # Minimum seconds between two calls to the same service
+    DEFAULT_MIN_INTERVALS = {
+        'google_indexing': 0.5,
+        'indexnow': 1.0,
+        'feed_ping': 1.0,
+        'trip_notification': 0,
+    }
+
+    def __init__(self, batch_size=None, min_intervals=None):
+        self.batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        self.min_intervals = {
+            **self.DEFAULT_MIN_INTERVALS,
+            **getattr(settings, 'OUTBOX_MIN_INTERVALS', {}),
+            **(min_intervals or {}),
+        }
+        self._last_call = {}
+        self.client = IndexingClient()
+
+    @staticmethod
+    def enqueue_trips_published(trip_ids):
+        """Announce newly published trips to Google, IndexNow and the feed ping"""
+        urls = [trip_url(trip_id) for trip_id in trip_ids]
+        if not urls:
+            return
+        OutboxMessage.objects.bulk_create([
+            *(OutboxMessage(channel='google_indexing', payload={'url': url, 'action': 'URL_UPDATED'}) for url in urls),
+            OutboxMessage(channel='indexnow', payload={'urls': urls}),
+            OutboxMessage(channel='feed_ping'),
+        ])
+
+    @staticmethod
+    def enqueue_trip_removed(trip_id):
+        """Ask Google to drop a trip page that is no longer bookable"""
+        OutboxMessage.objects.create(channel='google_indexing', payload={'url': trip_url(trip_id), 'action': 'URL_DELETED'})
+
+    def process(self, limit=None):
+        """Deliver up to `limit` due messages; returns {status: message count}"""
+        counts = defaultdict(int)
+        by_channel = defaultdict(list)
+        for message in self._claim(limit or self.batch_size):
+            by_channel[message.channel].append(message)
+
+        for channel, messages in by_channel.items():
+            for batch, call in self._calls(channel, messages):
+                self._throttle(channel)
+                try:
+                    result, error = call(), 'Rejected or unreachable, see worker log'
+                except Exception as e:
+                    logger.exception(f"[OUTBOX] {channel} delivery raised")
+                    result, error = False, str(e)
+                for status in self._settle(batch, result, error):
+                    counts[status] += 1
+        return dict(counts)
+
+    def _claim(self, limit):
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')
+                .values_list('id', flat=True)[:limit]
+            )
+            # Lease: a worker that dies mid-delivery hands the rows back after LEASE_SECONDS
+            OutboxMessage.objects.filter(id__in=ids).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=self.LEASE_SECONDS)
+            )
+        return list(OutboxMessage.objects.filter(id__in=ids).order_by('id'))
+
+    def _calls(self, channel, messages):
+        """
+        Split a channel's messages into (messages, call) pairs
+
+        A call returns one result for all its messages, or a list with one
+        result per message.
+        """
+        if channel == 'google_indexing':
+            notifications = [(message.payload['url'], message.payload['action']) for message in messages]
+            return [(messages, lambda: self.client.google_publish(notifications))]
+        if channel == 'indexnow':
+            urls = list(dict.fromkeys(url for message in messages for url in message.payload['urls']))
+            return [(messages, lambda: self.client.indexnow_submit(urls))]
+        if channel == 'feed_ping':
+            return [(messages, ping_feed)]
+        if channel == 'trip_notification':
+            # Each message fans out to a whole trip's passengers under its own limits
+            notifier = NotificationService()
+            return [
+                ([message], lambda message=message: notifier.fan_out(message.payload['trip_id'], message.payload['kind']))
+                for message in messages
+            ]
+        return [(messages, lambda: False)]
+
+    def _settle(self, messages, result, error):
+        """Record one call's outcome on its messages; returns their new statuses"""
+        now = timezone.now()
+        results = result if isinstance(result, list) else [result] * len(messages)
+        for message, result in zip(messages, results):
+            if result == DEFERRED:
+                # Quota, not failure: hand the attempt back and wait for the reset
+                message.attempts -= 1
+                message.next_attempt_at = self.client.quota_resets_at()
+                message.last_error = 'Daily quota reached'
+            elif result:
+                message.status, message.sent_at, message.last_error = 'sent', now, ''
+            elif result is None:
+                message.status, message.last_error = 'skipped', 'Not configured'
+            elif message.attempts >= self.MAX_ATTEMPTS:
+                message.status, message.last_error = 'failed', error
+            else:
+                message.next_attempt_at = now + timedelta(seconds=self.backoff(message.attempts))
+                message.last_error = error
+        OutboxMessage.objects.bulk_update(messages, ['status', 'attempts', 'sent_at', 'next_attempt_at', 'last_error'])
+        return [
+            message.status if message.status != 'pending' else 'deferred' if result == DEFERRED else 'retrying'
+            for message, result in zip(messages, results)
+        ]
+
+    def backoff(self, attempts):
+        """Seconds to wait before the next try after `attempts` failed ones"""
+        return min(self.BACKOFF_BASE * 2 ** (attempts - 1), self.BACKOFF_MAX)
+
+    def _throttle(self, channel):
+        interval = self.min_intervals.get(channel, 0)
+        last_call = self._last_call.get(channel)
+        if last_call is not None and interval:
+            wait = last_call + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        self._last_call[channel] = time.monotonic()
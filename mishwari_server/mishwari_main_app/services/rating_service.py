@@ -0,0 +1,78 @@
+"""Rating service - running review aggregates for buses, drivers and operators"""
+
+from django.db import transaction
+from django.db.models import F, Sum, Count, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from ..models import TripReview, Bus, Driver, BusOperator
+
+
+class RatingService:
+    """
+    Keeps rating averages as running sums and counts
+
+    Recording a review adds its scores to rating_sum and total_reviews of
+    its bus, driver and operator in one UPDATE each; the average is
+    recomputed from the new totals in the same statement, so the work per
+    review does not grow with the review history. reconcile() recomputes
+    exact values from TripReview in bulk. Operator health scores pick up
+    the new averages in the recompute_health_scores batch job.
+    """
+
+    # (model, review FK to it, review score field, model average field)
+    TARGETS = (
+        (Bus, 'bus_snapshot', 'bus_condition_rating', 'avg_rating'),
+        (Driver, 'driver_snapshot', 'driver_rating', 'driver_rating'),
+        (BusOperator, 'operator_snapshot', 'overall_rating', 'avg_rating'),
+    )
+    BATCH_SIZE = 500
+
+    def record_review(self, review):
+        self._apply(review, 1)
+
+    def remove_review(self, review):
+        self._apply(review, -1)
+
+    def reconcile(self):
+        """Recompute every aggregate from the reviews; returns {model name: rows fixed}"""
+        fixed = {}
+        for model, review_field, score_field, average_field in self.TARGETS:
+            totals = {
+                target_id: (rating_sum, count)
+                for target_id, rating_sum, count in TripReview.objects.filter(**{f'{review_field}__isnull': False})
+                .values_list(review_field).annotate(rating_sum=Sum(score_field), count=Count('id')).order_by()
+            }
+            changed = []
+            rows = model.objects.only('id', 'rating_sum', 'total_reviews', average_field)
+            for row in rows.iterator(chunk_size=self.BATCH_SIZE):
+                rating_sum, count = totals.get(row.id, (0, 0))
+                average = round(rating_sum / count, 2) if count else 0
+                if (row.rating_sum, row.total_reviews) != (rating_sum, count) or float(getattr(row, average_field) or 0) != average:
+                    row.rating_sum, row.total_reviews = rating_sum, count
+                    setattr(row, average_field, average)
+                    changed.append(row)
+            model.objects.bulk_update(changed, ['rating_sum', 'total_reviews', average_field], batch_size=self.BATCH_SIZE)
+            fixed[model.__name__] = len(changed)
+        return fixed
+
+    def _apply(self, review, sign):
+        with transaction.atomic():
+            for model, review_field, score_field, average_field in self.TARGETS:
+                target_id = getattr(review, f'{review_field}_id')
+                if target_id is None:
+                    continue
+                # Every right-hand side reads the row as it was before this UPDATE
+                rating_sum = F('rating_sum') + sign * getattr(review, score_field)
+                total_reviews = F('total_reviews') + sign
+                model.objects.filter(id=target_id).update(
+                    rating_sum=rating_sum,
+                    total_reviews=total_reviews,
+                    **{average_field: self._average(rating_sum, total_reviews)}
+                )
+
+    @staticmethod
+    def _average(rating_sum, total_reviews):
+        return Coalesce(
+            Round(Cast(rating_sum, FloatField()) / NullIf(total_reviews, 0), 2),
+            Value(0.0),
+            output_field=FloatField()
+        )
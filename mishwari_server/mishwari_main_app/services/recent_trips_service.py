@@ -0,0 +1,119 @@
+"""Recent trips service - maintained projection of recently published trips"""
+
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+from ..models import Trip, TripStop
+from ..utils.cache_keys import CacheKeys
+from ..utils.cache_lock import cache_lock
+from ..utils.constants import TripStatus
+
+logger = logging.getLogger(__name__)
+
+
+class RecentTripsService:
+    """
+    Recently published trips for the homepage and the Atom feed
+
+    The projection lives in the cache as an index of (created_at, trip id,
+    journey date), newest first, plus one entry per trip with everything
+    the readers render. Publish, cancel and stop events upsert or drop a
+    trip; seat matrix refreshes rewrite only that trip's entry. Readers hit
+    the database only when the projection was evicted, and then rebuild it
+    in two queries.
+    """
+
+    DEFAULT_LIMIT = 1000
+    DEFAULT_TTL = 86400
+
+    def __init__(self, limit=None, ttl=None):
+        self.limit = limit if limit is not None else getattr(settings, 'RECENT_TRIPS_LIMIT', self.DEFAULT_LIMIT)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'RECENT_TRIPS_TTL', self.DEFAULT_TTL)
+
+    def upcoming(self, count):
+        """Newest published trips that have not departed yet"""
+        today = timezone.now().date()
+        return self._read(count, lambda journey_date: journey_date >= today)
+
+    def latest(self, count):
+        """Newest published trips, departed or not"""
+        return self._read(count, lambda journey_date: True)
+
+    def refresh_trips(self, trip_ids):
+        """Upsert the trips that are published and drop the ones that are not"""
+        trip_ids = set(trip_ids)
+        entries = {trip.id: self._entry(trip) for trip in self._published().filter(id__in=trip_ids)}
+
+        with cache_lock(CacheKeys.recent_trips_lock()) as locked:
+            index = cache.get(CacheKeys.recent_trips_index())
+            if index is None:
+                # Nothing to maintain: the next reader rebuilds from the database
+                return
+            if not locked:
+                logger.warning(f"Recent trips projection busy, dropping it to refresh trips {sorted(trip_ids)}")
+                cache.delete(CacheKeys.recent_trips_index())
+                return
+
+            index = [row for row in index if row[1] not in trip_ids]
+            index.extend((entry['created_at'], entry['id'], entry['journey_date']) for entry in entries.values())
+            index.sort(key=lambda row: (row[0], row[1]), reverse=True)
+            self._store(index[:self.limit], entries)
+
+    def update_seats(self, trip_id, seat_matrix):
+        """Follow a seat matrix refresh; a no-op for trips outside the projection"""
+        key = CacheKeys.recent_trip(trip_id)
+        entry = cache.get(key)
+        if entry is not None:
+            entry['available_seats'] = min(seat_matrix.values()) if seat_matrix else 0
+            cache.set(key, entry, timeout=self.ttl)
+
+    def rebuild(self):
+        """Rebuild the whole projection from the database; returns (index, entries by trip id)"""
+        trips = list(self._published().order_by('-created_at', '-id')[:self.limit])
+        entries = {trip.id: self._entry(trip) for trip in trips}
+        index = [(trip.created_at, trip.id, trip.journey_date) for trip in trips]
+        self._store(index, entries)
+        return index, entries
+
+    def _read(self, count, date_filter):
+        index = cache.get(CacheKeys.recent_trips_index())
+        if index is not None:
+            trip_ids = [trip_id for _, trip_id, journey_date in index if date_filter(journey_date)][:count]
+            found = cache.get_many([CacheKeys.recent_trip(trip_id) for trip_id in trip_ids])
+            if len(found) == len(trip_ids):
+                return [found[CacheKeys.recent_trip(trip_id)] for trip_id in trip_ids]
+
+        # Evicted index or entries: rebuild everything rather than patch holes
+        index, entries = self.rebuild()
+        trip_ids = [trip_id for _, trip_id, journey_date in index if date_filter(journey_date)][:count]
+        return [entries[trip_id] for trip_id in trip_ids]
+
+    def _store(self, index, entries):
+        cache.set_many({CacheKeys.recent_trip(trip_id): entry for trip_id, entry in entries.items()}, timeout=self.ttl)
+        cache.set(CacheKeys.recent_trips_index(), index, timeout=self.ttl)
+
+    def _published(self):
+        return Trip.objects.filter(status=TripStatus.PUBLISHED).select_related(
+            'from_city', 'to_city', 'operator'
+        ).prefetch_related(
+            Prefetch('stops', queryset=TripStop.objects.order_by('sequence'), to_attr='ordered_stops')
+        )
+
+    @staticmethod
+    def _entry(trip):
+        first_stop = trip.ordered_stops[0] if trip.ordered_stops else None
+        last_stop = trip.ordered_stops[-1] if trip.ordered_stops else None
+        return {
+            'id': trip.id,
+            'from_city': trip.from_city.city,
+            'to_city': trip.to_city.city,
+            'journey_date': trip.journey_date,
+            'departure_time': first_stop.planned_departure if first_stop else trip.planned_departure,
+            'price': last_stop.price_from_start if last_stop else 0,
+            'available_seats': trip.get_min_available_seats(),
+            'operator': trip.operator.name,
+            'planned_route_name': trip.planned_route_name,
+            'created_at': trip.created_at,
+        }
@@ -0,0 +1,118 @@
+"""Route catalogue service - shared cache of Google Directions results per city pair"""
+
+import logging
+import threading
+import time
+import polyline
+from django.conf import settings
+from django.core.cache import cache
+from ..utils.cache_keys import CacheKeys
+from ..utils.route_utils import get_google_maps_client
+
+logger = logging.getLogger(__name__)
+
+
+def _run_in_thread(func):
+    threading.Thread(target=func, daemon=True).start()
+
+
+class RouteCatalogueService:
+    """
+    Serves driving routes between two cities from a shared cache
+
+    Entries are fresh for ROUTE_CATALOGUE_TTL seconds. For a further
+    ROUTE_CATALOGUE_STALE_TTL seconds they are still served while one
+    background refresh fetches a new copy.
+    """
+
+    DEFAULT_TTL = 7 * 24 * 3600
+    DEFAULT_STALE_TTL = 24 * 3600
+    REFRESH_LOCK_TIMEOUT = 60
+
+    def __init__(self, client=None, ttl=None, stale_ttl=None, runner=None):
+        self._client = client
+        self.ttl = ttl if ttl is not None else getattr(settings, 'ROUTE_CATALOGUE_TTL', self.DEFAULT_TTL)
+        self.stale_ttl = stale_ttl if stale_ttl is not None else getattr(settings, 'ROUTE_CATALOGUE_STALE_TTL', self.DEFAULT_STALE_TTL)
+        self.runner = runner or _run_in_thread
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_google_maps_client()
+        return self._client
+
+    def get_routes(self, from_city, to_city, alternatives=True):
+        """
+        Return Directions routes between two cities, calling Google only on a miss
+
+        Each route keeps the Directions shape (summary, overview_polyline,
+        legs with distance/duration) plus a decoded_polyline list.
+        """
+        key = CacheKeys.route_catalogue(from_city.id, to_city.id, alternatives)
+        origin, destination = self._coordinates(from_city), self._coordinates(to_city)
+
+        entry = cache.get(key)
+        if entry and entry['origin'] == origin and entry['destination'] == destination:
+            age = time.time() - entry['fetched_at']
+            if age >= self.ttl:
+                self._schedule_refresh(key, origin, destination, alternatives)
+            return entry['routes']
+
+        return self._fetch(key, origin, destination, alternatives)
+
+    def invalidate(self, from_city, to_city):
+        """Drop cached routes for a city pair"""
+        cache.delete_many([CacheKeys.route_catalogue(from_city.id, to_city.id, alternatives) for alternatives in (True, False)])
+
+    def _fetch(self, key, origin, destination, alternatives):
+        raw_routes = self.client.directions(
+            origin,
+            destination,
+            mode='driving',
+            alternatives=alternatives,
+            region='ye'
+        )
+        routes = [self._compact_route(route) for route in raw_routes or []]
+        if routes:
+            cache.set(key, {
+                'origin': origin,
+                'destination': destination,
+                'fetched_at': time.time(),
+                'routes': routes
+            }, timeout=self.ttl + self.stale_ttl)
+        return routes
+
+    def _schedule_refresh(self, key, origin, destination, alternatives):
+        lock_key = f'{key}:refreshing'
+        if not cache.add(lock_key, 1, timeout=self.REFRESH_LOCK_TIMEOUT):
+            return
+
+        def refresh():
+            try:
+                self._fetch(key, origin, destination, alternatives)
+            except Exception as e:
+                logger.warning(f"Route catalogue refresh failed for {key}: {e}")
+            finally:
+                cache.delete(lock_key)
+
+        self.runner(refresh)
+
+    def _coordinates(self, city):
+        return f"{city.latitude},{city.longitude}"
+
+    def _compact_route(self, route):
+        points = route['overview_polyline']['points']
+        return {
+            'summary': route.get('summary', ''),
+            'overview_polyline': {'points': points},
+            'decoded_polyline': [list(point) for point in polyline.decode(points)],
+            'legs': [
+                {
+                    'distance': leg['distance'],
+                    'duration': leg['duration'],
+                    'start_address': leg.get('start_address', ''),
+                    'end_address': leg.get('end_address', '')
+                }
+                for leg in route.get('legs', [])
+            ]
+        }
@@ -6,6 +6,7 @@ from geopy.distance import geodesic
 from django.core.cache import cache
 from ..models import CityList
 from ..utils.cache_keys import CacheKeys
+from .route_catalogue_service import RouteCatalogueService
 
 
 class RouteService:
@@ -21,7 +22,7 @@ class RouteService:
         cache.set(CacheKeys.route_start_city(user_id), {start.city: start.coordinates}, timeout=3600)
         cache.set(CacheKeys.route_end_city(user_id), {end.city: end.coordinates}, timeout=3600)
         
-        all_routes = self.gmaps.directions(start.coordinates, end.coordinates, mode='driving', alternatives=True, region='ye')
+        all_routes = RouteCatalogueService(client=self.gmaps).get_routes(start, end, alternatives=True)
         cache.set(CacheKeys.route_session(user_id), all_routes, timeout=3600)
         
         return [{
@@ -0,0 +1,184 @@
+"""Trip schedule service - materializes recurring schedules into trips in bulk"""
+
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.utils import timezone
+from ..models import Trip, TripStop, Seat, TripSegmentPair, TripSegmentInventory, TripSchedule
+from ..utils.constants import TripStatus, TripType
+from .trip_index_service import TripIndexService
+from .city_picker_service import CityPickerService
+from .search_cache_service import SearchCacheService
+from .recent_trips_service import RecentTripsService
+from .sitemap_service import SitemapService
+from .outbox_service import OutboxService
+from .operator_metrics_service import OperatorMetricsService
+
+
+class TripScheduleService:
+    """Generates upcoming trips from TripSchedule templates"""
+
+    BATCH_SIZE = 100
+    DWELL_MINUTES = 5
+    DEFAULT_CAPACITY = 40
+    MAX_HORIZON_DAYS = 90
+
+    def create_from_trip(self, trip, weekdays, departure_times, horizon_days=14, auto_publish=False):
+        """
+        Turn an existing trip's route and stops into a recurring schedule
+
+        horizon_days is clamped to 1..MAX_HORIZON_DAYS.
+
+        Raises:
+            ValidationError: If the resulting schedule is invalid
+        """
+        stops = list(trip.stops.order_by('sequence'))
+        origin_time = stops[0].planned_arrival if stops else None
+
+        schedule = TripSchedule(
+            operator=trip.operator,
+            bus=trip.bus,
+            driver=trip.driver,
+            from_city=trip.from_city,
+            to_city=trip.to_city,
+            planned_polyline=trip.planned_polyline,
+            planned_route_name=trip.planned_route_name,
+            price_per_km=trip.price_per_km,
+            total_distance_km=trip.total_distance_km,
+            stop_template=[
+                {
+                    'city': stop.city_id,
+                    'offset_minutes': int((stop.planned_arrival - origin_time).total_seconds() // 60),
+                    'distance_from_start_km': stop.distance_from_start_km,
+                    'price_from_start': stop.price_from_start
+                }
+                for stop in stops
+            ],
+            weekdays=weekdays,
+            departure_times=departure_times,
+            horizon_days=min(max(int(horizon_days), 1), self.MAX_HORIZON_DAYS),
+            auto_publish=auto_publish
+        )
+        schedule.full_clean()
+        schedule.save()
+        return schedule
+
+    def generate_all(self, start_date=None):
+        """Generate trips for every active schedule. Returns: {schedule_id: created_count}"""
+        schedules = TripSchedule.objects.filter(is_active=True).select_related('operator', 'bus', 'driver')
+        return {schedule.id: len(self.generate(schedule, start_date)) for schedule in schedules}
+
+    def generate(self, schedule, start_date=None, horizon_days=None):
+        """
+        Create the schedule's missing trips over its horizon
+
+        Re-running is safe: departures that already have a trip are
+        skipped, and (schedule, planned_departure) is unique.
+
+        Returns:
+            List of created Trip objects
+        """
+        departures = self.upcoming_departures(schedule, start_date, horizon_days)
+        existing = set(
+            Trip.objects.filter(schedule=schedule, planned_departure__in=departures)
+            .values_list('planned_departure', flat=True)
+        )
+        missing = [departure for departure in departures if departure not in existing]
+
+        created = []
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            created.extend(self._create_batch(schedule, missing[start:start + self.BATCH_SIZE]))
+        return created
+
+    def upcoming_departures(self, schedule, start_date=None, horizon_days=None):
+        """Future departure datetimes of a schedule, in order"""
+        start_date = start_date or timezone.localdate()
+        horizon_days = schedule.horizon_days if horizon_days is None else horizon_days
+        times = sorted(datetime.strptime(value, '%H:%M').time() for value in schedule.departure_times)
+        now = timezone.now()
+
+        departures = []
+        for offset in range(horizon_days):
+            day = start_date + timedelta(days=offset)
+            if day.weekday() not in schedule.weekdays:
+                continue
+            for departure_time in times:
+                departure = timezone.make_aware(datetime.combine(day, departure_time))
+                if departure > now:
+                    departures.append(departure)
+        return departures
+
+    @transaction.atomic
+    def _create_batch(self, schedule, departures):
+        """Insert trips, stops, seats, inventory and index pairs for one batch of departures"""
+        template = schedule.stop_template
+        capacity = schedule.bus.capacity if schedule.bus else self.DEFAULT_CAPACITY
+        segments = [f"{i}-{i+1}" for i in range(len(template) - 1)]
+        status = TripStatus.PUBLISHED if schedule.auto_publish and self._can_publish(schedule) else TripStatus.DRAFT
+
+        trips = Trip.objects.bulk_create([
+            Trip(
+                operator_id=schedule.operator_id,
+                bus_id=schedule.bus_id,
+                driver_id=schedule.driver_id,
+                from_city_id=schedule.from_city_id,
+                to_city_id=schedule.to_city_id,
+                journey_date=timezone.localtime(departure).date(),
+                planned_polyline=schedule.planned_polyline,
+                planned_route_name=schedule.planned_route_name,
+                trip_type=TripType.SCHEDULED,
+                planned_departure=departure,
+                price_per_km=schedule.price_per_km,
+                total_distance_km=schedule.total_distance_km,
+                seat_matrix={segment: capacity for segment in segments},
+                status=status,
+                schedule=schedule
+            )
+            for departure in departures
+        ])
+        # bulk_create skips the post_save receiver that counts each trip
+        OperatorMetricsService().trips_created(schedule.operator_id, len(trips))
+
+        stops_by_trip = {}
+        for trip in trips:
+            stops_by_trip[trip.id] = [
+                TripStop(
+                    trip=trip,
+                    city_id=entry['city'],
+                    sequence=sequence,
+                    distance_from_start_km=entry.get('distance_from_start_km', 0.0),
+                    price_from_start=entry.get('price_from_start', 0),
+                    planned_arrival=trip.planned_departure + timedelta(minutes=entry['offset_minutes']),
+                    planned_departure=trip.planned_departure + timedelta(minutes=entry['offset_minutes'] + self.DWELL_MINUTES)
+                )
+                for sequence, entry in enumerate(template)
+            ]
+        TripStop.objects.bulk_create([stop for stops in stops_by_trip.values() for stop in stops])
+
+        Seat.objects.bulk_create([
+            Seat(trip=trip, seat_number=str(seat_num), available_segments=segments)
+            for trip in trips
+            for seat_num in range(1, capacity + 1)
+        ], batch_size=1000)
+
+        TripSegmentInventory.objects.bulk_create([
+            row for trip in trips for row in TripSegmentInventory.build_for_trip(trip, capacity)
+        ])
+
+        index_service = TripIndexService()
+        TripSegmentPair.objects.bulk_create([
+            pair for trip in trips for pair in index_service.build_pairs(trip, stops_by_trip[trip.id])
+        ])
+
+        if status == TripStatus.PUBLISHED:
+            trip_ids = [trip.id for trip in trips]
+            journey_dates = {trip.journey_date for trip in trips}
+            transaction.on_commit(lambda: CityPickerService.invalidate(*journey_dates))
+            transaction.on_commit(lambda: SearchCacheService.invalidate_trips(trip_ids))
+            transaction.on_commit(lambda: RecentTripsService().refresh_trips(trip_ids))
+            transaction.on_commit(lambda: SitemapService().refresh('trips', trip_ids))
+            OutboxService.enqueue_trips_published(trip_ids)
+
+        return trips
+
+    def _can_publish(self, schedule):
+        return Trip(operator=schedule.operator, bus=schedule.bus, driver=schedule.driver).can_publish()
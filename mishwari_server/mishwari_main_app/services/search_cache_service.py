@@ -0,0 +1,109 @@
+"""Search cache service - shared response cache for public search endpoints"""
+
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from ..models import TripSegmentPair
+from ..utils.cache_keys import CacheKeys
+
+
+class SearchCacheService:
+    """
+    Caches public search responses by normalized query parameters
+
+    Every entry is filed under tags (a route, an origin, a destination,
+    the city list). A tag's version token is part of the entry key, so
+    bumping a tag drops every response that depends on it. Trip events
+    bump the tags of the city pairs they touch; everything else expires
+    after SEARCH_CACHE_TTL seconds.
+    """
+
+    DEFAULT_TTL = 60
+    CITIES_TAG = 'cities'
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SEARCH_CACHE_TTL', self.DEFAULT_TTL)
+
+    @staticmethod
+    def route_tag(from_city, to_city, journey_date=None):
+        if journey_date:
+            return f'route:{from_city}:{to_city}:{journey_date}'
+        return f'route:{from_city}:{to_city}'
+
+    @staticmethod
+    def from_tag(from_city):
+        return f'from:{from_city}'
+
+    @staticmethod
+    def to_tag(to_city):
+        return f'to:{to_city}'
+
+    def get_or_compute(self, namespace, params, tags, compute):
+        """
+        Return the cached response data for (namespace, params), computing it on a miss
+
+        `compute` returns (data, cacheable); only cacheable results are stored.
+        """
+        key = self._key(namespace, params, tags)
+        data = cache.get(key)
+        if data is None:
+            data, cacheable = compute()
+            if cacheable:
+                cache.set(key, data, timeout=self.ttl)
+        return data
+
+    @classmethod
+    def invalidate_tags(cls, tags):
+        """Drop every cached response filed under any of the tags"""
+        cache.set_many({cls._tag_key(tag): uuid.uuid4().hex for tag in set(tags)}, timeout=None)
+
+    @classmethod
+    def invalidate_trips(cls, trip_ids, extra_dates=()):
+        """Drop cached responses that may list any of the trips"""
+        tags = cls.tags_for_trips(trip_ids, extra_dates)
+        if tags:
+            cls.invalidate_tags(tags)
+
+    @classmethod
+    def tags_for_trips(cls, trip_ids, extra_dates=()):
+        """
+        Tags of every response that may list any of the trips
+
+        Tags come from the trips' city pairs; `extra_dates` adds dated route
+        tags for dates a trip just left.
+        """
+        rows = set(
+            TripSegmentPair.objects.filter(trip_id__in=trip_ids)
+            .values_list('from_city__city', 'to_city__city', 'journey_date')
+        )
+        tags = set()
+        for from_city, to_city, journey_date in rows:
+            tags.update([
+                cls.from_tag(from_city),
+                cls.to_tag(to_city),
+                cls.route_tag(from_city, to_city),
+                cls.route_tag(from_city, to_city, journey_date),
+            ])
+            tags.update(cls.route_tag(from_city, to_city, date) for date in extra_dates if date)
+        return tags
+
+    def _key(self, namespace, params, tags):
+        versions = self._versions(tags)
+        payload = json.dumps([sorted(params.items()), versions], sort_keys=True, default=str)
+        return CacheKeys.search_response(namespace, hashlib.sha1(payload.encode()).hexdigest())
+
+    def _versions(self, tags):
+        keys = [self._tag_key(tag) for tag in sorted(tags)]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # Random tokens: an evicted tag must never revive entries of an older version
+                cache.add(key, uuid.uuid4().hex, timeout=None)
+                versions[key] = cache.get(key)
+        return [versions[key] for key in keys]
+
+    @staticmethod
+    def _tag_key(tag):
+        return CacheKeys.search_tag_version(hashlib.sha1(tag.encode()).hexdigest())
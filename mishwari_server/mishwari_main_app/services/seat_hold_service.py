@@ -0,0 +1,247 @@
+"""Seat hold service - short-lived seat holds for checkouts awaiting payment"""
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from ..models import Trip
+from ..utils.cache_keys import CacheKeys
+from ..utils.constants import TripStatus, BookingSource
+from .booking_service import BookingService, InsufficientSeatsError
+from .search_cache_service import SearchCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class SeatHoldError(Exception):
+    """Raised when a hold cannot be placed because the trip is busy"""
+    pass
+
+
+class SeatHoldService:
+    """
+    Keeps seats aside in the cache while a passenger pays
+
+    Each trip has one cache entry mapping hold IDs to
+    (expires_at, segment indexes, seat count). Holds past expires_at stop
+    counting against availability at once; the reaper only prunes them.
+    Seats are taken from the DB inventory when a hold is converted into a
+    booking, so an abandoned checkout never touches the DB; until then
+    every booking leaves the held seats alone.
+    """
+
+    DEFAULT_TTL = 10 * 60
+    RECORD_GRACE = 24 * 3600
+    LOCK_TIMEOUT = 5
+    LOCK_ATTEMPTS = 50
+    LOCK_WAIT = 0.02
+    REAP_BATCH_SIZE = 500
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SEAT_HOLD_TTL', self.DEFAULT_TTL)
+
+    def place_hold(self, trip, from_stop, to_stop, user, passengers_data, total_fare=0,
+                   contact_name=None, contact_phone=None, contact_email=None):
+        """
+        Hold seats for a journey until the TTL runs out
+
+        Returns:
+            Hold dict (id, trip_id, expires_at, ...)
+
+        Raises:
+            InsufficientSeatsError: If the seats left after other holds are too few
+            SeatHoldError: If the trip lock could not be taken
+        """
+        segment_indexes = list(range(from_stop.sequence, to_stop.sequence))
+        count = len([p for p in passengers_data if p.get('is_checked', True)])
+        now = time.time()
+
+        hold = {
+            'id': uuid.uuid4().hex,
+            'trip_id': trip.id,
+            'from_stop_id': from_stop.id,
+            'to_stop_id': to_stop.id,
+            'segments': segment_indexes,
+            'count': count,
+            'user_id': user.id,
+            'passengers_data': passengers_data,
+            'total_fare': total_fare,
+            'contact_name': contact_name,
+            'contact_phone': contact_phone,
+            'contact_email': contact_email,
+            'expires_at': now + self.ttl
+        }
+
+        with self._trip_lock(trip.id):
+            holds = self._active(cache.get(CacheKeys.seat_hold_trip(trip.id)) or {}, now)
+            held = self._held_segments(holds)
+            remaining = BookingService().remaining_by_segment(trip, segment_indexes)
+            available = min(remaining[i] - held.get(i, 0) for i in segment_indexes) if segment_indexes else 0
+            if count > available:
+                raise InsufficientSeatsError(f"Only {max(available, 0)} seats available")
+
+            holds[hold['id']] = (hold['expires_at'], segment_indexes, count)
+            self._store(CacheKeys.seat_hold_trip(trip.id), holds)
+
+        # The record outlives the hold so a late payment can still be converted
+        cache.set(CacheKeys.seat_hold(hold['id']), hold, timeout=self.ttl + self.RECORD_GRACE)
+        SearchCacheService.invalidate_trips([trip.id])
+        return hold
+
+    def get_hold(self, hold_id):
+        return cache.get(CacheKeys.seat_hold(hold_id))
+
+    def release(self, hold_id, trip_id=None):
+        """Stop counting a hold against availability. Returns True if it was active"""
+        if trip_id is None:
+            hold = self.get_hold(hold_id)
+            if hold is None:
+                return False
+            trip_id = hold['trip_id']
+
+        with self._trip_lock(trip_id):
+            key = CacheKeys.seat_hold_trip(trip_id)
+            holds = cache.get(key) or {}
+            entry = holds.pop(hold_id, None)
+            self._store(key, holds)
+        if entry is not None:
+            SearchCacheService.invalidate_trips([trip_id])
+        return entry is not None and entry[0] > time.time()
+
+    def convert(self, hold_id):
+        """
+        Turn a paid hold into a booking
+
+        Safe to call more than once per hold (webhooks are retried): only the
+        first successful call books. The hold's seats are taken through
+        BookingService, so a payment arriving after expiry still books if
+        seats are left. A failed conversion gives up its claim, so a retried
+        webhook tries again unless mark_refunded() closes the hold.
+
+        Returns:
+            Booking object, or None if the hold is unknown, converted or refunded
+
+        Raises:
+            InsufficientSeatsError: If the hold expired and its seats were sold
+        """
+        hold = self.get_hold(hold_id)
+        if hold is None:
+            logger.error(f'[SEAT_HOLD] Payment received for unknown hold {hold_id}')
+            return None
+        conversion_key = CacheKeys.seat_hold_conversion(hold_id)
+        if not cache.add(conversion_key, True, timeout=self.ttl + self.RECORD_GRACE):
+            return None
+
+        user = User.objects.get(id=hold['user_id'])
+        try:
+            # The hold's own seats are excluded, so it does not count against its booking
+            booking = BookingService().create_booking(
+                trip_id=hold['trip_id'],
+                from_stop_id=hold['from_stop_id'],
+                to_stop_id=hold['to_stop_id'],
+                user=user,
+                passengers_data=hold['passengers_data'],
+                payment_method='stripe',
+                contact_name=hold['contact_name'],
+                contact_phone=hold['contact_phone'],
+                contact_email=hold['contact_email'],
+                hold_id=hold_id
+            )
+        except Exception:
+            cache.delete(conversion_key)
+            raise
+        self.release(hold_id, hold['trip_id'])
+        booking.is_paid = True
+        booking.booking_source = BookingSource.PLATFORM
+        booking.created_by = user
+        booking.save(update_fields=['is_paid', 'booking_source', 'created_by'])
+        return booking
+
+    def mark_refunded(self, hold_id):
+        """Close a hold whose payment was refunded so no retried webhook books it"""
+        cache.set(CacheKeys.seat_hold_conversion(hold_id), 'refunded', timeout=self.ttl + self.RECORD_GRACE)
+        self.release(hold_id)
+
+    def held_segments(self, trip_id, exclude=None):
+        """Seats held per segment index on a trip, ignoring hold `exclude`: {segment_index: count}"""
+        holds = self._active(cache.get(CacheKeys.seat_hold_trip(trip_id)) or {}, time.time())
+        holds.pop(exclude, None)
+        return self._held_segments(holds)
+
+    def held_by_trip(self, trip_ids):
+        """Held seats per segment for many trips in one cache round trip"""
+        keys = {CacheKeys.seat_hold_trip(trip_id): trip_id for trip_id in trip_ids}
+        if not keys:
+            return {}
+        now = time.time()
+        return {
+            keys[key]: self._held_segments(self._active(holds, now))
+            for key, holds in cache.get_many(list(keys)).items()
+        }
+
+    def reap_expired(self, trip_ids=None):
+        """
+        Drop expired holds from the per-trip entries in bulk
+
+        Args:
+            trip_ids: Trips to sweep (default: every bookable trip)
+
+        Returns:
+            Number of holds released
+        """
+        if trip_ids is None:
+            trip_ids = Trip.objects.filter(
+                status__in=[TripStatus.PUBLISHED, TripStatus.ACTIVE]
+            ).values_list('id', flat=True)
+        trip_ids = list(trip_ids)
+
+        released = 0
+        for start in range(0, len(trip_ids), self.REAP_BATCH_SIZE):
+            keys = {CacheKeys.seat_hold_trip(trip_id): trip_id for trip_id in trip_ids[start:start + self.REAP_BATCH_SIZE]}
+            now = time.time()
+            for key, holds in cache.get_many(list(keys)).items():
+                if len(self._active(holds, now)) == len(holds):
+                    continue
+                with self._trip_lock(keys[key]):
+                    holds = cache.get(key) or {}
+                    active = self._active(holds, time.time())
+                    self._store(key, active)
+                released += len(holds) - len(active)
+        return released
+
+    def _store(self, key, holds):
+        if holds:
+            cache.set(key, holds, timeout=max(int(max(entry[0] for entry in holds.values()) - time.time()) + 1, 1))
+        else:
+            cache.delete(key)
+
+    @contextmanager
+    def _trip_lock(self, trip_id):
+        key = CacheKeys.seat_hold_lock(trip_id)
+        token = uuid.uuid4().hex
+        for _ in range(self.LOCK_ATTEMPTS):
+            if cache.add(key, token, timeout=self.LOCK_TIMEOUT):
+                break
+            time.sleep(self.LOCK_WAIT)
+        else:
+            raise SeatHoldError("Seats are being held by others, please retry")
+        try:
+            yield
+        finally:
+            if cache.get(key) == token:
+                cache.delete(key)
+
+    @staticmethod
+    def _active(holds, now):
+        return {hold_id: entry for hold_id, entry in holds.items() if entry[0] > now}
+
+    @staticmethod
+    def _held_segments(holds):
+        held = {}
+        for _, segment_indexes, count in holds.values():
+            for index in segment_indexes:
+                held[index] = held.get(index, 0) + count
+        return held
@@ -0,0 +1,148 @@
+"""Sitemap service - pre-rendered, paginated sitemap files"""
+
+import hashlib
+import logging
+import os
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from xml.sax.saxutils import escape
+from ..sitemaps import SITEMAPS
+from ..utils.cache_keys import CacheKeys
+from ..utils.cache_lock import cache_lock
+
+logger = logging.getLogger(__name__)
+
+
+class SitemapService:
+    """
+    Renders sitemap sections into fixed id-range pages stored in the cache
+
+    Page N of a section holds the rows with ids in [(N-1)*size, N*size),
+    so a changed row only re-renders its own page and pages never shift.
+    Each section keeps an index of {page: (last modified, digest)}; the
+    date moves only when a page's content actually changes. Crawlers read stored files; a page
+    missing from the cache is rendered from one id-range query.
+    """
+
+    DEFAULT_PAGE_SIZE = 5000
+    DEFAULT_TTL = 86400
+    CHUNK_SIZE = 2000
+    URLSET = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    SITEMAPINDEX = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+
+    def __init__(self, page_size=None, ttl=None):
+        self.page_size = page_size or getattr(settings, 'SITEMAP_PAGE_SIZE', self.DEFAULT_PAGE_SIZE)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SITEMAP_TTL', self.DEFAULT_TTL)
+        self.site_url = os.getenv('SITE_URL', 'https://yallabus.app').rstrip('/')
+
+    def page_for(self, object_id):
+        return object_id // self.page_size + 1
+
+    def index_xml(self):
+        """The sitemap index listing every non-empty page of every section"""
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', self.SITEMAPINDEX]
+        for name in SITEMAPS:
+            for page, (lastmod, _) in sorted(self._index(name).items()):
+                lines.append(f'<sitemap><loc>{self.site_url}/sitemap-{name}-{page}.xml</loc>{self._lastmod(lastmod)}</sitemap>')
+        lines.append('</sitemapindex>')
+        return '\n'.join(lines)
+
+    def page_xml(self, name, page):
+        """One stored sitemap file, or None when the page has no rows"""
+        if name not in SITEMAPS or page < 1:
+            return None
+        if page not in self._index(name):
+            return None
+        xml = cache.get(CacheKeys.sitemap_page(name, page))
+        if xml is None:
+            xml = self._store_page(name, page, self._render_page(name, page))
+        return xml
+
+    def generate(self, names=None):
+        """
+        Re-render every page of the sections in one streaming pass each
+
+        Rows are read in id order with iterator(), so memory stays bounded
+        by one page whatever the table size. Returns {section: page count}.
+        """
+        counts = {}
+        for name in names or SITEMAPS:
+            sitemap = SITEMAPS[name]
+            rows = sitemap.queryset().order_by('id').iterator(chunk_size=self.CHUNK_SIZE)
+            pages, page, page_rows = set(), None, []
+            for row in rows:
+                row_page = self.page_for(row[0])
+                if row_page != page and page_rows:
+                    self._store_page(name, page, self._render(sitemap, page_rows))
+                    pages.add(page)
+                    page_rows = []
+                page = row_page
+                page_rows.append(row)
+            if page_rows:
+                self._store_page(name, page, self._render(sitemap, page_rows))
+                pages.add(page)
+
+            self._update_index(name, lambda index: {page: entry for page, entry in index.items() if page in pages})
+            counts[name] = len(pages)
+        return counts
+
+    def refresh(self, name, object_ids):
+        """Re-render the pages holding the given rows after they changed"""
+        for page in {self.page_for(object_id) for object_id in object_ids}:
+            xml = self._render_page(name, page)
+            if xml is None:
+                self._update_index(name, lambda index: {key: value for key, value in index.items() if key != page})
+                cache.delete(CacheKeys.sitemap_page(name, page))
+            else:
+                self._store_page(name, page, xml)
+
+    def _render_page(self, name, page):
+        sitemap = SITEMAPS[name]
+        start = (page - 1) * self.page_size
+        rows = sitemap.queryset().filter(id__gte=start, id__lt=start + self.page_size).order_by('id')
+        rows = list(rows.iterator(chunk_size=self.CHUNK_SIZE))
+        return self._render(sitemap, rows) if rows else None
+
+    def _render(self, sitemap, rows):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', self.URLSET]
+        for row in rows:
+            lines.append(
+                f'<url><loc>{escape(self.site_url + sitemap.location(row))}</loc>'
+                f'{self._lastmod(sitemap.lastmod(row))}'
+                f'<changefreq>{sitemap.changefreq}</changefreq><priority>{sitemap.priority}</priority></url>'
+            )
+        lines.append('</urlset>')
+        return '\n'.join(lines)
+
+    def _store_page(self, name, page, xml):
+        cache.set(CacheKeys.sitemap_page(name, page), xml, timeout=self.ttl)
+        digest = hashlib.sha1(xml.encode()).hexdigest()
+        if self._index(name).get(page, (None, None))[1] != digest:
+            now = timezone.now()
+            self._update_index(name, lambda index: {**index, page: (now, digest)})
+        return xml
+
+    def _index(self, name):
+        index = cache.get(CacheKeys.sitemap_index(name))
+        if index is None:
+            # Evicted: recover the page list from one grouped query, files render on demand
+            sitemap = SITEMAPS[name]
+            pages = sitemap.queryset().annotate(page=F('id') / self.page_size + 1).values_list('page', flat=True).order_by().distinct()
+            index = {page: (None, None) for page in pages}
+            cache.set(CacheKeys.sitemap_index(name), index, timeout=self.ttl)
+        return index
+
+    def _update_index(self, name, change):
+        with cache_lock(CacheKeys.sitemap_lock(name)) as locked:
+            if not locked:
+                logger.warning(f"Sitemap index {name} busy, dropping it")
+                cache.delete(CacheKeys.sitemap_index(name))
+                return
+            index = self._index(name)
+            cache.set(CacheKeys.sitemap_index(name), change(index), timeout=self.ttl)
+
+    @staticmethod
+    def _lastmod(value):
+        return f'<lastmod>{value.date().isoformat()}</lastmod>' if value else ''
@@ -0,0 +1,113 @@
+"""SMS dispatch service - background OTP delivery with ordered provider failover"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from ..utils.circuit_breaker import CircuitBreaker
+from ..utils.sms_providers import PROVIDERS, SMSDeliveryError, SMSRecipientRejectedError
+from .google_identity_proxy import GoogleIdentityProxyService
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _run_in_executor(func):
+    """Queue `func` on the process-wide SMS worker pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SMS_DISPATCH_WORKERS', SMSDispatchService.DEFAULT_WORKERS),
+                thread_name_prefix='sms-dispatch'
+            )
+    _executor.submit(func)
+
+
+class SMSDispatchService:
+    """
+    Delivers OTP codes off the request path
+
+    send_otp() queues the message on a small worker pool and returns at
+    once. A worker tries the configured providers in SMS_PROVIDER_ORDER,
+    skipping any whose circuit breaker is open, until one accepts the
+    message. The Firebase proxy answers with the session the client
+    verifies against, so it stays in the request but is bounded by the
+    same timeouts and its own breaker.
+    """
+
+    DEFAULT_ORDER = ('infobip', 'twilio', 'whatsapp')
+    DEFAULT_WORKERS = 4
+    DEFAULT_FAILURE_THRESHOLD = 5
+    DEFAULT_RESET_TIMEOUT = 60
+
+    def __init__(self, providers=None, runner=None):
+        if providers is None:
+            order = getattr(settings, 'SMS_PROVIDER_ORDER', self.DEFAULT_ORDER)
+            providers = [PROVIDERS[name]() for name in order]
+        self.providers = providers
+        self.runner = runner or _run_in_executor
+        self.failure_threshold = getattr(settings, 'SMS_BREAKER_FAILURE_THRESHOLD', self.DEFAULT_FAILURE_THRESHOLD)
+        self.reset_timeout = getattr(settings, 'SMS_BREAKER_RESET_TIMEOUT', self.DEFAULT_RESET_TIMEOUT)
+
+    def available(self):
+        return [provider for provider in self.providers if provider.configured()]
+
+    def send_otp(self, phone_number, otp_code):
+        """Queue an OTP for delivery; returns False if no provider is configured"""
+        if not self.available():
+            return False
+        self.runner(lambda: self.deliver(phone_number, otp_code))
+        return True
+
+    def deliver(self, phone_number, otp_code):
+        """Send an OTP through the first provider that accepts; returns its name, or None"""
+        return self._deliver(self.available(), phone_number, lambda provider: provider.send(phone_number, otp_code))
+
+    def deliver_text(self, phone_number, text):
+        """Send free text through the first text-capable provider that accepts; returns its name, or None"""
+        providers = [provider for provider in self.available() if provider.supports_text]
+        return self._deliver(providers, phone_number, lambda provider: provider.send_text(phone_number, text))
+
+    def _deliver(self, providers, phone_number, send):
+        for provider in providers:
+            breaker = self.breaker(provider.name)
+            if not breaker.allow():
+                continue
+            try:
+                message_id = send(provider)
+            except SMSRecipientRejectedError as e:
+                # A bad number says nothing about the provider; keep its breaker closed
+                logger.warning('SMS to %s rejected by %s: %s', phone_number, provider.name, e)
+                continue
+            except SMSDeliveryError as e:
+                breaker.record_failure()
+                logger.warning('SMS to %s via %s failed: %s', phone_number, provider.name, e)
+                continue
+            except Exception:
+                breaker.record_failure()
+                logger.exception('SMS to %s via %s failed', phone_number, provider.name)
+                continue
+            breaker.record_success()
+            logger.info('SMS to %s sent via %s (%s)', phone_number, provider.name, message_id)
+            return provider.name
+        logger.error('SMS to %s not delivered: no provider available', phone_number)
+        return None
+
+    def send_firebase_otp(self, phone_number, recaptcha_token):
+        """Start Firebase phone verification; same result dict as GoogleIdentityProxyService.send_otp"""
+        breaker = self.breaker('firebase')
+        if not breaker.allow():
+            return {'success': False, 'error': 'Firebase proxy unavailable', 'message': 'Failed to send OTP via Firebase'}
+        result = GoogleIdentityProxyService.send_otp(phone_number, recaptcha_token)
+        if result['success']:
+            breaker.record_success()
+        elif result.get('server_error'):
+            # Only outages count; a rejected reCAPTCHA or number says nothing about the proxy
+            breaker.record_failure()
+        return result
+
+    def breaker(self, name):
+        return CircuitBreaker(f'sms:{name}', self.failure_threshold, self.reset_timeout)
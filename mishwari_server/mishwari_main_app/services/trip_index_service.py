@@ -0,0 +1,97 @@
+"""Trip index service - maintains the city-pair search index"""
+
+from django.db import transaction
+from ..models import TripStop, TripSegmentPair
+from ..utils.constants import TripStatus
+
+
+class TripIndexService:
+    """Keeps TripSegmentPair rows in sync with trips and their stops"""
+
+    SEARCH_RELATED = (
+        'trip', 'trip__bus', 'trip__operator', 'trip__driver',
+        'trip__driver__profile', 'trip__driver__operator',
+        'from_stop', 'to_stop',
+    )
+
+    @transaction.atomic
+    def rebuild_trip(self, trip, stops=None):
+        """
+        Rebuild every city pair of a trip from its stops
+
+        Args:
+            trip: Trip object
+            stops: Optional list of saved TripStop objects (loaded if omitted)
+
+        Returns:
+            Number of pairs written
+        """
+        if stops is None:
+            stops = TripStop.objects.filter(trip_id=trip.id).order_by('sequence')
+
+        pairs = self.build_pairs(trip, stops)
+        TripSegmentPair.objects.filter(trip_id=trip.id).delete()
+        TripSegmentPair.objects.bulk_create(pairs)
+        return len(pairs)
+
+    def build_pairs(self, trip, stops):
+        """
+        Build (unsaved) city pairs of a trip from its saved stops
+
+        Only the first stop of each city is indexed, so a trip matches a
+        (from, to) search when its first visit to `from` precedes its first
+        visit to `to`.
+        """
+        first_stops = []
+        seen_cities = set()
+        for stop in sorted(stops, key=lambda s: s.sequence):
+            if stop.city_id not in seen_cities:
+                seen_cities.add(stop.city_id)
+                first_stops.append(stop)
+
+        return [
+            TripSegmentPair(
+                trip_id=trip.id,
+                from_stop=from_stop,
+                to_stop=to_stop,
+                from_city_id=from_stop.city_id,
+                to_city_id=to_stop.city_id,
+                journey_date=trip.journey_date,
+                status=trip.status,
+                fare=to_stop.price_from_start - from_stop.price_from_start,
+                departure_time=from_stop.planned_departure,
+                arrival_time=to_stop.planned_arrival,
+            )
+            for i, from_stop in enumerate(first_stops)
+            for to_stop in first_stops[i + 1:]
+        ]
+
+    def sync_trip(self, trip):
+        """Copy trip-level fields (status, date) onto its pairs in one UPDATE"""
+        return TripSegmentPair.objects.filter(trip_id=trip.id).update(
+            status=trip.status,
+            journey_date=trip.journey_date
+        )
+
+    def search(self, from_city, to_city, journey_date=None, date_from=None, status=TripStatus.PUBLISHED):
+        """
+        Find trip pairs between two cities in a single indexed query
+
+        Args:
+            from_city: CityList object or ID
+            to_city: CityList object or ID
+            journey_date: Exact journey date (takes precedence over date_from)
+            date_from: Earliest journey date when no exact date is given
+            status: Trip status to match
+
+        Returns:
+            QuerySet of TripSegmentPair with trip, stops and resources loaded
+        """
+        pairs = TripSegmentPair.objects.filter(from_city=from_city, to_city=to_city, status=status)
+
+        if journey_date:
+            pairs = pairs.filter(journey_date=journey_date)
+        elif date_from:
+            pairs = pairs.filter(journey_date__gte=date_from)
+
+        return pairs.select_related(*self.SEARCH_RELATED).order_by('journey_date', 'departure_time')
@@ -0,0 +1,122 @@
+"""Trip search service - builds public search results in a constant number of queries"""
+
+from django.db.models import OuterRef, Subquery
+from ..models import TripStop, TripSegmentPair
+from ..utils.constants import TripStatus
+from .trip_index_service import TripIndexService
+from .seat_hold_service import SeatHoldService
+
+
+class TripSearchService:
+    """Runs every TripSearchView case against the city-pair index and shapes the results"""
+
+    MAX_RESULTS = 50
+    PAIR_RELATED = TripIndexService.SEARCH_RELATED + ('from_city', 'to_city')
+
+    def search_route(self, from_city, to_city, journey_date=None, date_from=None, **extra):
+        """Trips from one city to another (one query)"""
+        pairs = list(TripIndexService().search(from_city, to_city, journey_date=journey_date, date_from=date_from))
+        held = self._held_by_trip(pairs)
+        return [self.build_result(pair, from_city.city, to_city.city, held.get(pair.trip_id), **extra) for pair in pairs]
+
+    def search_to_city(self, to_city, date_from):
+        """Trips reaching a city from their first stop (one query)"""
+        pairs = list(self._published_pairs(date_from).filter(
+            to_city=to_city,
+            from_stop__sequence=0
+        )[:self.MAX_RESULTS])
+        held = self._held_by_trip(pairs)
+        return [self.build_result(pair, pair.from_city.city, to_city.city, held.get(pair.trip_id)) for pair in pairs]
+
+    def search_from_city(self, from_city, date_from):
+        """Trips leaving a city towards their last stop (one query)"""
+        last_sequence = TripStop.objects.filter(
+            trip_id=OuterRef('trip_id')
+        ).order_by('-sequence').values('sequence')[:1]
+
+        pairs = list(self._published_pairs(date_from).filter(
+            from_city=from_city,
+            to_stop__sequence=Subquery(last_sequence)
+        )[:self.MAX_RESULTS])
+        held = self._held_by_trip(pairs)
+        return [self.build_result(pair, from_city.city, pair.to_city.city, held.get(pair.trip_id)) for pair in pairs]
+
+    def build_result(self, pair, from_city_name, to_city_name, held=None, **extra):
+        """
+        Shape one search result from an index pair with its trip resources loaded
+
+        `held` maps segment index to seats under an active seat hold; they
+        are not offered as available.
+        """
+        trip = pair.trip
+        from_stop = pair.from_stop
+        to_stop = pair.to_stop
+
+        held = held or {}
+        segment_indexes = range(from_stop.sequence, to_stop.sequence)
+        available_seats = max(min(
+            trip.seat_matrix.get(f"{i}-{i+1}", 0) - held.get(i, 0) for i in segment_indexes
+        ), 0) if segment_indexes else 0
+
+        result = {
+            'id': trip.id,
+            'trip_id': trip.id,
+            'from_stop_id': from_stop.id,
+            'to_stop_id': to_stop.id,
+            'from_city': from_city_name,
+            'to_city': to_city_name,
+            'journey_date': trip.journey_date,
+            'departure_time': from_stop.planned_departure,
+            'arrival_time': to_stop.planned_arrival,
+            'available_seats': available_seats,
+            'fare': pair.fare,
+            'price': pair.fare,
+            'bus': self._bus_data(trip.bus),
+            'driver': self._driver_data(trip.driver),
+            'operator': self._operator_data(trip.operator),
+            'trip_type': trip.trip_type,
+            'status': trip.status,
+            'planned_route_name': trip.planned_route_name
+        }
+        result.update(extra)
+        return result
+
+    def _held_by_trip(self, pairs):
+        return SeatHoldService().held_by_trip({pair.trip_id for pair in pairs})
+
+    def _published_pairs(self, date_from):
+        return TripSegmentPair.objects.filter(
+            status=TripStatus.PUBLISHED,
+            journey_date__gte=date_from
+        ).select_related(*self.PAIR_RELATED).order_by('journey_date', 'departure_time')
+
+    def _bus_data(self, bus):
+        if not bus:
+            return None
+        return {
+            'id': bus.id,
+            'bus_number': bus.bus_number,
+            'bus_type': bus.bus_type,
+            'capacity': bus.capacity,
+            'has_wifi': bus.has_wifi,
+            'has_ac': bus.has_ac,
+            'has_usb_charging': bus.has_usb_charging
+        }
+
+    def _driver_data(self, driver):
+        if not driver:
+            return None
+        return {
+            'id': driver.id,
+            'd_name': driver.profile.full_name,
+            'driver_rating': float(driver.driver_rating or 0),
+            'operator': {'id': driver.operator.id, 'name': driver.operator.name}
+        }
+
+    def _operator_data(self, operator):
+        return {
+            'id': operator.id,
+            'name': operator.name,
+            'avg_rating': float(operator.avg_rating),
+            'total_reviews': operator.total_reviews
+        }
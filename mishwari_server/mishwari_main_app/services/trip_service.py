@@ -2,7 +2,9 @@
 
 from django.db import transaction
 from django.utils import timezone
-from ..models import Trip, TripStop, CityList
+from ..models import Trip, CityList
+from .trip_index_service import TripIndexService
+from .seat_hold_service import SeatHoldService
 from ..utils.constants import TripStatus
 
 
@@ -17,39 +19,25 @@ class TripService:
         except CityList.DoesNotExist:
             return []
         
-        trips_with_from = TripStop.objects.filter(
-            city=from_city,
-            trip__journey_date=date,
-            trip__status=TripStatus.PUBLISHED
-        ).values_list('trip_id', flat=True)
-        
-        trips_with_to = TripStop.objects.filter(
-            city=to_city,
-            trip__journey_date=date,
-            trip__status=TripStatus.PUBLISHED
-        ).values_list('trip_id', flat=True)
-        
-        matching_trip_ids = set(trips_with_from) & set(trips_with_to)
+        pairs = list(TripIndexService().search(from_city, to_city, journey_date=date))
+        held_by_trip = SeatHoldService().held_by_trip({pair.trip_id for pair in pairs})
         
         results = []
-        for trip_id in matching_trip_ids:
-            trip = Trip.objects.select_related('bus', 'driver', 'operator').get(id=trip_id)
-            from_stop = trip.stops.filter(city=from_city).first()
-            to_stop = trip.stops.filter(city=to_city).first()
-            
-            if not from_stop or not to_stop or from_stop.sequence >= to_stop.sequence:
-                continue
+        for pair in pairs:
+            trip = pair.trip
+            from_stop = pair.from_stop
+            to_stop = pair.to_stop
+            held = held_by_trip.get(trip.id, {})
             
-            segments = [f"{i}-{i+1}" for i in range(from_stop.sequence, to_stop.sequence)]
-            available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else 0
-            fare = to_stop.price_from_start - from_stop.price_from_start
+            segment_indexes = range(from_stop.sequence, to_stop.sequence)
+            available_seats = max(min([trip.seat_matrix.get(f"{i}-{i+1}", 0) - held.get(i, 0) for i in segment_indexes]), 0) if segment_indexes else 0
             
             results.append({
                 'trip': trip,
                 'from_stop': from_stop,
                 'to_stop': to_stop,
                 'available_seats': available_seats,
-                'fare': fare
+                'fare': pair.fare
             })
         
         return results
@@ -1,14 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from django.db.models import Avg
 from django.db import transaction
-from .models import TripReview, Bus, Driver, BusOperator, Trip
-from .utils.google_indexing import notify_google_indexing
-from .utils.indexnow import notify_indexnow
-import os
+from .models import TripReview, Bus, Driver, BusOperator, Trip, TripStop, CityList
+from .services.trip_index_service import TripIndexService
+from .services.city_locator_service import CityLocatorService
+from .services.city_picker_service import CityPickerService
+from .services.search_cache_service import SearchCacheService
+from .services.recent_trips_service import RecentTripsService
+from .services.sitemap_service import SitemapService
+from .services.outbox_service import OutboxService
+from .services.rating_service import RatingService
+from .services.operator_metrics_service import OperatorMetricsService
 import logging
 import sys
-import requests
 
 sys.stdout.write('!!!! SIGNALS FILE LOADED !!!!\n')
 sys.stdout.flush()
@@ -16,49 +20,21 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=TripReview)
 def update_ratings_on_review(sender, instance, created, **kwargs):
-    """Auto-update cached ratings when review is created"""
-    if not created:
-        return
-    
-    # Update Bus rating
-    if instance.bus_snapshot:
-        bus_reviews = TripReview.objects.filter(bus_snapshot=instance.bus_snapshot)
-        avg = bus_reviews.aggregate(Avg('bus_condition_rating'))['bus_condition_rating__avg']
-        instance.bus_snapshot.avg_rating = round(avg, 2) if avg else 0.00
-        instance.bus_snapshot.total_reviews = bus_reviews.count()
-        instance.bus_snapshot.save(update_fields=['avg_rating', 'total_reviews'])
-    
-    # Update Driver rating
-    if instance.driver_snapshot:
-        driver_reviews = TripReview.objects.filter(driver_snapshot=instance.driver_snapshot)
-        avg = driver_reviews.aggregate(Avg('driver_rating'))['driver_rating__avg']
-        instance.driver_snapshot.driver_rating = round(avg, 2) if avg else 0.00
-        instance.driver_snapshot.total_reviews = driver_reviews.count()
-        instance.driver_snapshot.save(update_fields=['driver_rating', 'total_reviews'])
-    
-    # Update Operator rating
-    operator_reviews = TripReview.objects.filter(operator_snapshot=instance.operator_snapshot)
-    avg = operator_reviews.aggregate(Avg('overall_rating'))['overall_rating__avg']
-    instance.operator_snapshot.avg_rating = round(avg, 2) if avg else 0.00
-    instance.operator_snapshot.total_reviews = operator_reviews.count()
-    instance.operator_snapshot.save(update_fields=['avg_rating', 'total_reviews'])
-    
-    # Recalculate health score
-    from .models import OperatorMetrics
-    metrics, created = OperatorMetrics.objects.get_or_create(operator=instance.operator_snapshot)
-    metrics.recalculate_health_score()
-
+    """Add a new review to the running rating aggregates of its bus, driver and operator"""
+    if created:
+        RatingService().record_review(instance)
 
 
+@receiver(post_delete, sender=TripReview)
+def update_ratings_on_review_delete(sender, instance, **kwargs):
+    RatingService().remove_review(instance)
 
 
 @receiver(post_save, sender=Trip)
 def update_health_score_on_trip_change(sender, instance, created, **kwargs):
-    """Recalculate health score when trip is cancelled and notify Google for indexing"""
+    """Update operator trip counters and notify Google for indexing"""
     
     previous_status = getattr(instance, '_previous_status', None)
-    site_url = os.getenv('SITE_URL', 'https://yallabus.app')
-    trip_url = f'{site_url}/bus_list/{instance.id}'
     
     sys.stdout.write(f'[SIGNAL] Trip {instance.id} saved: status={instance.status}, previous={previous_status}, created={created}\n')
     sys.stdout.flush()
@@ -74,41 +50,126 @@ def update_health_score_on_trip_change(sender, instance, created, **kwargs):
         sys.stdout.flush()
         logger.info(f'[INDEXING] Trip {instance.id} needs indexing (becoming={is_becoming_published}, created={is_created_published})')
         
-        # Notify Google about the specific trip URL
-        transaction.on_commit(lambda: notify_google_indexing(trip_url, 'URL_UPDATED'))
-        
-        # Notify Bing/Yandex via IndexNow
-        transaction.on_commit(lambda: notify_indexnow([trip_url]))
-        
-        # Ping Google about the feed update
-        def ping_feed():
-            site_url = os.getenv('SITE_URL', 'https://yallabus.app')
-            feed_url = f"{site_url}/feeds/latest-trips/"
-            try:
-                requests.get(f"https://www.google.com/ping?sitemap={feed_url}", timeout=5)
-                sys.stdout.write(f'[FEED] Pinged Google about feed update\n')
-                sys.stdout.flush()
-            except Exception as e:
-                sys.stdout.write(f'[FEED] Failed to ping Google: {e}\n')
-                sys.stdout.flush()
-        
-        transaction.on_commit(ping_feed)
+        # Queue Google, Bing/Yandex (IndexNow) and feed notifications with the publish itself
+        OutboxService.enqueue_trips_published([instance.id])
     
     # Notify Google when trip status CHANGES to cancelled
     if instance.status == 'cancelled' and previous_status != 'cancelled':
         sys.stdout.write(f'[INDEXING] Trip {instance.id} cancelled, notifying Google\n')
         sys.stdout.flush()
-        transaction.on_commit(lambda: notify_google_indexing(trip_url, 'URL_DELETED'))
-        
-        from .models import OperatorMetrics
-        metrics, created = OperatorMetrics.objects.get_or_create(operator=instance.operator)
-        
-        # Update cancellation rate
-        total_trips = Trip.objects.filter(operator=instance.operator).count()
-        cancelled_trips = Trip.objects.filter(operator=instance.operator, status='cancelled').count()
-        
-        if total_trips > 0:
-            metrics.cancellation_rate = (cancelled_trips / total_trips) * 100
-            metrics.save(update_fields=['cancellation_rate'])
-        
-        metrics.recalculate_health_score()
+        OutboxService.enqueue_trip_removed(instance.id)
+
+    # Counters only; health scores are refreshed in bulk by recompute_health_scores
+    if created:
+        OperatorMetricsService().trip_created(instance)
+    else:
+        OperatorMetricsService().trip_status_changed(instance, previous_status)
+
+
+@receiver(post_delete, sender=Trip)
+def update_operator_metrics_on_trip_delete(sender, instance, **kwargs):
+    OperatorMetricsService().trip_deleted(instance)
+
+
+@receiver(post_save, sender=Trip)
+def sync_search_index_on_trip_change(sender, instance, created, **kwargs):
+    """Mirror trip status/date changes onto the city-pair search index"""
+    if created:
+        return
+    
+    status_changed = instance.status != getattr(instance, '_previous_status', None)
+    date_changed = instance.journey_date != getattr(instance, '_previous_journey_date', None)
+    if status_changed or date_changed:
+        TripIndexService().sync_trip(instance)
+
+
+@receiver(post_save, sender=TripStop)
+@receiver(post_delete, sender=TripStop)
+def rebuild_search_index_on_stop_change(sender, instance, **kwargs):
+    """Rebuild the trip's city pairs when one of its stops changes"""
+    trip = Trip.objects.filter(id=instance.trip_id).first()
+    if trip:
+        TripIndexService().rebuild_trip(trip)
+        if trip.status == 'published':
+            invalidate_city_pickers(trip.journey_date)
+            trip_id = trip.id
+            transaction.on_commit(lambda: SearchCacheService.invalidate_trips([trip_id]))
+            transaction.on_commit(lambda: RecentTripsService().refresh_trips([trip_id]))
+
+
+def invalidate_city_pickers(*journey_dates):
+    # Bump again after commit so no request caches lists read mid-transaction
+    CityPickerService.invalidate(*journey_dates)
+    transaction.on_commit(lambda: CityPickerService.invalidate(*journey_dates))
+
+
+@receiver(post_save, sender=Trip)
+def invalidate_city_pickers_on_trip_change(sender, instance, created, **kwargs):
+    """Drop cached departure/destination lists of the dates a trip enters or leaves"""
+    previous_status = getattr(instance, '_previous_status', None)
+    previous_date = getattr(instance, '_previous_journey_date', None)
+    
+    if created:
+        if instance.status == 'published':
+            invalidate_city_pickers(instance.journey_date)
+    elif instance.status != previous_status or str(instance.journey_date) != str(previous_date):
+        invalidate_city_pickers(instance.journey_date, previous_date)
+
+
+@receiver(post_delete, sender=Trip)
+def invalidate_city_pickers_on_trip_delete(sender, instance, **kwargs):
+    invalidate_city_pickers(instance.journey_date)
+
+
+@receiver(post_save, sender=Trip)
+def invalidate_search_cache_on_trip_change(sender, instance, created, **kwargs):
+    """Drop cached search responses of the city pairs a trip enters or leaves"""
+    previous_status = getattr(instance, '_previous_status', None)
+    previous_date = getattr(instance, '_previous_journey_date', None)
+    
+    if created and instance.status != 'published':
+        return
+    if not created and instance.status == previous_status and instance.journey_date == previous_date:
+        return
+    
+    # After commit, so the tags come from the trip's final city pairs
+    trip_id = instance.id
+    transaction.on_commit(lambda: SearchCacheService.invalidate_trips([trip_id], extra_dates=[previous_date]))
+
+
+@receiver(post_save, sender=Trip)
+@receiver(post_delete, sender=Trip)
+def refresh_trip_listings_on_trip_change(sender, instance, created=False, **kwargs):
+    """Upsert or drop the trip in the recent trips projection and its sitemap page when it is published, cancelled or moved"""
+    if created and instance.status != 'published':
+        return
+    if (
+        not created and kwargs['signal'] is post_save
+        and instance.status == getattr(instance, '_previous_status', None)
+        and instance.journey_date == getattr(instance, '_previous_journey_date', None)
+    ):
+        return
+    
+    trip_id = instance.id
+    transaction.on_commit(lambda: RecentTripsService().refresh_trips([trip_id]))
+    transaction.on_commit(lambda: SitemapService().refresh('trips', [trip_id]))
+
+
+@receiver(pre_delete, sender=Trip)
+def invalidate_search_cache_on_trip_delete(sender, instance, **kwargs):
+    # Read the tags now: the trip's city pairs are deleted with it
+    tags = SearchCacheService.tags_for_trips([instance.id])
+    if tags:
+        transaction.on_commit(lambda: SearchCacheService.invalidate_tags(tags))
+
+
+@receiver(post_save, sender=CityList)
+@receiver(post_delete, sender=CityList)
+def invalidate_city_locator(sender, instance, **kwargs):
+    """Drop cached nearest-city grids once city coordinates change"""
+    # Bump again after commit so no process keeps a grid rebuilt mid-transaction
+    CityLocatorService.invalidate()
+    transaction.on_commit(CityLocatorService.invalidate)
+    transaction.on_commit(lambda: SearchCacheService.invalidate_tags([SearchCacheService.CITIES_TAG]))
+    city_id = instance.id
+    transaction.on_commit(lambda: SitemapService().refresh('cities', [city_id]))
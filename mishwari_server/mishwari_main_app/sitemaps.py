@@ -1,43 +1,39 @@
 """SEO Sitemaps for Google indexing"""
-from django.contrib.sitemaps import Sitemap
-from django.contrib.sites.models import Site
 from django.utils import timezone
 from .models import Trip, CityList
 
 
-class TripSitemap(Sitemap):
+class TripSitemap:
+    """Every published trip that has not departed yet"""
+    name = 'trips'
     changefreq = "daily"
     priority = 0.9
     
-    def get_urls(self, page=1, site=None, protocol=None):
-        # Force correct domain for sitemap URLs
-        site = Site(domain='yallabus.app', name='Yalla Bus')
-        return super().get_urls(page=page, site=site, protocol='https')
-    
-    def items(self):
+    def queryset(self):
         today = timezone.now().date()
-        return Trip.objects.filter(
-            status='published',
-            journey_date__gte=today
-        ).select_related('from_city', 'to_city', 'operator').order_by('-created_at')[:1000]
+        return Trip.objects.filter(status='published', journey_date__gte=today).values_list('id', 'created_at')
     
-    def lastmod(self, obj):
-        return obj.created_at
+    def lastmod(self, row):
+        return row[1]
     
-    def location(self, obj):
-        return f'/bus_list/{obj.id}'
+    def location(self, row):
+        return f'/bus_list/{row[0]}'
 
 
-class CitySitemap(Sitemap):
+class CitySitemap:
+    """Every city page"""
+    name = 'cities'
     changefreq = "weekly"
     priority = 0.7
     
-    def get_urls(self, page=1, site=None, protocol=None):
-        site = Site(domain='yallabus.app', name='Yalla Bus')
-        return super().get_urls(page=page, site=site, protocol='https')
+    def queryset(self):
+        return CityList.objects.values_list('id', 'city')
     
-    def items(self):
-        return CityList.objects.all().order_by('city')[:100]
+    def lastmod(self, row):
+        return None
     
-    def location(self, obj):
-        return f'/cities/{obj.city.lower()}'
+    def location(self, row):
+        return f'/cities/{row[1].lower()}'
+
+
+SITEMAPS = {sitemap.name: sitemap for sitemap in (TripSitemap(), CitySitemap())}
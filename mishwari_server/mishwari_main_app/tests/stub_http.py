@@ -0,0 +1,61 @@
+"""Local stub HTTP server for tests of outbound integrations"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        self.server.received.append((self.command, self.path, dict(self.headers), body))
+        status, headers, content = self.server.responder(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Records every request and answers with `responder(method, path, headers, body)`,
+    which returns (status, headers, body bytes); by default an empty `status_code`
+    """
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.received = []
+        self.httpd.responder = self.default_responder
+        self.status_code = 200
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def received(self):
+        return self.httpd.received
+
+    def respond_with(self, responder):
+        self.httpd.responder = responder or self.default_responder
+
+    def default_responder(self, method, path, headers, body):
+        return self.status_code, {}, b''
+
+    def reset(self):
+        self.httpd.received.clear()
+        self.respond_with(None)
+        self.status_code = 200
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
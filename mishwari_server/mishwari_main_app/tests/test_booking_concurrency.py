@@ -0,0 +1,102 @@
+"""Concurrency stress test for per-segment seat inventory"""
+
+import random
+import threading
+import time
+from django.contrib.auth.models import User
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+from ..models import Trip, TripStop, Seat, Booking, TripSegmentInventory, CityList, BusOperator, Bus, Profile
+from ..services.booking_service import BookingService, InsufficientSeatsError
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    CAPACITY = 10
+
+    def setUp(self):
+        self.user = User.objects.create_user('testuser')
+        Profile.objects.create(user=self.user, mobile_number='1234567890')
+
+        operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        bus = Bus.objects.create(operator=operator, bus_number='TEST123', bus_type='Standard', capacity=self.CAPACITY)
+        cities = [CityList.objects.create(city=f'City{i}') for i in range(4)]
+
+        self.trip = Trip.objects.create(
+            operator=operator,
+            bus=bus,
+            from_city=cities[0],
+            to_city=cities[-1],
+            journey_date='2024-01-01',
+            planned_polyline='test'
+        )
+        self.stops = [
+            TripStop.objects.create(
+                trip=self.trip,
+                city=city,
+                sequence=i,
+                planned_arrival=f'2024-01-01 {8 + i:02d}:00:00',
+                planned_departure=f'2024-01-01 {8 + i:02d}:00:00',
+                price_from_start=i * 100
+            )
+            for i, city in enumerate(cities)
+        ]
+        self.trip.initialize_seat_matrix(len(self.stops))
+        for seat_num in range(1, self.CAPACITY + 1):
+            Seat.objects.create(trip=self.trip, seat_number=str(seat_num), available_segments=['0-1', '1-2', '2-3'])
+
+    def book(self, from_index, to_index, outcomes):
+        try:
+            for _ in range(200):
+                try:
+                    BookingService().create_booking(
+                        trip_id=self.trip.id,
+                        from_stop_id=self.stops[from_index].id,
+                        to_stop_id=self.stops[to_index].id,
+                        user=self.user,
+                        passengers_data=[{'name': 'Passenger', 'is_checked': True}]
+                    )
+                    outcomes.append('booked')
+                    return
+                except InsufficientSeatsError:
+                    outcomes.append('full')
+                    return
+                except OperationalError:
+                    # SQLite locks the whole database; back off and retry
+                    time.sleep(random.uniform(0.001, 0.01))
+            outcomes.append('gave up')
+        except Exception as e:
+            outcomes.append(repr(e))
+        finally:
+            connection.close()
+
+    def test_parallel_bookings_never_oversell(self):
+        legs = [(0, 1)] * 14 + [(2, 3)] * 14 + [(0, 3)] * 4 + [(1, 2)] * 8
+        random.Random(7).shuffle(legs)
+        outcomes = []
+
+        threads = [threading.Thread(target=self.book, args=(a, b, outcomes)) for a, b in legs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(outcomes) - {'booked', 'full'}, set())
+        bookings = list(Booking.objects.filter(trip=self.trip).select_related('from_stop', 'to_stop'))
+        self.assertEqual(len(bookings), outcomes.count('booked'))
+
+        inventory = dict(TripSegmentInventory.objects.filter(trip=self.trip).values_list('segment_index', 'remaining'))
+        seats = {seat.seat_number: seat for seat in Seat.objects.filter(trip=self.trip)}
+
+        for segment in range(3):
+            crossing = [b for b in bookings if b.from_stop.sequence <= segment < b.to_stop.sequence]
+            seat_numbers = [b.passengers_data[0]['seat_number'] for b in crossing]
+
+            self.assertLessEqual(len(crossing), self.CAPACITY)
+            self.assertEqual(inventory[segment], self.CAPACITY - len(crossing))
+            self.assertEqual(len(seat_numbers), len(set(seat_numbers)))
+            for number, seat in seats.items():
+                self.assertEqual(seat.is_available_for_segments([f'{segment}-{segment + 1}']), number not in seat_numbers)
+
+        BookingService().refresh_seat_matrix(self.trip.id)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seat_matrix, {f'{i}-{i+1}': inventory[i] for i in range(3)})
@@ -0,0 +1,115 @@
+"""Query-count and pagination tests for compact booking lists"""
+
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Trip, TripStop, Booking, CityList, BusOperator, Bus, Profile, TripReview
+
+
+class BookingListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.passenger = User.objects.create_user('passenger')
+        Profile.objects.create(user=self.passenger, mobile_number='770000001')
+        self.admin = User.objects.create_user('operator_admin')
+        Profile.objects.create(user=self.admin, mobile_number='770000002', role='operator_admin')
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com', platform_user=self.admin)
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='BUS1', bus_type='Standard', capacity=40)
+
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.aden = CityList.objects.create(city='Aden')
+        self.trips = [self.create_trip() for _ in range(3)]
+
+    def create_trip(self):
+        journey_date = timezone.now().date() + timedelta(days=1)
+        trip = Trip.objects.create(
+            operator=self.operator,
+            bus=self.bus,
+            from_city=self.sanaa,
+            to_city=self.aden,
+            journey_date=journey_date,
+            planned_polyline='test',
+            seat_matrix={'0-1': 40}
+        )
+        departure = timezone.now() + timedelta(days=1)
+        for sequence, city in enumerate([self.sanaa, self.aden]):
+            TripStop.objects.create(
+                trip=trip,
+                city=city,
+                sequence=sequence,
+                planned_arrival=departure + timedelta(hours=sequence),
+                planned_departure=departure + timedelta(hours=sequence),
+                price_from_start=500 * sequence
+            )
+        return trip
+
+    def create_bookings(self, count):
+        for i in range(count):
+            trip = self.trips[i % len(self.trips)]
+            stops = list(trip.stops.order_by('sequence'))
+            booking = Booking.objects.create(
+                user=self.passenger,
+                trip=trip,
+                from_stop=stops[0],
+                to_stop=stops[1],
+                passengers_data=[{'name': 'P', 'seat_number': str(i)}],
+                total_fare=500,
+                status='confirmed'
+            )
+            if i % 2:
+                TripReview.objects.create(
+                    booking=booking, operator_snapshot=self.operator, bus_snapshot=self.bus,
+                    overall_rating=5, bus_condition_rating=5, driver_rating=5
+                )
+
+    def get(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data
+
+    def test_passenger_list_is_compact_with_constant_queries(self):
+        self.create_bookings(2)
+        few_queries, _ = self.get(self.passenger, '/api/booking/')
+
+        self.create_bookings(10)
+        many_queries, data = self.get(self.passenger, '/api/booking/')
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(len(data['results']), 12)
+        self.assertEqual(sorted(trip['id'] for trip in data['trips']), sorted(trip.id for trip in self.trips))
+        row = data['results'][0]
+        self.assertEqual(row['from_stop']['city'], 'Sanaa')
+        self.assertEqual(row['passenger_count'], 1)
+        self.assertIn(row['trip'], [trip.id for trip in self.trips])
+        self.assertEqual(sum(row['has_review'] for row in data['results']), 6)
+
+    def test_cursor_pages_are_disjoint_and_newest_first(self):
+        self.create_bookings(5)
+
+        _, first = self.get(self.passenger, '/api/booking/', {'page_size': 3})
+        self.assertIsNotNone(first['next'])
+        self.client.force_authenticate(self.passenger)
+        second = self.client.get(first['next']).data
+
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(ids, sorted(Booking.objects.values_list('id', flat=True), reverse=True))
+        self.assertIsNone(second['next'])
+
+    def test_operator_trip_bookings_constant_queries(self):
+        url = f'/api/operator/trips/{self.trips[0].id}/bookings/'
+        self.create_bookings(3)
+        few_queries, _ = self.get(self.admin, url)
+
+        self.create_bookings(9)
+        many_queries, data = self.get(self.admin, url)
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(len(data['results']), 4)
+        self.assertEqual([trip['id'] for trip in data['trips']], [self.trips[0].id])
@@ -1,9 +1,10 @@
 """Tests for booking service"""
 
+from unittest import mock
 from django.test import TestCase
 from django.contrib.auth.models import User
 from ..services.booking_service import BookingService, InsufficientSeatsError
-from ..models import Trip, TripStop, CityList, BusOperator, Bus, Driver, Profile
+from ..models import Trip, TripStop, Seat, CityList, BusOperator, Bus, Driver, Profile
 
 
 class BookingServiceTest(TestCase):
@@ -80,3 +81,122 @@ class BookingServiceTest(TestCase):
                 user=self.user,
                 passengers_data=passengers
             )
+
+    
+    def test_seat_matrix_projection_refreshed_on_commit(self):
+        service = BookingService()
+        passengers = [{'name': 'Test', 'is_checked': True}] * 2
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = service.create_booking(
+                trip_id=self.trip.id,
+                from_stop_id=self.from_stop.id,
+                to_stop_id=self.to_stop.id,
+                user=self.user,
+                passengers_data=passengers
+            )
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seat_matrix, {'0-1': 38})
+        self.assertEqual(service.get_available_seats_for_journey(self.trip, self.from_stop, self.to_stop), 38)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            service.cancel_booking(booking.id)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seat_matrix, {'0-1': 40})
+
+class SeatBitmaskTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser')
+        Profile.objects.create(user=self.user, mobile_number='1234567890')
+        
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='TEST123', bus_type='Standard', capacity=3)
+        cities = [CityList.objects.create(city=f'City{i}') for i in range(4)]
+        
+        self.trip = Trip.objects.create(
+            operator=self.operator,
+            bus=self.bus,
+            from_city=cities[0],
+            to_city=cities[-1],
+            journey_date='2024-01-01',
+            planned_polyline='test',
+            status='published',
+            seat_matrix={'0-1': 3, '1-2': 3, '2-3': 3}
+        )
+        self.stops = [
+            TripStop.objects.create(
+                trip=self.trip,
+                city=city,
+                sequence=i,
+                planned_arrival=f'2024-01-01 {8 + i:02d}:00:00',
+                planned_departure=f'2024-01-01 {8 + i:02d}:00:00',
+                price_from_start=i * 100
+            )
+            for i, city in enumerate(cities)
+        ]
+        for seat_num in range(1, 4):
+            Seat.objects.create(trip=self.trip, seat_number=str(seat_num), available_segments=['0-1', '1-2', '2-3'])
+    
+    def book(self, from_index, to_index, count=1):
+        return BookingService().create_booking(
+            trip_id=self.trip.id,
+            from_stop_id=self.stops[from_index].id,
+            to_stop_id=self.stops[to_index].id,
+            user=self.user,
+            passengers_data=[{'name': f'P{i}', 'is_checked': True} for i in range(count)]
+        )
+    
+    def test_segments_round_trip_through_mask(self):
+        seat = Seat(available_segments=['0-1', '2-3'])
+        self.assertEqual(seat.availability_mask, 0b101)
+        self.assertEqual(seat.available_segments, ['0-1', '2-3'])
+        self.assertTrue(seat.is_available_for_segments(['2-3']))
+        self.assertFalse(seat.is_available_for_segments(['0-1', '1-2']))
+    
+    def test_disjoint_segments_share_a_seat(self):
+        first = self.book(0, 1)
+        second = self.book(1, 3)
+        
+        self.assertEqual(first.passengers_data[0]['seat_number'], '1')
+        self.assertEqual(second.passengers_data[0]['seat_number'], '1')
+        self.assertEqual(Seat.objects.get(trip=self.trip, seat_number='1').available_segments, [])
+        
+        overlapping = self.book(0, 2, count=2)
+        self.assertEqual([p['seat_number'] for p in overlapping.passengers_data], ['2', '3'])
+    
+    def test_cancel_releases_segments(self):
+        booking = self.book(0, 2)
+        BookingService().cancel_booking(booking.id)
+        
+        seat = Seat.objects.get(trip=self.trip, seat_number='1')
+        self.assertEqual(seat.available_segments, ['0-1', '1-2', '2-3'])
+    
+    def test_seat_lookup_is_single_query(self):
+        segments = ['1-2', '2-3']
+        with self.assertNumQueries(1):
+            seats = BookingService()._get_available_seats_for_segments(self.trip, segments, 2)
+        self.assertEqual([seat.seat_number for seat in seats], ['1', '2'])
+
+    def test_short_seat_pick_is_retried(self):
+        service = BookingService()
+        pick = service._get_available_seats_for_segments
+        calls = []
+
+        def locked_by_other_leg(trip, segments, count, lock=False):
+            # The first pick misses a seat locked by a concurrent booking
+            calls.append(count)
+            seats = pick(trip, segments, count, lock)
+            return seats[:-1] if len(calls) == 1 else seats
+
+        with mock.patch.object(service, '_get_available_seats_for_segments', side_effect=locked_by_other_leg):
+            booking = service.create_booking(
+                trip_id=self.trip.id,
+                from_stop_id=self.stops[0].id,
+                to_stop_id=self.stops[2].id,
+                user=self.user,
+                passengers_data=[{'name': f'P{i}', 'is_checked': True} for i in range(2)]
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([p['seat_number'] for p in booking.passengers_data], ['1', '2'])
+        self.assertEqual(self.trip.segment_inventory.get(segment_index=0).remaining, 1)
@@ -0,0 +1,51 @@
+"""Tests for the nearest-city spatial grid"""
+
+from django.test import TestCase
+from ..models import CityList
+from ..services.city_locator_service import CityLocatorService, haversine_km
+
+
+class CityLocatorServiceTest(TestCase):
+    def setUp(self):
+        self.sanaa = CityList.objects.create(city='Sanaa', waypoints=[{'lat': 15.35, 'lon': 44.20}])
+        self.taiz = CityList.objects.create(city='Taiz', waypoints=[{'lat': 13.58, 'lon': 44.02}])
+        self.aden = CityList.objects.create(city='Aden', waypoints=[{'lat': 12.79, 'lon': 45.03}])
+        self.mukalla = CityList.objects.create(city='Mukalla', waypoints=[{'lat': 14.54, 'lon': 49.12}])
+        CityList.objects.create(city='Unmapped', waypoints=[])
+
+    def test_nearest_matches_brute_force(self):
+        service = CityLocatorService()
+        cities = [self.sanaa, self.taiz, self.aden, self.mukalla]
+
+        for lat, lon in [(13.6, 44.0), (15.0, 47.5), (20.0, 40.0), (12.0, 52.0)]:
+            expected = min(cities, key=lambda city: haversine_km(lat, lon, city.latitude, city.longitude))
+            city, distance = service.nearest_city(lat, lon)
+            self.assertEqual(city.id, expected.id)
+            self.assertAlmostEqual(distance, haversine_km(lat, lon, expected.latitude, expected.longitude))
+
+    def test_k_nearest_and_radius(self):
+        service = CityLocatorService()
+
+        nearest = [city.city for city, _ in service.nearest_cities(13.6, 44.0, k=3)]
+        self.assertEqual(nearest, ['Taiz', 'Aden', 'Sanaa'])
+        self.assertEqual(len(service.nearest_cities(13.6, 44.0, k=10)), 4)
+
+        within = [city.city for city, _ in service.cities_within(13.6, 44.0, 150)]
+        self.assertEqual(within, ['Taiz', 'Aden'])
+
+    def test_city_changes_invalidate_grid(self):
+        service = CityLocatorService()
+        self.assertEqual(service.nearest_city(15.0, 42.9)[0].city, 'Sanaa')
+
+        CityList.objects.create(city='Hodeidah', waypoints=[{'lat': 14.80, 'lon': 42.95}])
+        self.assertEqual(service.nearest_city(15.0, 42.9)[0].city, 'Hodeidah')
+
+        with self.assertNumQueries(0):
+            service.nearest_city(15.0, 42.9)
+
+    def test_far_query_falls_back_to_scan(self):
+        grid = CityLocatorService()._get_grid()
+        distance, city = grid.nearest(-80.0, -170.0)[0]
+        expected = min([self.sanaa, self.taiz, self.aden, self.mukalla], key=lambda c: haversine_km(-80.0, -170.0, c.latitude, c.longitude))
+        self.assertEqual(city.id, expected.id)
+        self.assertAlmostEqual(distance, haversine_km(-80.0, -170.0, expected.latitude, expected.longitude))
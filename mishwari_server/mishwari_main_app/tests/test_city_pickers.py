@@ -0,0 +1,49 @@
+"""Tests for the cached departure/destination city pickers"""
+
+from django.test import TestCase
+from ..models import Trip
+from .trip_fixtures import PublicTripFixtureMixin
+
+
+class CityPickerTest(PublicTripFixtureMixin, TestCase):
+    CITIES = ('Sanaa', 'Ibb', 'Taiz', 'Aden')
+
+    def setUp(self):
+        super().setUp()
+        self.create_trip([self.sanaa, self.taiz, self.aden])
+        self.create_trip([self.sanaa, self.ibb, self.taiz])
+        self.create_trip([self.taiz, self.aden], status='draft')
+
+    def get(self, url, **params):
+        response = self.client.get(url, {'date': str(self.journey_date), **params})
+        self.assertEqual(response.status_code, 200)
+        return [(city['city'], city['trip_count']) for city in response.data]
+
+    def test_departure_cities_grouped_and_cached(self):
+        with self.assertNumQueries(1):
+            cities = self.get('/api/city-list/departure-cities/')
+        self.assertEqual(cities, [('Ibb', 1), ('Sanaa', 2), ('Taiz', 1)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('/api/city-list/departure-cities/'), cities)
+
+    def test_destination_cities(self):
+        self.assertEqual(
+            self.get('/api/city-list/destination-cities/', from_city='Sanaa'),
+            [('Aden', 1), ('Ibb', 1), ('Taiz', 2)]
+        )
+        self.assertEqual(self.get('/api/city-list/destination-cities/', from_city='Ibb'), [('Taiz', 1)])
+
+    def test_publish_and_cancel_invalidate_the_date(self):
+        self.get('/api/city-list/departure-cities/')
+        self.get('/api/city-list/destination-cities/', from_city='Taiz')
+
+        draft = Trip.objects.get(status='draft')
+        draft.status = 'published'
+        draft.save()
+        self.assertEqual(self.get('/api/city-list/departure-cities/'), [('Ibb', 1), ('Sanaa', 2), ('Taiz', 2)])
+        self.assertEqual(self.get('/api/city-list/destination-cities/', from_city='Taiz'), [('Aden', 2)])
+
+        draft.status = 'cancelled'
+        draft.save()
+        self.assertEqual(self.get('/api/city-list/destination-cities/', from_city='Taiz'), [('Aden', 1)])
@@ -0,0 +1,118 @@
+"""Tests for the batched, quota-aware search-engine indexing client"""
+
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from ..utils.indexing_client import IndexingClient, DEFERRED
+from .stub_http import StubServer
+
+
+def batch_responder(failing=()):
+    """Answer a Google batch request part by part, failing the given item indexes"""
+    def respond(method, path, headers, body):
+        count = len(re.findall(rb'Content-ID: <item\d+>', body))
+        parts = [
+            f'--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item{index}>\r\n\r\n'
+            f'HTTP/1.1 {"400 Bad Request" if index in failing else "200 OK"}\r\n\r\n{{}}\r\n'
+            for index in range(count)
+        ]
+        return 200, {'Content-Type': 'multipart/mixed; boundary=resp'}, (''.join(parts) + '--resp--').encode()
+    return respond
+
+
+class IndexingClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.reset()
+        environ = {
+            'INDEXNOW_KEY': 'test-key',
+            'INDEXNOW_ENDPOINT': f'{self.server.url}/indexnow',
+            'GOOGLE_INDEXING_BATCH_ENDPOINT': f'{self.server.url}/batch',
+        }
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        token = mock.patch.object(IndexingClient, '_google_token', return_value='token')
+        token.start()
+        self.addCleanup(token.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def urls(self, count):
+        return [f'https://yallabus.app/bus_list/{index}' for index in range(count)]
+
+    def test_google_notifications_are_batched(self):
+        self.server.respond_with(batch_responder(failing={1}))
+
+        results = IndexingClient().google_publish([(url, 'URL_UPDATED') for url in self.urls(150)])
+
+        self.assertEqual(len(self.server.received), 2)
+        self.assertEqual(results[:3], [True, False, True])
+        # Item 1 of each of the two batches fails
+        self.assertEqual(results.count(True), 148)
+        method, path, headers, body = self.server.received[0]
+        self.assertEqual(headers['Authorization'], 'Bearer token')
+        self.assertEqual(body.count(b'POST /v3/urlNotifications:publish'), 100)
+        self.assertIn(b'"type": "URL_UPDATED"', body)
+
+    @override_settings(GOOGLE_INDEXING_DAILY_QUOTA=3)
+    def test_google_quota_defers_the_rest(self):
+        self.server.respond_with(batch_responder())
+
+        notifications = [(url, 'URL_DELETED') for url in self.urls(5)]
+        self.assertEqual(IndexingClient().google_publish(notifications), [True, True, True, DEFERRED, DEFERRED])
+        self.assertEqual(IndexingClient().google_publish(notifications[:1]), [DEFERRED])
+        self.assertEqual(len(self.server.received), 1)
+
+    @override_settings(INDEXNOW_DAILY_QUOTA=3)
+    def test_indexnow_sends_one_payload_within_quota(self):
+        self.assertTrue(IndexingClient().indexnow_submit(self.urls(3)))
+        self.assertEqual(IndexingClient().indexnow_submit(self.urls(1)), DEFERRED)
+
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(json.loads(self.server.received[0][3])['urlList'], self.urls(3))
+
+    def test_indexnow_without_key_is_skipped(self):
+        with mock.patch.dict(os.environ, {'INDEXNOW_KEY': ''}):
+            self.assertIsNone(IndexingClient().indexnow_submit(self.urls(1)))
+        self.assertEqual(self.server.received, [])
+
+
+class GoogleCredentialsTest(TestCase):
+    def setUp(self):
+        IndexingClient._credentials = None
+        self.addCleanup(setattr, IndexingClient, '_credentials', None)
+        credentials_file = tempfile.NamedTemporaryFile(suffix='.json')
+        self.addCleanup(credentials_file.close)
+        patcher = mock.patch.dict(os.environ, {'GOOGLE_SERVICE_ACCOUNT_FILE': credentials_file.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_is_refreshed_only_when_expired(self):
+        credentials = mock.Mock(valid=False, token='token')
+        credentials.refresh.side_effect = lambda request: setattr(credentials, 'valid', True)
+
+        with mock.patch('google.oauth2.service_account.Credentials.from_service_account_file', return_value=credentials) as load:
+            self.assertEqual(IndexingClient._google_token(), 'token')
+            self.assertEqual(IndexingClient._google_token(), 'token')
+            credentials.valid = False
+            IndexingClient._google_token()
+
+        load.assert_called_once()
+        self.assertEqual(credentials.refresh.call_count, 2)
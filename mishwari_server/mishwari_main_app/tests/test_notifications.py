@@ -0,0 +1,142 @@
+"""Tests for the trip notification fan-out"""
+
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ..models import Trip, TripStop, Booking, CityList, BusOperator, Bus, Profile, BookingNotification, OutboxMessage
+from ..notifications import send_departure_notification
+from ..services.notification_service import NotificationService
+from ..services.outbox_service import OutboxService
+from .stub_http import StubServer
+
+
+class FakeDispatcher:
+    """Records sends and in-flight concurrency; fails recipients in `failing`"""
+
+    def __init__(self, failing=(), delay=0):
+        self.failing = set(failing)
+        self.delay = delay
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def available(self):
+        return ['fake']
+
+    def deliver_text(self, phone_number, text):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+            self.sent.append((phone_number, text))
+        return None if phone_number in self.failing else 'fake'
+
+
+class DepartureNotificationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='BUS7', bus_type='Standard', capacity=40)
+        sanaa = CityList.objects.create(city='Sanaa')
+        aden = CityList.objects.create(city='Aden')
+        self.trip = Trip.objects.create(
+            operator=self.operator, bus=self.bus, from_city=sanaa, to_city=aden,
+            journey_date=timezone.now().date(), planned_polyline='test', status='active'
+        )
+        departure = timezone.now()
+        self.stops = [
+            TripStop.objects.create(
+                trip=self.trip, city=city, sequence=sequence, price_from_start=500 * sequence,
+                planned_arrival=departure + timedelta(hours=sequence),
+                planned_departure=departure + timedelta(hours=sequence)
+            )
+            for sequence, city in enumerate([sanaa, aden])
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def book(self, count, status='confirmed'):
+        bookings = []
+        for index in range(count):
+            number = f'77{User.objects.count():07d}'
+            user = User.objects.create_user(number)
+            Profile.objects.create(user=user, mobile_number=number)
+            bookings.append(Booking(
+                user=user, trip=self.trip, from_stop=self.stops[0], to_stop=self.stops[1],
+                passengers_data=[], total_fare=500, status=status
+            ))
+        return Booking.objects.bulk_create(bookings)
+
+    def test_request_only_queues(self):
+        self.book(20)
+        with self.assertNumQueries(2):
+            self.assertEqual(send_departure_notification(self.trip.id), 20)
+        self.assertEqual(OutboxMessage.objects.get(channel='trip_notification').payload, {'trip_id': self.trip.id, 'kind': 'departure'})
+        self.assertFalse(BookingNotification.objects.exists())
+
+    def test_fan_out_queries_do_not_grow_with_bookings(self):
+        def fan_out_queries(count):
+            Booking.objects.all().delete()
+            self.book(count)
+            with CaptureQueriesContext(connection) as context:
+                self.assertTrue(NotificationService(FakeDispatcher()).fan_out(self.trip.id, 'departure'))
+            return len(context.captured_queries)
+
+        self.assertEqual(fan_out_queries(3), fan_out_queries(30))
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=10, NOTIFICATION_CONCURRENCY={'sms': 3})
+    def test_renders_once_and_respects_concurrency(self):
+        self.book(25)
+        self.book(2, status='cancelled')
+        dispatcher = FakeDispatcher(delay=0.01)
+        NotificationService(dispatcher).fan_out(self.trip.id, 'departure')
+
+        self.assertEqual(len(dispatcher.sent), 25)
+        self.assertEqual(
+            {text for _, text in dispatcher.sent},
+            {'Your shuttle to Aden is departing in 10 minutes. Please board Bus BUS7 now.'}
+        )
+        self.assertLessEqual(dispatcher.max_in_flight, 3)
+        self.assertEqual(BookingNotification.objects.filter(status='sent', provider='fake').count(), 25)
+
+    def test_retry_sends_only_pending_until_failed(self):
+        bookings = self.book(3)
+        failing = bookings[0].user.username
+        dispatcher = FakeDispatcher(failing=[failing])
+        service = NotificationService(dispatcher)
+
+        self.assertFalse(service.fan_out(self.trip.id, 'departure'))
+        dispatcher.sent.clear()
+        self.assertFalse(service.fan_out(self.trip.id, 'departure'))
+        self.assertEqual([phone for phone, _ in dispatcher.sent], [failing])
+
+        self.assertTrue(service.fan_out(self.trip.id, 'departure'))
+        row = BookingNotification.objects.get(booking=bookings[0])
+        self.assertEqual((row.status, row.attempts), ('failed', 3))
+        self.assertEqual(BookingNotification.objects.filter(status='sent').count(), 2)
+
+    def test_outbox_worker_delivers_through_sms_providers(self):
+        server = StubServer()
+        self.addCleanup(server.stop)
+        environ = {'INFOBIP_API_KEY': 'key', 'INFOBIP_BASE_URL': server.url, 'TWILIO_ACCOUNT_SID': '', 'WHATSAPP_SECRET_KEY': ''}
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.book(4)
+        send_departure_notification(self.trip.id)
+        self.assertEqual(OutboxService().process(), {'sent': 1})
+        self.assertEqual(len(server.received), 4)
+        self.assertEqual(BookingNotification.objects.filter(status='sent', provider='infobip').count(), 4)
@@ -0,0 +1,89 @@
+"""Tests for operator trip counters and the batch health-score recompute"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from ..models import Trip, CityList, BusOperator, OperatorMetrics
+from ..services.operator_metrics_service import OperatorMetricsService
+
+
+class OperatorMetricsTest(TestCase):
+    def setUp(self):
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com', avg_rating=Decimal('4.50'))
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.aden = CityList.objects.create(city='Aden')
+
+    def create_trip(self, operator=None, status='published'):
+        return Trip.objects.create(
+            operator=operator or self.operator, from_city=self.sanaa, to_city=self.aden,
+            journey_date=timezone.now().date() + timedelta(days=1), planned_polyline='test', status=status
+        )
+
+    def metrics(self, operator=None):
+        return OperatorMetrics.objects.get(operator=operator or self.operator)
+
+    def test_trip_events_update_counters(self):
+        trips = [self.create_trip() for _ in range(3)]
+        self.create_trip(status='cancelled')
+        metrics = self.metrics()
+        self.assertEqual((metrics.total_trips, metrics.cancelled_trips, metrics.cancellation_rate), (4, 1, 25.0))
+
+        trips[0].status = 'cancelled'
+        trips[0].save()
+        self.assertEqual((self.metrics().cancelled_trips, self.metrics().cancellation_rate), (2, 50.0))
+
+        trips[0].status = 'published'
+        trips[0].save()
+        trips[1].delete()
+        metrics = self.metrics()
+        self.assertEqual((metrics.total_trips, metrics.cancelled_trips), (3, 1))
+        self.assertAlmostEqual(metrics.cancellation_rate, 100 / 3)
+
+    def test_cancellation_cost_does_not_grow_with_history(self):
+        Trip.objects.bulk_create([
+            Trip(operator=self.operator, from_city=self.sanaa, to_city=self.aden,
+                 journey_date=timezone.now().date(), planned_polyline='test', status='completed')
+            for _ in range(50)
+        ])
+        trip = self.create_trip()
+
+        # Trip, outbox row, metrics counters and the search index; no counting over the operator's trips
+        trip.status = 'cancelled'
+        with self.assertNumQueries(4):
+            trip.save(update_fields=['status'])
+        self.assertEqual(self.metrics().cancelled_trips, 1)
+
+    def test_batch_recompute_refreshes_every_operator(self):
+        other = BusOperator.objects.create(name='Other', contact_info='other@test.com', avg_rating=Decimal('3.00'))
+        idle = BusOperator.objects.create(name='Idle', contact_info='idle@test.com', avg_rating=Decimal('5.00'))
+        self.create_trip()
+        self.create_trip(status='cancelled')
+        self.create_trip(operator=other)
+        OperatorMetrics.objects.filter(operator=other).update(strikes=1)
+
+        # Trip events leave health scores to the batch job
+        self.assertEqual(self.metrics().health_score, 100)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(OperatorMetricsService().recompute_health_scores(), 3)
+        self.assertEqual(self.metrics().health_score, 0)
+        self.assertEqual(self.metrics(other).health_score, 15)
+        self.assertEqual(self.metrics(idle).health_score, 50)
+
+        # Matches the per-row calculation
+        metrics = self.metrics(other)
+        metrics.recalculate_health_score()
+        self.assertEqual(metrics.health_score, 15)
+
+    def test_recount_corrects_drift(self):
+        trips = [self.create_trip() for _ in range(5)]
+        Trip.objects.filter(id=trips[0].id).update(status='cancelled')
+        OperatorMetrics.objects.filter(operator=self.operator).update(total_trips=9)
+
+        call_command('recompute_health_scores', '--recount', stdout=StringIO())
+        metrics = self.metrics()
+        self.assertEqual((metrics.total_trips, metrics.cancelled_trips, metrics.cancellation_rate), (5, 1, 20.0))
+        self.assertEqual(metrics.health_score, 5)
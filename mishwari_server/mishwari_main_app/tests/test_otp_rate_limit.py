@@ -0,0 +1,118 @@
+"""Tests for the cache-backed OTP rate limiter"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from unittest import mock
+from ..models import OTPAttempt
+from ..services.otp_rate_limit_service import OTPRateLimitService
+from ..utils.rate_limiter import SlidingWindowLimiter
+
+
+class SlidingWindowLimiterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter('test', limit=3, window=60)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_previous_bucket_slides_out(self):
+        start = 6000.0
+        self.assertEqual([self.limiter.hit('a', now=start + i) for i in range(3)], [0, 0, 0])
+        self.assertEqual(self.limiter.hit('a', now=start + 3), 57)
+
+        # 15s into the next bucket three quarters of the previous four hits still count
+        self.assertEqual(self.limiter.hit('a', now=start + 75), 15)
+        self.assertEqual(self.limiter.hit('a', now=start + 110), 0)
+        self.assertEqual(self.limiter.hit('b', now=start + 3), 0)
+
+    def test_reset(self):
+        for _ in range(4):
+            self.limiter.hit('a', now=100.0)
+        self.limiter.reset('a', now=100.0)
+        self.assertEqual(self.limiter.hit('a', now=100.0), 0)
+
+
+@override_settings(OTP_RATE_LIMITS={'mobile': (3, 600), 'ip': (5, 600), 'mobile_daily': (4, 86400)})
+class OTPRateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch(
+            'mishwari_main_app.views.auth_views.SMSDispatchService.send_otp', return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def request_otp(self, mobile_number, ip='10.0.0.1'):
+        return self.client.post(
+            '/api/mobile-login/request-otp/', {'mobile_number': mobile_number, 'use_firebase': False},
+            format='json', REMOTE_ADDR=ip
+        )
+
+    def test_limits_per_number_without_db_writes(self):
+        with CaptureQueriesContext(connection) as context:
+            statuses = [self.request_otp('770000001').status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        writes = [query['sql'] for query in context.captured_queries if not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+        response = self.request_otp('770000001')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.request_otp('770000002', ip='10.0.0.2').status_code, 200)
+
+    def test_limits_per_ip(self):
+        statuses = [self.request_otp(f'77000000{i}').status_code for i in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(self.request_otp('770000009', ip='10.0.0.2').status_code, 200)
+
+    def test_daily_cap_persists_a_block(self):
+        service = OTPRateLimitService()
+        for _ in range(4):
+            self.assertEqual(service.check('770000001'), 0)
+            service.reset('770000001')
+        self.assertEqual(service.check('770000001'), 86400)
+        self.assertEqual(OTPAttempt.objects.get(mobile_number='770000001').attempt_count, 1)
+
+        # The block outlives the cache, and is read back once
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertGreater(service.check('770000001'), 86000)
+        with self.assertNumQueries(0):
+            self.assertGreater(service.check('770000001'), 86000)
+
+        OTPRateLimitService.unblock(['770000001'])
+        self.assertEqual(service.check('770000001'), 0)
+
+    @override_settings(OTP_TRUSTED_PROXIES=1)
+    def test_client_ip_behind_proxy(self):
+        service = OTPRateLimitService()
+        request = mock.Mock(META={'REMOTE_ADDR': '10.0.0.9', 'HTTP_X_FORWARDED_FOR': '1.1.1.1, 2.2.2.2'})
+        self.assertEqual(service.client_ip(request), '2.2.2.2')
+
+
+class OTPDeliveryFailureTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_code_is_never_returned_or_printed(self):
+        with mock.patch('mishwari_main_app.views.auth_views.SMSDispatchService.send_otp', return_value=False), \
+                mock.patch('mishwari_main_app.views.auth_views.get_random_string', return_value='482913'), \
+                mock.patch('builtins.print') as printed:
+            response = APIClient().post(
+                '/api/mobile-login/request-otp/', {'mobile_number': '770000001', 'use_firebase': False}, format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('482913', str(response.data))
+        self.assertNotIn('482913', str(printed.call_args_list))
+        self.assertIsNone(cache.get('otp_770000001'))
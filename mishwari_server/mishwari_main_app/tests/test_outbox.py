@@ -0,0 +1,134 @@
+"""Tests for the outbound notification outbox against a local stub server"""
+
+import json
+import os
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import Trip, CityList, BusOperator, OutboxMessage
+from ..services import OutboxService
+from ..utils.indexing_client import IndexingClient
+from ..utils.publication_utils import trip_url
+from .stub_http import StubServer
+
+
+@override_settings(OUTBOX_MIN_INTERVALS={'google_indexing': 0, 'indexnow': 0, 'feed_ping': 0})
+class OutboxTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer()
+        cls.stub_url = cls.server.url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.reset()
+        environ = {
+            'INDEXNOW_KEY': 'test-key',
+            'INDEXNOW_ENDPOINT': f'{self.stub_url}/indexnow',
+            'GOOGLE_PING_ENDPOINT': f'{self.stub_url}/ping',
+        }
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        os.environ.pop('GOOGLE_SERVICE_ACCOUNT_FILE', None)
+        self.addCleanup(patcher.stop)
+
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.aden = CityList.objects.create(city='Aden')
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_trip(self):
+        return Trip.objects.create(
+            operator=self.operator,
+            from_city=self.sanaa,
+            to_city=self.aden,
+            journey_date=timezone.now().date() + timedelta(days=1),
+            planned_polyline='test',
+            status='published'
+        )
+
+    def test_publishing_only_queues(self):
+        trip = self.create_trip()
+
+        self.assertEqual(self.server.received, [])
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('channel', 'status')),
+            [('feed_ping', 'pending'), ('google_indexing', 'pending'), ('indexnow', 'pending')]
+        )
+        self.assertEqual(OutboxMessage.objects.get(channel='google_indexing').payload, {'url': trip_url(trip.id), 'action': 'URL_UPDATED'})
+
+    def test_worker_batches_per_channel(self):
+        trips = [self.create_trip(), self.create_trip()]
+
+        call_command('process_outbox', stdout=mock.MagicMock())
+
+        indexnow = [json.loads(body) for method, path, headers, body in self.server.received if path == '/indexnow']
+        pings = [path for method, path, headers, body in self.server.received if path.startswith('/ping')]
+        self.assertEqual(indexnow, [{
+            'host': 'yallabus.app',
+            'key': 'test-key',
+            'keyLocation': 'https://yallabus.app/test-key.txt',
+            'urlList': [trip_url(trip.id) for trip in trips],
+        }])
+        self.assertEqual(len(pings), 1)
+        self.assertFalse(OutboxMessage.objects.filter(status='pending').exists())
+        # No Google credentials configured here
+        self.assertEqual(set(OutboxMessage.objects.filter(channel='google_indexing').values_list('status', flat=True)), {'skipped'})
+
+    def test_failures_back_off_then_give_up(self):
+        self.create_trip()
+        self.server.status_code = 500
+
+        before = timezone.now()
+        OutboxService().process()
+        message = OutboxMessage.objects.get(channel='indexnow')
+        self.assertEqual((message.status, message.attempts), ('pending', 1))
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=OutboxService.BACKOFF_BASE))
+
+        # Not due yet: the next run leaves it alone
+        self.server.received.clear()
+        OutboxService().process()
+        self.assertEqual(self.server.received, [])
+
+        OutboxMessage.objects.filter(id=message.id).update(attempts=OutboxService.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+        OutboxService().process()
+        self.assertEqual(OutboxMessage.objects.get(id=message.id).status, 'failed')
+
+    def test_cancellation_queues_removal(self):
+        trip = self.create_trip()
+        OutboxMessage.objects.all().delete()
+
+        trip.status = 'cancelled'
+        trip.save()
+
+        with mock.patch.object(IndexingClient, 'google_publish', return_value=[True]) as publish:
+            self.assertEqual(OutboxService().process(), {'sent': 1})
+        publish.assert_called_once_with([(trip_url(trip.id), 'URL_DELETED')])
+
+    @override_settings(GOOGLE_INDEXING_DAILY_QUOTA=1)
+    def test_quota_defers_without_spending_attempts(self):
+        self.create_trip()
+        self.create_trip()
+        OutboxMessage.objects.exclude(channel='google_indexing').delete()
+
+        with mock.patch.object(IndexingClient, '_google_token', return_value='token'):
+            self.server.respond_with(lambda *request: (200, {'Content-Type': 'multipart/mixed; boundary=b'}, (
+                b'--b\r\nContent-Type: application/http\r\nContent-ID: <response-item0>\r\n\r\nHTTP/1.1 200 OK\r\n\r\n{}\r\n--b--'
+            )))
+            with mock.patch.dict(os.environ, {'GOOGLE_INDEXING_BATCH_ENDPOINT': f'{self.stub_url}/batch'}):
+                self.assertEqual(OutboxService().process(), {'sent': 1, 'deferred': 1})
+
+        deferred = OutboxMessage.objects.get(status='pending')
+        self.assertEqual(deferred.attempts, 0)
+        self.assertEqual(deferred.next_attempt_at, IndexingClient().quota_resets_at())
@@ -0,0 +1,90 @@
+"""Tests for the running rating aggregates and their reconciliation"""
+
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest import mock
+from ..models import Trip, TripStop, Booking, CityList, BusOperator, Bus, Driver, Profile, TripReview, OperatorMetrics
+from ..services.operator_metrics_service import OperatorMetricsService
+
+
+class RatingAggregateTest(TestCase):
+    def setUp(self):
+        self.passenger = User.objects.create_user('passenger')
+        Profile.objects.create(user=self.passenger, mobile_number='770000001')
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='BUS1', bus_type='Standard', capacity=40)
+        driver_user = User.objects.create_user('driver')
+        driver_profile = Profile.objects.create(user=driver_user, mobile_number='770000002', full_name='Driver')
+        self.driver = Driver.objects.create(user=driver_user, profile=driver_profile, operator=self.operator, driver_rating=5.0)
+
+        sanaa = CityList.objects.create(city='Sanaa')
+        aden = CityList.objects.create(city='Aden')
+        self.trip = Trip.objects.create(
+            operator=self.operator, bus=self.bus, driver=self.driver, from_city=sanaa, to_city=aden,
+            journey_date=timezone.now().date() - timedelta(days=1), planned_polyline='test'
+        )
+        departure = timezone.now() - timedelta(days=1)
+        self.stops = [
+            TripStop.objects.create(
+                trip=self.trip, city=city, sequence=sequence, price_from_start=500 * sequence,
+                planned_arrival=departure + timedelta(hours=sequence),
+                planned_departure=departure + timedelta(hours=sequence)
+            )
+            for sequence, city in enumerate([sanaa, aden])
+        ]
+
+    def review(self, overall, bus, driver):
+        booking = Booking.objects.create(
+            user=self.passenger, trip=self.trip, from_stop=self.stops[0], to_stop=self.stops[1],
+            passengers_data=[], total_fare=500, status='completed'
+        )
+        return TripReview.objects.create(
+            booking=booking, operator_snapshot=self.operator, bus_snapshot=self.bus, driver_snapshot=self.driver,
+            overall_rating=overall, bus_condition_rating=bus, driver_rating=driver
+        )
+
+    def assert_aggregates(self, operator, bus, driver):
+        self.operator.refresh_from_db()
+        self.bus.refresh_from_db()
+        self.driver.refresh_from_db()
+        self.assertEqual((self.operator.rating_sum, self.operator.total_reviews, self.operator.avg_rating), operator)
+        self.assertEqual((self.bus.rating_sum, self.bus.total_reviews, self.bus.avg_rating), bus)
+        self.assertEqual((self.driver.rating_sum, self.driver.total_reviews, self.driver.driver_rating), driver)
+
+    def test_reviews_update_running_aggregates(self):
+        self.review(5, 4, 3)
+        self.review(4, 4, 4)
+        last = self.review(4, 3, 5)
+
+        self.assert_aggregates((13, 3, Decimal('4.33')), (11, 3, Decimal('3.67')), (12, 3, Decimal('4.00')))
+        OperatorMetricsService().recompute_health_scores()
+        self.assertEqual(OperatorMetrics.objects.get(operator=self.operator).health_score, 43)
+
+        last.delete()
+        self.assert_aggregates((9, 2, Decimal('4.50')), (8, 2, Decimal('4.00')), (7, 2, Decimal('3.50')))
+
+    def test_review_cost_does_not_grow_with_history(self):
+        self.review(5, 5, 5)
+        with CaptureQueriesContext(connection) as few:
+            self.review(5, 5, 5)
+        for _ in range(20):
+            self.review(3, 3, 3)
+        with CaptureQueriesContext(connection) as many:
+            self.review(5, 5, 5)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_reconcile_repairs_drift(self):
+        self.review(5, 4, 3)
+        self.review(3, 2, 1)
+        BusOperator.objects.filter(id=self.operator.id).update(rating_sum=0, total_reviews=7, avg_rating=1)
+        Bus.objects.filter(id=self.bus.id).update(rating_sum=99)
+
+        call_command('reconcile_ratings', stdout=mock.MagicMock())
+
+        self.assert_aggregates((8, 2, Decimal('4.00')), (6, 2, Decimal('3.00')), (4, 2, Decimal('2.00')))
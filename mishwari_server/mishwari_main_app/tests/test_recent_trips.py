@@ -0,0 +1,67 @@
+"""Tests for the recent trips projection behind the homepage and the feed"""
+
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from ..models import TripSegmentInventory
+from ..services import BookingService, RecentTripsService
+from .trip_fixtures import PublicTripFixtureMixin
+
+
+class RecentTripsTest(PublicTripFixtureMixin, TestCase):
+    def recent_trips(self):
+        response = self.client.get('/api/trips/recent/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_homepage_reads_the_projection(self):
+        trips = [self.create_trip() for _ in range(3)]
+        self.create_trip(journey_date=timezone.now().date() - timedelta(days=1))
+
+        with self.assertNumQueries(2):
+            results = self.recent_trips()
+        self.assertEqual([trip['id'] for trip in results], [trip.id for trip in reversed(trips)])
+        self.assertEqual(results[0]['from_city'], {'name': 'Sanaa'})
+        self.assertEqual(results[0]['price'], 500)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.recent_trips(), results)
+
+    def test_publish_and_cancel_maintain_the_projection(self):
+        trip = self.create_trip()
+        self.recent_trips()
+
+        draft = self.create_trip(status='draft')
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'published'
+            draft.save()
+        with self.assertNumQueries(0):
+            self.assertEqual([result['id'] for result in self.recent_trips()], [draft.id, trip.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'cancelled'
+            draft.save()
+
+        self.assertEqual([result['id'] for result in self.recent_trips()], [trip.id])
+
+    def test_seat_matrix_refresh_updates_the_entry(self):
+        trip = self.create_trip()
+        self.recent_trips()
+
+        TripSegmentInventory.objects.bulk_create(TripSegmentInventory.build_for_trip(trip))
+        trip.segment_inventory.filter(segment_index=1).update(remaining=35)
+        BookingService().refresh_seat_matrix(trip.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.recent_trips()[0]['available_seats'], 35)
+
+    def test_feed_reads_the_projection(self):
+        trip = self.create_trip()
+        RecentTripsService().rebuild()
+        # Warm the process-level Site cache before counting
+        self.client.get('/feeds/latest-trips/')
+
+        with self.assertNumQueries(0):
+            feed = self.client.get('/feeds/latest-trips/').content.decode()
+        self.assertIn('رحلة من Sanaa إلى Aden', feed)
+        self.assertIn(f'/bus_list/{trip.id}', feed)
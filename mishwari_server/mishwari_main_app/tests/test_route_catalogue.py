@@ -0,0 +1,72 @@
+"""Tests for the shared Directions route catalogue"""
+
+import polyline
+from django.core.cache import cache
+from django.test import TestCase
+from ..models import CityList
+from ..services.route_catalogue_service import RouteCatalogueService
+
+
+class StubDirectionsClient:
+    """Stands in for googlemaps.Client and counts upstream calls"""
+
+    def __init__(self, summary='N1'):
+        self.summary = summary
+        self.calls = []
+
+    def directions(self, origin, destination, **kwargs):
+        self.calls.append((origin, destination, kwargs))
+        return [{
+            'summary': self.summary,
+            'overview_polyline': {'points': polyline.encode([(15.35, 44.2), (13.58, 44.02)])},
+            'legs': [{'distance': {'value': 256000, 'text': '256 km'}, 'duration': {'value': 14400, 'text': '4 hours'}}],
+            'warnings': [],
+        }]
+
+
+class RouteCatalogueServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sanaa = CityList.objects.create(city='Sanaa', waypoints=[{'lat': 15.35, 'lon': 44.2}])
+        self.taiz = CityList.objects.create(city='Taiz', waypoints=[{'lat': 13.58, 'lon': 44.02}])
+
+    def test_city_pair_shares_one_upstream_call(self):
+        client = StubDirectionsClient()
+
+        first = RouteCatalogueService(client=client).get_routes(self.sanaa, self.taiz)
+        second = RouteCatalogueService(client=StubDirectionsClient()).get_routes(self.sanaa, self.taiz)
+
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['legs'][0]['distance']['value'], 256000)
+        self.assertEqual(first[0]['decoded_polyline'][0], [15.35, 44.2])
+
+    def test_stale_entry_served_while_refreshing(self):
+        stale_client = StubDirectionsClient(summary='Old')
+        RouteCatalogueService(client=stale_client, ttl=0).get_routes(self.sanaa, self.taiz)
+
+        deferred = []
+        fresh_client = StubDirectionsClient(summary='New')
+        service = RouteCatalogueService(client=fresh_client, ttl=0, stale_ttl=3600, runner=deferred.append)
+
+        routes = service.get_routes(self.sanaa, self.taiz)
+        self.assertEqual(routes[0]['summary'], 'Old')
+        self.assertEqual(len(deferred), 1)
+
+        # Only one refresh is scheduled while one is in flight
+        service.get_routes(self.sanaa, self.taiz)
+        self.assertEqual(len(deferred), 1)
+
+        deferred[0]()
+        service.ttl = 3600
+        self.assertEqual(service.get_routes(self.sanaa, self.taiz)[0]['summary'], 'New')
+        self.assertEqual(len(fresh_client.calls), 1)
+
+    def test_moved_city_misses_cache(self):
+        client = StubDirectionsClient()
+        service = RouteCatalogueService(client=client)
+        service.get_routes(self.sanaa, self.taiz)
+
+        self.taiz.waypoints = [{'lat': 13.6, 'lon': 44.05}]
+        service.get_routes(self.sanaa, self.taiz)
+        self.assertEqual(len(client.calls), 2)
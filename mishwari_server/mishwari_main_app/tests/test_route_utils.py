@@ -0,0 +1,41 @@
+"""Tests for vectorized polyline waypoint detection"""
+
+from django.test import TestCase
+from geopy.distance import geodesic
+from ..models import CityList
+from ..utils.route_utils import (
+    PolylineProjector, detect_waypoints_from_polyline, calculate_distance_along_route, is_point_near_polyline
+)
+
+
+class PolylineProjectorTest(TestCase):
+    def setUp(self):
+        # Straight northbound road along lon 44.0, sampled every ~1.1 km
+        self.polyline_points = [(13.5 + i * 0.01, 44.0) for i in range(101)]
+
+    def test_distances_match_geodesic(self):
+        point = (14.0, 44.01)
+        expected = geodesic((13.5, 44.0), (14.0, 44.0)).kilometers
+
+        self.assertAlmostEqual(calculate_distance_along_route(self.polyline_points, point), expected, delta=expected * 0.01)
+        self.assertTrue(is_point_near_polyline(point, self.polyline_points, threshold=1.2))
+        self.assertFalse(is_point_near_polyline((14.0, 44.05), self.polyline_points, threshold=1.2))
+
+    def test_bbox_prefilter(self):
+        mask = PolylineProjector(self.polyline_points).bbox_mask([14.0, 14.0, 16.0], [44.01, 45.0, 44.0], 2.0)
+        self.assertEqual(list(mask), [True, False, False])
+
+    def test_detect_waypoints_orders_cities_along_route(self):
+        start = CityList.objects.create(city='Start', waypoints=[{'lat': 13.5, 'lon': 44.0}])
+        end = CityList.objects.create(city='End', waypoints=[{'lat': 14.5, 'lon': 44.0}])
+        CityList.objects.create(city='Far', waypoints=[{'lat': 14.0, 'lon': 44.5}])
+        CityList.objects.create(city='North', waypoints=[{'lat': 14.3, 'lon': 44.005}])
+        CityList.objects.create(city='South', waypoints=[
+            {'lat': 14.1, 'lon': 44.3},
+            {'lat': 13.8, 'lon': 43.995},
+        ])
+
+        waypoints = detect_waypoints_from_polyline(self.polyline_points, start, end)
+
+        self.assertEqual([w['city_name'] for w in waypoints], ['South', 'North'])
+        self.assertAlmostEqual(waypoints[0]['distance_from_start_km'], 33.2, delta=0.5)
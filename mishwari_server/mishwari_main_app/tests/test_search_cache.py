@@ -0,0 +1,54 @@
+"""Tests for the tagged public search response cache"""
+
+from django.db.models import F
+from django.test import TestCase
+from ..models import TripSegmentInventory
+from ..services import BookingService, SearchCacheService
+from .trip_fixtures import PublicTripFixtureMixin
+
+
+class SearchCacheTest(PublicTripFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.route = {'from': 'Sanaa', 'to': 'Aden', 'date': str(self.journey_date)}
+        self.trip = self.create_trip()
+
+    def search(self, params):
+        response = self.client.get('/api/trips/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_repeated_search_is_served_from_cache(self):
+        results = self.search(self.route)
+        self.assertEqual(len(results), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search(self.route), results)
+
+    def test_publishing_a_trip_invalidates_its_routes(self):
+        draft = self.create_trip(status='draft')
+        self.assertEqual(len(self.search(self.route)), 1)
+        self.assertEqual(len(self.search({'to': 'Aden'})), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'published'
+            draft.save()
+
+        self.assertEqual(len(self.search(self.route)), 2)
+        self.assertEqual(len(self.search({'to': 'Aden'})), 2)
+
+    def test_booking_refreshes_cached_seat_counts(self):
+        self.assertEqual(self.search(self.route)[0]['available_seats'], 40)
+
+        TripSegmentInventory.objects.bulk_create(TripSegmentInventory.build_for_trip(self.trip))
+        TripSegmentInventory.objects.filter(trip=self.trip).update(remaining=F('remaining') - 3)
+        BookingService().refresh_seat_matrix(self.trip.id)
+
+        self.assertEqual(self.search(self.route)[0]['available_seats'], 37)
+
+    def test_unrelated_routes_keep_their_entries(self):
+        self.search({'from': 'Sanaa', 'to': 'Taiz', 'date': str(self.journey_date)})
+        SearchCacheService.invalidate_tags([SearchCacheService.route_tag('Taiz', 'Aden', self.journey_date)])
+
+        with self.assertNumQueries(0):
+            self.search({'from': 'Sanaa', 'to': 'Taiz', 'date': str(self.journey_date)})
@@ -0,0 +1,150 @@
+"""Tests for cache-backed seat holds"""
+
+import time
+from unittest import mock
+import stripe
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth.models import User
+from ..services.booking_service import BookingService, InsufficientSeatsError
+from ..services.seat_hold_service import SeatHoldService
+from ..payment_gateways.stripe_payment_gateway import StripePaymentGateway
+from ..views.booking_views import handle_successful_payment
+from ..services.trip_search_service import TripSearchService
+from ..services.trip_index_service import TripIndexService
+from ..models import Trip, TripStop, Booking, CityList, BusOperator, Bus, Profile, TripSegmentInventory
+
+
+class SeatHoldServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('holduser')
+        Profile.objects.create(user=self.user, mobile_number='1234567890')
+
+        operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        bus = Bus.objects.create(operator=operator, bus_number='HOLD1', bus_type='Standard', capacity=4)
+        self.cities = [CityList.objects.create(city=name) for name in ('HoldA', 'HoldB', 'HoldC')]
+
+        self.trip = Trip.objects.create(
+            operator=operator,
+            bus=bus,
+            from_city=self.cities[0],
+            to_city=self.cities[2],
+            journey_date='2030-01-01',
+            planned_polyline='test',
+            status='published'
+        )
+        self.stops = [
+            TripStop.objects.create(
+                trip=self.trip,
+                city=city,
+                sequence=sequence,
+                planned_arrival=f'2030-01-01 {8 + sequence:02d}:00:00',
+                planned_departure=f'2030-01-01 {8 + sequence:02d}:00:00',
+                price_from_start=100 * sequence
+            )
+            for sequence, city in enumerate(self.cities)
+        ]
+        self.trip.initialize_seat_matrix(len(self.stops))
+        TripIndexService().rebuild_trip(self.trip)
+        self.service = SeatHoldService(ttl=600)
+
+    def tearDown(self):
+        cache.clear()
+
+    def passengers(self, count):
+        return [{'name': f'P{i}', 'age': 30, 'is_checked': True} for i in range(count)]
+
+    def hold(self, from_index, to_index, count, service=None):
+        return (service or self.service).place_hold(
+            self.trip, self.stops[from_index], self.stops[to_index], self.user, self.passengers(count)
+        )
+
+    def available(self, from_index, to_index):
+        return BookingService().get_available_seats_for_journey(self.trip, self.stops[from_index], self.stops[to_index])
+
+    def test_hold_counts_against_availability_without_touching_inventory(self):
+        self.hold(0, 1, 3)
+
+        self.assertEqual(self.available(0, 1), 1)
+        self.assertEqual(self.available(1, 2), 4)
+        self.assertEqual(
+            list(TripSegmentInventory.objects.filter(trip=self.trip).values_list('remaining', flat=True)),
+            [4, 4]
+        )
+        with self.assertRaises(InsufficientSeatsError):
+            self.hold(0, 2, 2)
+
+    def test_search_results_exclude_held_seats(self):
+        self.hold(0, 2, 3)
+
+        results = TripSearchService().search_route(self.cities[0], self.cities[2], date_from='2029-12-31')
+
+        self.assertEqual([result['available_seats'] for result in results], [1])
+
+    def test_expired_hold_stops_counting_and_is_reaped(self):
+        self.hold(0, 1, 1)
+        self.hold(0, 2, 3, service=SeatHoldService(ttl=0))
+
+        self.assertEqual(self.available(0, 2), 3)
+        self.assertEqual(self.service.reap_expired(), 1)
+        self.assertEqual(self.service.reap_expired(), 0)
+        self.assertEqual(self.available(0, 1), 3)
+
+    def test_release_frees_seats(self):
+        hold = self.hold(0, 2, 4)
+
+        self.assertTrue(self.service.release(hold['id']))
+        self.assertEqual(self.available(0, 2), 4)
+
+    def test_convert_books_once_and_releases_hold(self):
+        hold = self.hold(0, 2, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.service.convert(hold['id'])
+
+        self.assertTrue(booking.is_paid)
+        self.assertEqual(booking.total_fare, 400)
+        self.assertIsNone(self.service.convert(hold['id']))
+        self.assertEqual(Booking.objects.filter(trip=self.trip).count(), 1)
+        self.assertEqual(self.available(0, 2), 2)
+
+    def test_bookings_leave_held_seats_alone(self):
+        self.hold(0, 2, 3)
+
+        with self.assertRaises(InsufficientSeatsError):
+            BookingService().create_booking(self.trip.id, self.stops[0].id, self.stops[1].id, self.user, self.passengers(2))
+        BookingService().create_booking(self.trip.id, self.stops[0].id, self.stops[1].id, self.user, self.passengers(1))
+        self.assertEqual(self.available(0, 1), 0)
+
+    def test_failed_conversion_can_be_retried(self):
+        hold = self.hold(0, 2, 2, service=SeatHoldService(ttl=0))
+        BookingService().create_booking(self.trip.id, self.stops[0].id, self.stops[2].id, self.user, self.passengers(3))
+
+        with self.assertRaises(InsufficientSeatsError):
+            self.service.convert(hold['id'])
+        BookingService().cancel_booking(Booking.objects.get(trip=self.trip).id)
+        self.assertIsNotNone(self.service.convert(hold['id']))
+
+    def test_unbookable_payment_is_refunded_once(self):
+        hold = self.hold(0, 2, 2, service=SeatHoldService(ttl=0))
+        BookingService().create_booking(self.trip.id, self.stops[0].id, self.stops[2].id, self.user, self.passengers(3))
+        session = {'metadata': {'hold_id': hold['id']}, 'payment_intent': 'pi_1'}
+
+        with mock.patch.object(StripePaymentGateway, 'refund') as refund:
+            self.assertIsNone(handle_successful_payment(session))
+            handle_successful_payment(session)
+        refund.assert_called_once_with('pi_1', metadata={'hold_id': hold['id']})
+
+        with mock.patch.object(StripePaymentGateway, 'refund', side_effect=stripe.error.APIConnectionError('down')):
+            other = self.hold(1, 2, 1, service=SeatHoldService(ttl=0))
+            BookingService().create_booking(self.trip.id, self.stops[1].id, self.stops[2].id, self.user, self.passengers(1))
+            self.assertIs(handle_successful_payment({'metadata': {'hold_id': other['id']}, 'payment_intent': 'pi_2'}), False)
+
+    def test_checkout_expires_with_hold(self):
+        with mock.patch('stripe.checkout.Session.create') as create:
+            StripePaymentGateway.initiate_payment({'amount': 100, 'hold_id': 'h1', 'expires_at': time.time() + 3600})
+            StripePaymentGateway.initiate_payment({'amount': 100, 'hold_id': 'h2', 'expires_at': time.time() + 60})
+        first, second = (call.kwargs['expires_at'] for call in create.call_args_list)
+        self.assertAlmostEqual(first, time.time() + 3600, delta=5)
+        self.assertAlmostEqual(second, time.time() + StripePaymentGateway.MIN_SESSION_SECONDS, delta=5)
@@ -0,0 +1,73 @@
+"""Tests for the pre-rendered, paginated sitemaps"""
+
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import Trip
+from ..services import SitemapService
+from .trip_fixtures import PublicTripFixtureMixin
+
+
+@override_settings(SITEMAP_PAGE_SIZE=3)
+class SitemapTest(PublicTripFixtureMixin, TestCase):
+    def get(self, url, expected_status=200):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, expected_status)
+        return response.content.decode()
+
+    def trip_pages(self):
+        service = SitemapService()
+        return sorted({service.page_for(trip_id) for trip_id in Trip.objects.filter(status='published', journey_date__gte=self.journey_date).values_list('id', flat=True)})
+
+    def test_every_future_trip_is_listed_across_pages(self):
+        trips = [self.create_trip() for _ in range(7)]
+        draft = self.create_trip(status='draft')
+        departed = self.create_trip(journey_date=timezone.now().date() - timedelta(days=1))
+        SitemapService().generate()
+
+        index = self.get('/sitemap.xml')
+        pages = self.trip_pages()
+        self.assertGreater(len(pages), 1)
+        for page in pages:
+            self.assertIn(f'https://yallabus.app/sitemap-trips-{page}.xml', index)
+        self.assertIn('https://yallabus.app/sitemap-cities-1.xml', index)
+
+        listed = ''.join(self.get(f'/sitemap-trips-{page}.xml') for page in pages)
+        for trip in trips:
+            self.assertIn(f'<loc>https://yallabus.app/bus_list/{trip.id}</loc>', listed)
+        self.assertNotIn(f'/bus_list/{draft.id}<', listed)
+        self.assertNotIn(f'/bus_list/{departed.id}<', listed)
+
+    def test_stored_pages_are_served_without_queries(self):
+        trip = self.create_trip()
+        SitemapService().generate()
+        page = SitemapService().page_for(trip.id)
+
+        with self.assertNumQueries(0):
+            self.get('/sitemap.xml')
+            self.get(f'/sitemap-trips-{page}.xml')
+
+    def test_trip_changes_rerender_their_page(self):
+        trip = self.create_trip()
+        SitemapService().generate()
+        page = SitemapService().page_for(trip.id)
+        self.assertIn(f'/bus_list/{trip.id}<', self.get(f'/sitemap-trips-{page}.xml'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trip.status = 'cancelled'
+            trip.save()
+        self.get(f'/sitemap-trips-{page}.xml', expected_status=404)
+        self.assertNotIn(f'sitemap-trips-{page}.xml', self.get('/sitemap.xml'))
+
+        published = self.create_trip()
+        page = SitemapService().page_for(published.id)
+        self.assertIn(f'sitemap-trips-{page}.xml', self.get('/sitemap.xml'))
+        self.assertIn(f'/bus_list/{published.id}<', self.get(f'/sitemap-trips-{page}.xml'))
+
+    def test_evicted_index_is_recovered_without_rendering(self):
+        trip = self.create_trip()
+        cache.clear()
+
+        self.assertIn(f'sitemap-trips-{SitemapService().page_for(trip.id)}.xml', self.get('/sitemap.xml'))
+        self.get('/sitemap-trips-999.xml', expected_status=404)
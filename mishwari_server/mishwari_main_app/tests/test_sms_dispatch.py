@@ -0,0 +1,155 @@
+"""Tests for background OTP delivery, provider failover and circuit breakers"""
+
+import os
+import time
+from unittest import mock
+from urllib.parse import parse_qs
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from ..services.sms_dispatch_service import SMSDispatchService
+from ..utils.sms_providers import SMSProvider
+from .stub_http import StubServer
+
+
+def provider_responder(statuses, delays=None):
+    """Answer each fake provider, keyed by name, with its status after an optional delay"""
+    def respond(method, path, headers, body):
+        name = 'infobip' if path.startswith('/sms/') else 'twilio' if path.startswith('/2010-04-01/') else 'whatsapp'
+        time.sleep((delays or {}).get(name, 0))
+        return statuses.get(name, 200), {'Content-Type': 'application/json'}, b'{"sid": "SM1", "messages": []}'
+    return respond
+
+
+@override_settings(SMS_BREAKER_FAILURE_THRESHOLD=2, SMS_BREAKER_RESET_TIMEOUT=60, SMS_PROVIDER_TIMEOUT=(0.5, 0.3))
+class SMSDispatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.reset()
+        environ = {
+            'INFOBIP_API_KEY': 'key',
+            'INFOBIP_BASE_URL': self.server.url,
+            'TWILIO_ACCOUNT_SID': 'AC1',
+            'TWILIO_AUTH_TOKEN': 'token',
+            'TWILIO_PHONE_NUMBER': '+15550000000',
+            'TWILIO_API_URL': self.server.url,
+            'WHATSAPP_SECRET_KEY': '',
+        }
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def providers_called(self):
+        return ['infobip' if path.startswith('/sms/') else 'twilio' for _, path, _, _ in self.server.received]
+
+    def test_fails_over_in_order(self):
+        self.server.respond_with(provider_responder({'infobip': 500, 'twilio': 201}))
+        self.assertEqual(SMSDispatchService().deliver('967770000001', '123456'), 'twilio')
+
+        self.assertEqual(self.providers_called(), ['infobip', 'twilio'])
+        form = parse_qs(self.server.received[1][3].decode())
+        self.assertEqual((form['To'], form['Body']), (['+967770000001'], ['Your OTP code is 123456']))
+
+    def test_slow_provider_times_out_and_fails_over(self):
+        self.server.respond_with(provider_responder({}, delays={'infobip': 1}))
+        self.assertEqual(SMSDispatchService().deliver('967770000001', '123456'), 'twilio')
+
+    def test_open_breaker_skips_provider_until_probe(self):
+        self.server.respond_with(provider_responder({'infobip': 503}))
+        service = SMSDispatchService()
+        for _ in range(2):
+            service.deliver('967770000001', '123456')
+        self.server.received.clear()
+
+        self.assertEqual(service.deliver('967770000001', '123456'), 'twilio')
+        self.assertEqual(self.providers_called(), ['twilio'])
+
+        # After the reset timeout one probe goes through and, on success, closes the breaker
+        self.server.reset()
+        self.server.status_code = 201
+        with mock.patch('mishwari_main_app.utils.circuit_breaker.time.time', return_value=time.time() + 61):
+            self.assertEqual(service.deliver('967770000001', '123456'), 'infobip')
+        self.assertFalse(service.breaker('infobip').is_open)
+
+    def test_rejected_recipients_do_not_open_breakers(self):
+        self.server.respond_with(provider_responder({'infobip': 400, 'twilio': 400}))
+        service = SMSDispatchService()
+        for _ in range(5):
+            self.assertIsNone(service.deliver('000', '123456'))
+
+        self.assertFalse(service.breaker('infobip').is_open)
+        self.assertFalse(service.breaker('twilio').is_open)
+        self.server.received.clear()
+        self.server.respond_with(provider_responder({}))
+        self.assertEqual(service.deliver('967770000001', '123456'), 'infobip')
+
+    def test_quota_errors_still_count_against_provider(self):
+        self.server.respond_with(provider_responder({'infobip': 429}))
+        service = SMSDispatchService()
+        for _ in range(2):
+            service.deliver('967770000001', '123456')
+        self.assertTrue(service.breaker('infobip').is_open)
+
+    def test_failed_probe_reopens(self):
+        self.server.respond_with(provider_responder({'infobip': 503}))
+        service = SMSDispatchService()
+        for _ in range(2):
+            service.deliver('967770000001', '123456')
+
+        later = time.time() + 61
+        with mock.patch('mishwari_main_app.utils.circuit_breaker.time.time', return_value=later):
+            service.deliver('967770000001', '123456')
+            self.assertTrue(service.breaker('infobip').is_open)
+
+    def test_firebase_breaker_counts_outages_only(self):
+        service = SMSDispatchService()
+        rejected = {'success': False, 'error': 'INVALID_RECAPTCHA', 'server_error': False}
+        outage = {'success': False, 'error': 'timeout', 'server_error': True}
+        with mock.patch('mishwari_main_app.services.sms_dispatch_service.GoogleIdentityProxyService.send_otp') as send:
+            send.return_value = rejected
+            for _ in range(3):
+                service.send_firebase_otp('967770000001', 'token')
+            send.return_value = outage
+            for _ in range(3):
+                service.send_firebase_otp('967770000001', 'token')
+        self.assertEqual(send.call_count, 5)
+
+    @override_settings(SMS_PROVIDER_TIMEOUT=(0.5, 3))
+    def test_request_otp_returns_before_delivery(self):
+        self.server.respond_with(provider_responder({}, delays={'infobip': 1}))
+        started = time.monotonic()
+        response = APIClient().post(
+            '/api/mobile-login/request-otp/', {'mobile_number': '967770000001', 'use_firebase': False}, format='json'
+        )
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual((response.status_code, response.data['method']), (200, 'sms'))
+
+        deadline = time.monotonic() + 5
+        while not self.server.received and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.providers_called(), ['infobip'])
+
+
+class SMSProviderInterfaceTest(TestCase):
+    def test_incomplete_provider_fails_on_creation(self):
+        class TemplateOnlyProvider(SMSProvider):
+            name = 'template-only'
+
+            def configured(self):
+                return True
+
+        with self.assertRaises(TypeError):
+            TemplateOnlyProvider()
@@ -0,0 +1,55 @@
+"""Tests for bulk trip materialization from a cached route"""
+
+from datetime import date
+import polyline
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from ..models import Trip, TripSegmentPair, CityList, BusOperator, OperatorMetrics, Bus
+from ..utils.trip_creation_utils import create_trip_from_cached_route
+
+
+class CreateTripFromCachedRouteTest(TestCase):
+    def setUp(self):
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        OperatorMetrics.objects.create(operator=self.operator)
+        self.start = CityList.objects.create(city='Start', waypoints=[{'lat': 13.0, 'lon': 44.0}])
+        self.end = CityList.objects.create(city='End', waypoints=[{'lat': 14.0, 'lon': 44.0}])
+        self.stops = [
+            CityList.objects.create(city=f'Stop{i}', waypoints=[{'lat': 13.0 + i * 0.2, 'lon': 44.0}])
+            for i in range(1, 5)
+        ]
+        self.route = {
+            'summary': 'N1',
+            'overview_polyline': {'points': polyline.encode([(13.0 + i * 0.01, 44.0) for i in range(101)])},
+            'legs': [{'distance': {'value': 111000}, 'duration': {'value': 6660}}],
+        }
+        self.cached_data = {
+            'from_city': {'id': self.start.id, 'name': 'Start'},
+            'to_city': {'id': self.end.id, 'name': 'End'},
+        }
+
+    def create_trip(self, capacity, waypoint_ids):
+        bus = Bus.objects.create(operator=self.operator, bus_number=f'BUS{capacity}', bus_type='Standard', capacity=capacity)
+        trip_data = {'journey_date': date(2024, 1, 1), 'planned_departure': '2024-01-01 08:00:00', 'total_price': 1000}
+
+        with CaptureQueriesContext(connection) as context:
+            trip = create_trip_from_cached_route(self.operator, bus, None, self.cached_data, self.route, trip_data, waypoint_ids)
+        return trip, len(context.captured_queries)
+
+    def test_queries_independent_of_seats_and_stops(self):
+        _, small_count = self.create_trip(2, [])
+        trip, large_count = self.create_trip(50, [stop.id for stop in reversed(self.stops)])
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(trip.seats.count(), 50)
+        self.assertEqual(list(trip.stops.values_list('city__city', flat=True)), ['Start', 'Stop1', 'Stop2', 'Stop3', 'Stop4', 'End'])
+
+    def test_inventory_and_index_are_consistent(self):
+        trip, _ = self.create_trip(40, [self.stops[1].id])
+        trip = Trip.objects.get(id=trip.id)
+
+        self.assertEqual(trip.seat_matrix, {'0-1': 40, '1-2': 40})
+        self.assertEqual(trip.seats.first().available_segments, ['0-1', '1-2'])
+        self.assertEqual(TripSegmentPair.objects.filter(trip=trip).count(), 3)
+        self.assertEqual(trip.stops.get(sequence=2).price_from_start, 1000)
@@ -0,0 +1,75 @@
+"""Tests for the city-pair trip search index"""
+
+from django.test import TestCase
+from ..services.trip_index_service import TripIndexService
+from ..services.trip_service import TripService
+from ..models import Trip, TripStop, TripSegmentPair, CityList, BusOperator, Bus
+
+
+class TripIndexServiceTest(TestCase):
+    def setUp(self):
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='TEST123', bus_type='Standard', capacity=40)
+
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.taiz = CityList.objects.create(city='Taiz')
+        self.aden = CityList.objects.create(city='Aden')
+
+        self.trip = Trip.objects.create(
+            operator=self.operator,
+            bus=self.bus,
+            from_city=self.sanaa,
+            to_city=self.aden,
+            journey_date='2024-01-01',
+            planned_polyline='test',
+            status='draft',
+            seat_matrix={'0-1': 40, '1-2': 40}
+        )
+
+        for sequence, (city, price) in enumerate([(self.sanaa, 0), (self.taiz, 300), (self.aden, 500)]):
+            TripStop.objects.create(
+                trip=self.trip,
+                city=city,
+                sequence=sequence,
+                planned_arrival=f'2024-01-01 {8 + sequence:02d}:00:00',
+                planned_departure=f'2024-01-01 {8 + sequence:02d}:05:00',
+                price_from_start=price
+            )
+
+    def test_stops_build_forward_pairs(self):
+        pairs = TripSegmentPair.objects.filter(trip=self.trip)
+        self.assertEqual(pairs.count(), 3)
+
+        pair = pairs.get(from_city=self.taiz, to_city=self.aden)
+        self.assertEqual(pair.fare, 200)
+        self.assertFalse(pairs.filter(from_city=self.aden).exists())
+
+    def test_search_only_matches_published_trips(self):
+        service = TripIndexService()
+        self.assertEqual(service.search(self.sanaa, self.aden, journey_date='2024-01-01').count(), 0)
+
+        self.trip.status = 'published'
+        self.trip.save()
+
+        with self.assertNumQueries(1):
+            pairs = list(service.search(self.sanaa, self.aden, journey_date='2024-01-01'))
+            self.assertEqual(pairs[0].trip.bus.bus_number, 'TEST123')
+            self.assertEqual(pairs[0].to_stop.sequence, 2)
+
+    def test_cancelled_trip_drops_out_of_search(self):
+        self.trip.status = 'published'
+        self.trip.save()
+        self.trip.status = 'cancelled'
+        self.trip.save()
+
+        results = TripService().search_trips('Sanaa', 'Taiz', '2024-01-01')
+        self.assertEqual(results, [])
+
+    def test_search_trips_uses_index(self):
+        self.trip.status = 'published'
+        self.trip.save()
+
+        results = TripService().search_trips('Sanaa', 'Taiz', '2024-01-01')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['fare'], 300)
+        self.assertEqual(results[0]['available_seats'], 40)
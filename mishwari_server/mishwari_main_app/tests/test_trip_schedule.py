@@ -0,0 +1,103 @@
+"""Tests for recurring trip schedule generation"""
+
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from ..models import Trip, TripStop, Seat, TripSegmentPair, TripSchedule, CityList, BusOperator, Bus, Driver, Profile, OutboxMessage, OperatorMetrics
+from ..services.schedule_service import TripScheduleService
+from ..utils.publication_utils import trip_url
+
+
+class TripScheduleServiceTest(TestCase):
+    def setUp(self):
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com', is_verified=True)
+        self.bus = Bus.objects.create(operator=self.operator, bus_number='TEST123', bus_type='Standard', capacity=10, is_verified=True)
+
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.taiz = CityList.objects.create(city='Taiz')
+        self.aden = CityList.objects.create(city='Aden')
+
+        self.schedule = TripSchedule.objects.create(
+            operator=self.operator,
+            bus=self.bus,
+            from_city=self.sanaa,
+            to_city=self.aden,
+            stop_template=[
+                {'city': self.sanaa.id, 'offset_minutes': 0, 'price_from_start': 0},
+                {'city': self.taiz.id, 'offset_minutes': 240, 'price_from_start': 300},
+                {'city': self.aden.id, 'offset_minutes': 420, 'price_from_start': 500},
+            ],
+            weekdays=list(range(7)),
+            departure_times=['08:00', '20:00'],
+            horizon_days=7
+        )
+        OperatorMetrics.objects.create(operator=self.operator)
+        self.start_date = timezone.localdate() + timedelta(days=1)
+
+    def test_generates_trips_in_constant_queries(self):
+        service = TripScheduleService()
+
+        with self.assertNumQueries(9):
+            created = service.generate(self.schedule, start_date=self.start_date)
+
+        self.assertEqual(len(created), 14)
+        self.assertEqual(TripStop.objects.filter(trip__schedule=self.schedule).count(), 42)
+        self.assertEqual(Seat.objects.filter(trip__schedule=self.schedule).count(), 140)
+        self.assertEqual(TripSegmentPair.objects.filter(trip__schedule=self.schedule).count(), 42)
+
+        trip = Trip.objects.get(id=created[0].id)
+        self.assertEqual(trip.status, 'draft')
+        self.assertEqual(trip.seat_matrix, {'0-1': 10, '1-2': 10})
+        taiz_stop = trip.stops.get(sequence=1)
+        self.assertEqual(taiz_stop.planned_arrival, trip.planned_departure + timedelta(hours=4))
+
+    def test_rerun_is_idempotent(self):
+        service = TripScheduleService()
+        service.generate(self.schedule, start_date=self.start_date)
+
+        self.schedule.horizon_days = 8
+        created = service.generate(self.schedule, start_date=self.start_date)
+
+        self.assertEqual(len(created), 2)
+        self.assertEqual(Trip.objects.filter(schedule=self.schedule).count(), 16)
+
+    def test_published_batch_notifies_once(self):
+        user = User.objects.create_user('driver')
+        profile = Profile.objects.create(user=user, mobile_number='770000000', full_name='Driver')
+        self.schedule.driver = Driver.objects.create(user=user, profile=profile, operator=self.operator)
+        self.schedule.auto_publish = True
+        self.schedule.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = TripScheduleService().generate(self.schedule, start_date=self.start_date)
+
+        indexnow = OutboxMessage.objects.get(channel='indexnow')
+        self.assertEqual(indexnow.payload['urls'], [trip_url(trip.id) for trip in created])
+        self.assertEqual(OutboxMessage.objects.filter(channel='feed_ping').count(), 1)
+        self.assertEqual(OutboxMessage.objects.filter(channel='google_indexing').count(), len(created))
+        self.assertEqual(TripSegmentPair.objects.filter(status='published').count(), 42)
+
+    def test_management_command(self):
+        call_command('generate_scheduled_trips', days=2, stdout=mock.MagicMock())
+        self.assertGreaterEqual(Trip.objects.filter(schedule=self.schedule).count(), 2)
+
+    def test_create_from_trip_clamps_horizon(self):
+        service = TripScheduleService()
+        trip = service.generate(self.schedule, start_date=self.start_date)[0]
+
+        schedule = service.create_from_trip(trip, weekdays=[0], departure_times=['09:00'], horizon_days=3650)
+        self.assertEqual(schedule.horizon_days, service.MAX_HORIZON_DAYS)
+
+    def test_generated_trips_are_counted_in_operator_metrics(self):
+        created = TripScheduleService().generate(self.schedule, start_date=self.start_date)
+
+        cancelled = Trip.objects.get(id=created[0].id)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        metrics = OperatorMetrics.objects.get(operator=self.operator)
+        self.assertEqual((metrics.total_trips, metrics.cancelled_trips), (14, 1))
+        self.assertAlmostEqual(metrics.cancellation_rate, 100 / 14, places=2)
@@ -0,0 +1,99 @@
+"""Query-count regression tests for public trip search"""
+
+from datetime import datetime, time, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Trip, TripStop, CityList, BusOperator, Bus, Driver, Profile
+
+
+# Counts the uncached search path; the response cache is covered in test_search_cache
+@override_settings(SEARCH_CACHE_TTL=0)
+class TripSearchQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+
+        self.sanaa = CityList.objects.create(city='Sanaa', waypoints=[{'lat': 15.35, 'lon': 44.20}])
+        self.taiz = CityList.objects.create(city='Taiz', waypoints=[{'lat': 13.58, 'lon': 44.02}])
+        self.aden = CityList.objects.create(city='Aden', waypoints=[{'lat': 12.79, 'lon': 45.03}])
+
+        self.journey_date = timezone.now().date() + timedelta(days=1)
+        self.trip_count = 0
+
+    def create_trips(self, count):
+        for _ in range(count):
+            self.trip_count += 1
+            user = User.objects.create_user(f'driver{self.trip_count}')
+            profile = Profile.objects.create(user=user, mobile_number=f'77000000{self.trip_count}', full_name='Driver')
+            driver = Driver.objects.create(user=user, profile=profile, operator=self.operator)
+            bus = Bus.objects.create(operator=self.operator, bus_number=f'BUS{self.trip_count}', bus_type='Standard', capacity=40)
+
+            trip = Trip.objects.create(
+                operator=self.operator,
+                bus=bus,
+                driver=driver,
+                from_city=self.sanaa,
+                to_city=self.aden,
+                journey_date=self.journey_date,
+                planned_polyline='test',
+                status='published',
+                seat_matrix={'0-1': 40, '1-2': 40}
+            )
+            departure = timezone.make_aware(datetime.combine(self.journey_date, time(8)))
+            for sequence, (city, price) in enumerate([(self.sanaa, 0), (self.taiz, 300), (self.aden, 500)]):
+                TripStop.objects.create(
+                    trip=trip,
+                    city=city,
+                    sequence=sequence,
+                    planned_arrival=departure + timedelta(hours=sequence),
+                    planned_departure=departure + timedelta(hours=sequence),
+                    price_from_start=price
+                )
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/trips/', params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data
+
+    def assert_constant_queries(self, params, expected_results):
+        # Warm process-level lookups (e.g. the nearest-city grid) before counting
+        self.count_queries(params)
+
+        self.create_trips(1)
+        single_count, _ = self.count_queries(params)
+
+        self.create_trips(4)
+        many_count, results = self.count_queries(params)
+
+        self.assertEqual(len(results), expected_results)
+        self.assertEqual(single_count, many_count)
+        return results
+
+    def test_route_search(self):
+        results = self.assert_constant_queries({'from': 'Sanaa', 'to': 'Taiz', 'date': str(self.journey_date)}, 5)
+        self.assertEqual(results[0]['fare'], 300)
+        self.assertEqual(results[0]['driver']['d_name'], 'Driver')
+
+    def test_destination_only_search(self):
+        results = self.assert_constant_queries({'to': 'Aden'}, 5)
+        self.assertEqual(results[0]['from_city'], 'Sanaa')
+
+    def test_origin_only_search(self):
+        results = self.assert_constant_queries({'from': 'Taiz'}, 5)
+        self.assertEqual(results[0]['to_city'], 'Aden')
+        self.assertEqual(results[0]['fare'], 200)
+
+    def test_gps_search(self):
+        results = self.assert_constant_queries({'to': 'Aden', 'user_lat': 13.6, 'user_lon': 44.0}, 5)
+        self.assertEqual(results[0]['from_city'], 'Taiz')
+        self.assertIn('user_distance_km', results[0])
+
+    def test_gps_search_rejects_out_of_range_coordinates(self):
+        for lat, lon in [(1e6, 44.0), (91, 44.0), (13.6, -181), ('nan', 44.0)]:
+            response = self.client.get('/api/trips/', {'to': 'Aden', 'user_lat': lat, 'user_lon': lon})
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,102 @@
+"""Query-count and pagination tests for trip list endpoints"""
+
+from datetime import datetime, time, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Trip, TripStop, CityList, BusOperator, Bus, Driver, Profile
+
+
+class TripListQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.admin = User.objects.create_user('operator_admin')
+        Profile.objects.create(user=self.admin, mobile_number='770000001', role='operator_admin')
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com', platform_user=self.admin)
+
+        self.driver_user = User.objects.create_user('driver')
+        driver_profile = Profile.objects.create(user=self.driver_user, mobile_number='770000002', full_name='Driver', role='invited_driver')
+        self.driver = Driver.objects.create(user=self.driver_user, profile=driver_profile, operator=self.operator)
+
+        self.sanaa = CityList.objects.create(city='Sanaa')
+        self.taiz = CityList.objects.create(city='Taiz')
+        self.aden = CityList.objects.create(city='Aden')
+
+        self.journey_date = timezone.now().date() + timedelta(days=1)
+        self.trip_count = 0
+
+    def create_trips(self, count):
+        for _ in range(count):
+            self.trip_count += 1
+            bus = Bus.objects.create(operator=self.operator, bus_number=f'BUS{self.trip_count}', bus_type='Standard', capacity=40)
+            self.driver.buses.add(bus)
+
+            trip = Trip.objects.create(
+                operator=self.operator,
+                bus=bus,
+                driver=self.driver,
+                actual_driver=self.driver if self.trip_count % 2 else None,
+                from_city=self.sanaa,
+                to_city=self.aden,
+                journey_date=self.journey_date,
+                planned_polyline='test',
+                seat_matrix={'0-1': 40, '1-2': 40}
+            )
+            departure = timezone.make_aware(datetime.combine(self.journey_date, time(8)))
+            # Created out of order: the serializer must still list stops by sequence
+            for sequence, (city, price) in reversed(list(enumerate([(self.sanaa, 0), (self.taiz, 300), (self.aden, 500)]))):
+                TripStop.objects.create(
+                    trip=trip,
+                    city=city,
+                    sequence=sequence,
+                    planned_arrival=departure + timedelta(hours=sequence),
+                    planned_departure=departure + timedelta(hours=sequence),
+                    price_from_start=price
+                )
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data['results']
+
+    def assert_constant_queries(self, user, url):
+        self.create_trips(1)
+        single_count, _ = self.count_queries(user, url)
+
+        self.create_trips(4)
+        many_count, results = self.count_queries(user, url)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(single_count, many_count)
+        return results
+
+    def test_operator_trip_list(self):
+        results = self.assert_constant_queries(self.admin, '/api/operator/trips/')
+
+        trip = results[0]
+        self.assertEqual([stop['city']['name'] for stop in trip['stops']], ['Sanaa', 'Taiz', 'Aden'])
+        self.assertEqual(trip['price'], 500)
+        self.assertEqual(trip['departure_time'], trip['stops'][0]['planned_departure'])
+        self.assertEqual(trip['driver']['driver_name'], 'Driver')
+        self.assertEqual(len(trip['driver']['buses']), 5)
+
+    def test_driver_trip_list(self):
+        results = self.assert_constant_queries(self.driver_user, '/api/driver-trips/')
+        self.assertEqual(results[0]['arrival_time'], results[0]['stops'][-1]['planned_arrival'])
+
+    def test_operator_trip_list_is_cursor_paginated(self):
+        self.create_trips(5)
+        self.client.force_authenticate(self.admin)
+
+        first = self.client.get('/api/operator/trips/', {'page_size': 3}).data
+        second = self.client.get(first['next']).data
+
+        ids = [trip['id'] for trip in first['results'] + second['results']]
+        self.assertEqual(ids, sorted(Trip.objects.values_list('id', flat=True), reverse=True))
+        self.assertIsNone(second['next'])
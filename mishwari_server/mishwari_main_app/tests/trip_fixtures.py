@@ -0,0 +1,63 @@
+"""Shared fixtures for tests of cached public trip listings"""
+
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Trip, TripStop, CityList, BusOperator, Bus
+
+
+class PublicTripFixtureMixin:
+    """
+    Cache-isolated operator, cities and a trip factory for TestCase subclasses
+
+    Every city in CITIES is created as an attribute named after it in lower
+    case. create_trip() runs on-commit hooks, so the caches and projections
+    fed by trip signals are up to date when it returns.
+    """
+
+    CITIES = ('Sanaa', 'Taiz', 'Aden')
+    CAPACITY = 40
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.operator = BusOperator.objects.create(name='Test Operator', contact_info='test@test.com')
+        for name in self.CITIES:
+            setattr(self, name.lower(), CityList.objects.create(city=name))
+        self.journey_date = timezone.now().date() + timedelta(days=1)
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def create_trip(self, cities=None, status='published', journey_date=None):
+        """Create a trip with a bus and one stop per city, departing at 08:00"""
+        cities = cities or [self.sanaa, self.taiz, self.aden]
+        journey_date = journey_date or self.journey_date
+        bus = Bus.objects.create(
+            operator=self.operator, bus_number=f'BUS{Trip.objects.count()}', bus_type='Standard', capacity=self.CAPACITY
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            trip = Trip.objects.create(
+                operator=self.operator,
+                bus=bus,
+                from_city=cities[0],
+                to_city=cities[-1],
+                journey_date=journey_date,
+                planned_polyline='test',
+                status=status,
+                seat_matrix={f'{index}-{index + 1}': self.CAPACITY for index in range(len(cities) - 1)}
+            )
+            departure = timezone.make_aware(datetime.combine(journey_date, time(8)))
+            for sequence, city in enumerate(cities):
+                TripStop.objects.create(
+                    trip=trip,
+                    city=city,
+                    sequence=sequence,
+                    planned_arrival=departure + timedelta(hours=sequence),
+                    planned_departure=departure + timedelta(hours=sequence),
+                    price_from_start=250 * sequence
+                )
+        return trip
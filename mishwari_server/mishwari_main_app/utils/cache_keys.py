@@ -36,5 +36,89 @@ class CacheKeys:
         return f'transaction:token:{user_id}'
     
     @staticmethod
-    def otp_attempts(mobile_number):
-        return f'otp:attempts:{mobile_number}'
+    def otp_block(mobile_number):
+        return f'otp:block:{mobile_number}'
+    
+    @staticmethod
+    def city_locator_version():
+        return 'city_locator:version'
+    
+    @staticmethod
+    def route_catalogue(from_city_id, to_city_id, alternatives=True):
+        return f'route_catalogue:{from_city_id}:{to_city_id}:{int(bool(alternatives))}'
+    
+    @staticmethod
+    def seat_hold(hold_id):
+        return f'seat_hold:{hold_id}'
+    
+    @staticmethod
+    def seat_hold_trip(trip_id):
+        return f'seat_hold:trip:{trip_id}'
+    
+    @staticmethod
+    def seat_hold_lock(trip_id):
+        return f'seat_hold:lock:{trip_id}'
+    
+    @staticmethod
+    def seat_hold_conversion(hold_id):
+        return f'seat_hold:converted:{hold_id}'
+    
+    @staticmethod
+    def city_picker_version(journey_date):
+        return f'city_pickers:version:{journey_date}'
+    
+    @staticmethod
+    def departure_cities(journey_date, version):
+        return f'city_pickers:departure:{journey_date}:{version}'
+    
+    @staticmethod
+    def destination_cities(from_city_id, journey_date, version):
+        return f'city_pickers:destination:{from_city_id}:{journey_date}:{version}'
+    
+    @staticmethod
+    def search_tag_version(tag_digest):
+        return f'search:tag:{tag_digest}'
+    
+    @staticmethod
+    def search_response(namespace, digest):
+        return f'search:{namespace}:{digest}'
+    
+    @staticmethod
+    def recent_trips_index():
+        return 'recent_trips:index'
+    
+    @staticmethod
+    def recent_trip(trip_id):
+        return f'recent_trips:trip:{trip_id}'
+    
+    @staticmethod
+    def recent_trips_lock():
+        return 'recent_trips:lock'
+    
+    @staticmethod
+    def sitemap_index(section):
+        return f'sitemap:index:{section}'
+    
+    @staticmethod
+    def sitemap_page(section, page):
+        return f'sitemap:page:{section}:{page}'
+    
+    @staticmethod
+    def sitemap_lock(section):
+        return f'sitemap:lock:{section}'
+    
+    @staticmethod
+    def indexing_quota(service, day):
+        return f'indexing:quota:{service}:{day}'
+    
+    @staticmethod
+    def rate_limit(scope, identifier, bucket):
+        return f'rate_limit:{scope}:{identifier}:{bucket}'
+    
+    @staticmethod
+    def circuit_breaker(name, part):
+        return f'circuit_breaker:{name}:{part}'
+    
+    @staticmethod
+    def wallet_balance(user_id):
+        return f'wallet:balance:{user_id}'
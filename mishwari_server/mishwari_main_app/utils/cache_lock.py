@@ -0,0 +1,30 @@
+"""Short-lived mutual exclusion through the shared cache"""
+
+import time
+import uuid
+from contextlib import contextmanager
+from django.core.cache import cache
+
+
+@contextmanager
+def cache_lock(key, timeout=5, attempts=20, wait=0.05):
+    """
+    Hold `key` in the cache for the duration of the block
+
+    Yields True once acquired, or False after `attempts` tries so callers
+    decide how to degrade. The lock expires after `timeout` seconds, so a
+    crashed holder never blocks others for long.
+    """
+    token = uuid.uuid4().hex
+    for _ in range(attempts):
+        if cache.add(key, token, timeout=timeout):
+            break
+        time.sleep(wait)
+    else:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
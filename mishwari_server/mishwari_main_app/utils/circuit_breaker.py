@@ -0,0 +1,53 @@
+"""Circuit breaker with its state in the shared cache"""
+
+import time
+from django.core.cache import cache
+from .cache_keys import CacheKeys
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency after `failure_threshold` failures in a row
+
+    While open, allow() is False for `reset_timeout` seconds; then one
+    caller per `reset_timeout` is let through as a probe. A success closes
+    the breaker, a failed probe opens it again. State lives in the cache,
+    so every worker process sees the same breaker.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def allow(self):
+        opened_until = cache.get(self._key('open'))
+        if opened_until is None:
+            return True
+        if time.time() < opened_until:
+            return False
+        return cache.add(self._key('probe'), 1, timeout=self.reset_timeout)
+
+    @property
+    def is_open(self):
+        opened_until = cache.get(self._key('open'))
+        return opened_until is not None and time.time() < opened_until
+
+    def record_success(self):
+        cache.delete_many([self._key('failures'), self._key('open'), self._key('probe')])
+
+    def record_failure(self):
+        failures_key = self._key('failures')
+        cache.add(failures_key, 0, timeout=self.reset_timeout)
+        try:
+            failures = cache.incr(failures_key)
+        except ValueError:
+            cache.set(failures_key, 1, timeout=self.reset_timeout)
+            failures = 1
+        # A failed probe reopens at once
+        if failures >= self.failure_threshold or cache.get(self._key('open')) is not None:
+            cache.set(self._key('open'), time.time() + self.reset_timeout, timeout=None)
+            cache.delete_many([failures_key, self._key('probe')])
+
+    def _key(self, part):
+        return CacheKeys.circuit_breaker(self.name, part)
@@ -0,0 +1,209 @@
+"""Search-engine indexing client - pooled HTTP, cached credentials, batches and daily quotas"""
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime, time, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .cache_keys import CacheKeys
+
+logger = logging.getLogger(__name__)
+
+# Result for URLs held back by the daily quota; retry after quota_resets_at()
+DEFERRED = 'deferred'
+
+
+class IndexingClient:
+    """
+    Submits URLs to the Google Indexing API and IndexNow
+
+    Every client in the process shares one pooled requests.Session and one
+    set of Google credentials, refreshed only once the token expires.
+    Google notifications go through the batch endpoint (100 per request),
+    IndexNow takes up to 10,000 URLs per request, and both count against a
+    daily quota kept in the shared cache. URLs over the quota are not sent
+    and come back as DEFERRED.
+    """
+
+    GOOGLE_BATCH_SIZE = 100
+    INDEXNOW_MAX_URLS = 10000
+    DEFAULT_GOOGLE_DAILY_QUOTA = 200
+    DEFAULT_INDEXNOW_DAILY_QUOTA = 10000
+    TIMEOUT = 10
+    SCOPES = ['https://www.googleapis.com/auth/indexing']
+    PUBLISH_PATH = '/v3/urlNotifications:publish'
+
+    _session = None
+    _session_lock = threading.Lock()
+    _credentials = None
+    _credentials_file = None
+    _credentials_lock = threading.Lock()
+
+    def __init__(self):
+        self.google_quota = getattr(settings, 'GOOGLE_INDEXING_DAILY_QUOTA', self.DEFAULT_GOOGLE_DAILY_QUOTA)
+        self.indexnow_quota = getattr(settings, 'INDEXNOW_DAILY_QUOTA', self.DEFAULT_INDEXNOW_DAILY_QUOTA)
+
+    @classmethod
+    def session(cls):
+        """The process-wide session; keeps TLS connections to each host alive"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._session = session
+        return cls._session
+
+    def google_publish(self, notifications):
+        """
+        Notify Google about [(url, action)], action 'URL_UPDATED' or 'URL_DELETED'
+
+        Returns one result per notification: True, False, DEFERRED, or
+        None when Google indexing is not configured here.
+        """
+        if not notifications:
+            return []
+        try:
+            token = self._google_token()
+        except Exception as e:
+            logger.error(f"[INDEXING] Could not obtain a Google token: {e}")
+            return [False] * len(notifications)
+        if token is None:
+            return [None] * len(notifications)
+
+        granted = self._reserve('google', len(notifications), self.google_quota)
+        results = [DEFERRED] * len(notifications)
+        for start in range(0, granted, self.GOOGLE_BATCH_SIZE):
+            chunk = notifications[start:min(start + self.GOOGLE_BATCH_SIZE, granted)]
+            results[start:start + len(chunk)] = self._google_batch(chunk, token)
+        if granted < len(notifications):
+            logger.warning(f"[INDEXING] Daily Google quota reached, deferred {len(notifications) - granted} URL(s)")
+        return results
+
+    def indexnow_submit(self, urls):
+        """Submit URLs to IndexNow; returns True, False, DEFERRED, or None when not configured"""
+        key = os.getenv('INDEXNOW_KEY')
+        if not key:
+            logger.warning("[INDEXNOW] INDEXNOW_KEY not set, skipping")
+            return None
+        if not urls:
+            return True
+
+        if self._reserve('indexnow', len(urls), self.indexnow_quota, partial=False) < len(urls):
+            logger.warning(f"[INDEXNOW] Daily quota reached, deferred {len(urls)} URL(s)")
+            return DEFERRED
+
+        host = os.getenv('SITE_HOST', 'yallabus.app')
+        endpoint = os.getenv('INDEXNOW_ENDPOINT', 'https://www.bing.com/indexnow')
+        success = True
+        for start in range(0, len(urls), self.INDEXNOW_MAX_URLS):
+            payload = {
+                'host': host,
+                'key': key,
+                'keyLocation': f'https://{host}/{key}.txt',
+                'urlList': urls[start:start + self.INDEXNOW_MAX_URLS],
+            }
+            try:
+                response = self.session().post(endpoint, json=payload, timeout=self.TIMEOUT)
+            except requests.RequestException as e:
+                logger.error(f"[INDEXNOW] ✗ Exception: {e}")
+                success = False
+                continue
+            if response.status_code in (200, 202):
+                logger.info(f"[INDEXNOW] ✓ Accepted {len(payload['urlList'])} URLs ({response.status_code})")
+            else:
+                logger.error(f"[INDEXNOW] ✗ Failed: {response.status_code} - {response.text}")
+                success = False
+        return success
+
+    def quota_resets_at(self):
+        """When today's quotas start over (next midnight, in the project time zone)"""
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        return timezone.make_aware(datetime.combine(tomorrow, time.min))
+
+    def _google_batch(self, chunk, token):
+        boundary = f'batch_{uuid.uuid4().hex}'
+        parts = [
+            f'--{boundary}\r\n'
+            f'Content-Type: application/http\r\n'
+            f'Content-ID: <item{index}>\r\n\r\n'
+            f'POST {self.PUBLISH_PATH}\r\n'
+            f'Content-Type: application/json\r\n\r\n'
+            f'{json.dumps({"url": url, "type": action})}\r\n'
+            for index, (url, action) in enumerate(chunk)
+        ]
+        body = ''.join(parts) + f'--{boundary}--\r\n'
+        endpoint = os.getenv('GOOGLE_INDEXING_BATCH_ENDPOINT', 'https://indexing.googleapis.com/batch')
+        try:
+            response = self.session().post(
+                endpoint,
+                data=body.encode(),
+                headers={
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': f'multipart/mixed; boundary={boundary}',
+                },
+                timeout=self.TIMEOUT
+            )
+        except requests.RequestException as e:
+            logger.error(f"[INDEXING] Batch request failed: {e}")
+            return [False] * len(chunk)
+        if response.status_code != 200:
+            logger.error(f"[INDEXING] ✗ Batch failed ({response.status_code}): {response.text}")
+            return [False] * len(chunk)
+        return self._parse_batch(response, len(chunk))
+
+    @staticmethod
+    def _parse_batch(response, count):
+        """Per-item success from a multipart/mixed batch response"""
+        results = [False] * count
+        match = re.search(r'boundary="?([^";]+)"?', response.headers.get('Content-Type', ''))
+        if not match:
+            return results
+        for part in response.text.split(f'--{match.group(1)}'):
+            content_id = re.search(r'Content-ID:\s*<response-item(\d+)>', part, re.IGNORECASE)
+            status = re.search(r'HTTP/1\.1 (\d{3})', part)
+            if content_id and status and int(content_id.group(1)) < count:
+                results[int(content_id.group(1))] = status.group(1) == '200'
+        return results
+
+    @classmethod
+    def _google_token(cls):
+        """A valid OAuth token, refreshed only when expired; None without credentials"""
+        path = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
+        if not path or not os.path.exists(path):
+            return None
+
+        from google.oauth2 import service_account
+        from google.auth.transport.requests import Request
+
+        with cls._credentials_lock:
+            if cls._credentials is None or cls._credentials_file != path:
+                cls._credentials = service_account.Credentials.from_service_account_file(path, scopes=cls.SCOPES)
+                cls._credentials_file = path
+            if not cls._credentials.valid:
+                cls._credentials.refresh(Request(cls.session()))
+            return cls._credentials.token
+
+    def _reserve(self, service, count, quota, partial=True):
+        """Take up to `count` units of today's quota; returns how many were granted"""
+        key = CacheKeys.indexing_quota(service, timezone.localdate())
+        cache.add(key, 0, timeout=2 * 86400)
+        try:
+            used = cache.incr(key, count)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(key, count, timeout=2 * 86400)
+            used = count
+        granted = max(0, min(count, quota - (used - count)))
+        if granted < count and not partial:
+            granted = 0
+        if granted < count:
+            cache.decr(key, count - granted)
+        return granted
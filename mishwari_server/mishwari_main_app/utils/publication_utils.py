@@ -0,0 +1,26 @@
+"""Search-engine notifications for published trips"""
+import os
+import sys
+import requests
+
+
+def trip_url(trip_id):
+    site_url = os.getenv('SITE_URL', 'https://yallabus.app')
+    return f'{site_url}/bus_list/{trip_id}'
+
+
+def ping_feed():
+    """Tell Google the latest-trips feed changed"""
+    site_url = os.getenv('SITE_URL', 'https://yallabus.app')
+    feed_url = f"{site_url}/feeds/latest-trips/"
+    endpoint = os.getenv('GOOGLE_PING_ENDPOINT', 'https://www.google.com/ping')
+    try:
+        response = requests.get(endpoint, params={'sitemap': feed_url}, timeout=5)
+        response.raise_for_status()
+        sys.stdout.write(f'[FEED] Pinged Google about feed update\n')
+        sys.stdout.flush()
+        return True
+    except Exception as e:
+        sys.stdout.write(f'[FEED] Failed to ping Google: {e}\n')
+        sys.stdout.flush()
+        return False
@@ -0,0 +1,56 @@
+"""Sliding-window rate limiting on the shared cache"""
+
+import math
+import time
+from django.core.cache import cache
+from .cache_keys import CacheKeys
+
+
+class SlidingWindowLimiter:
+    """
+    Allows `limit` hits per identifier in any `window` seconds
+
+    Hits are counted with atomic cache increments in fixed buckets of
+    `window` seconds; the previous bucket is weighted by how much of it
+    still overlaps the sliding window. Memory is two integers per
+    identifier and nothing touches the database.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def hit(self, identifier, now=None):
+        """Count one hit; returns 0 if allowed, else the seconds until one would be"""
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, self.window)
+        current = self._incr(self._key(identifier, int(bucket)))
+        previous = cache.get(self._key(identifier, int(bucket) - 1)) or 0
+        overlap = 1 - offset / self.window
+        if previous * overlap + current <= self.limit:
+            return 0
+
+        if current > self.limit:
+            # Over on the current bucket alone: wait for the next one
+            return max(1, math.ceil(self.window - offset))
+        # Wait until enough of the previous bucket has slid out of the window
+        excess = previous * overlap + current - self.limit
+        return max(1, math.ceil(excess / previous * self.window))
+
+    def reset(self, identifier, now=None):
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        cache.delete_many([self._key(identifier, bucket), self._key(identifier, bucket - 1)])
+
+    def _incr(self, key):
+        cache.add(key, 0, timeout=2 * self.window)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(key, 1, timeout=2 * self.window)
+            return 1
+
+    def _key(self, identifier, bucket):
+        return CacheKeys.rate_limit(self.scope, identifier, bucket)
@@ -1,8 +1,7 @@
 import uuid
 import googlemaps
 import polyline
-from shapely.geometry import Point, LineString
-from geopy.distance import geodesic
+import numpy as np
 from django.conf import settings
 from django.core.cache import cache
 from ..models import CityList
@@ -49,28 +48,131 @@ def clear_route_session(session_id):
     cache.delete(cache_key)
 
 
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in km between coordinate arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class PolylineProjector:
+    """
+    Projects many points onto one decoded route polyline at once
+
+    Segment lengths and cumulative distances are computed once; each
+    projection is a single NumPy pass over (points x segments), using a
+    local equirectangular frame per segment.
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, polyline_points):
+        coords = np.asarray(polyline_points, dtype=float).reshape(-1, 2)
+        self.lat = coords[:, 0]
+        self.lon = coords[:, 1]
+
+        segment_km = haversine_km(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])
+        self.cumulative_km = np.concatenate(([0.0], np.cumsum(segment_km)))
+        self.segment_km = segment_km
+
+        # Planar segment vectors in km, scaled at each segment's mid-latitude
+        self.cos_lat = np.cos(np.radians((self.lat[:-1] + self.lat[1:]) / 2))
+        self.dx = (self.lon[1:] - self.lon[:-1]) * self.cos_lat * KM_PER_DEGREE
+        self.dy = (self.lat[1:] - self.lat[:-1]) * KM_PER_DEGREE
+        self.length_sq = self.dx ** 2 + self.dy ** 2
+
+    @property
+    def total_km(self):
+        return float(self.cumulative_km[-1])
+
+    def bbox_mask(self, lats, lons, margin_km):
+        """Boolean mask of points inside the route bounding box grown by margin_km"""
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        if not len(self.lat):
+            return np.zeros(len(lats), dtype=bool)
+        lat_margin = margin_km / KM_PER_DEGREE
+        max_abs_lat = min(89.0, float(np.max(np.abs(self.lat))) + lat_margin)
+        lon_margin = lat_margin / np.cos(np.radians(max_abs_lat))
+        return (
+            (lats >= self.lat.min() - lat_margin) & (lats <= self.lat.max() + lat_margin) &
+            (lons >= self.lon.min() - lon_margin) & (lons <= self.lon.max() + lon_margin)
+        )
+
+    def project(self, lats, lons):
+        """Return (offset_km, along_km) arrays: distance off the route and distance from its start"""
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        offsets = np.zeros(len(lats))
+        along = np.zeros(len(lats))
+
+        if len(self.lat) < 2:
+            if len(self.lat) == 1 and len(lats):
+                offsets = haversine_km(lats, lons, self.lat[0], self.lon[0])
+            return offsets, along
+
+        for start in range(0, len(lats), self.CHUNK_SIZE):
+            chunk = slice(start, start + self.CHUNK_SIZE)
+            offsets[chunk], along[chunk] = self._project_chunk(lats[chunk], lons[chunk])
+        return offsets, along
+
+    def _project_chunk(self, lats, lons):
+        px = (lons[:, None] - self.lon[None, :-1]) * self.cos_lat[None, :] * KM_PER_DEGREE
+        py = (lats[:, None] - self.lat[None, :-1]) * KM_PER_DEGREE
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = (px * self.dx + py * self.dy) / self.length_sq
+        t = np.clip(np.nan_to_num(t, nan=0.0), 0.0, 1.0)
+
+        planar_sq = (px - t * self.dx) ** 2 + (py - t * self.dy) ** 2
+        best = np.argmin(planar_sq, axis=1)
+        rows = np.arange(len(lats))
+        best_t = t[rows, best]
+
+        nearest_lat = self.lat[best] + best_t * (self.lat[best + 1] - self.lat[best])
+        nearest_lon = self.lon[best] + best_t * (self.lon[best + 1] - self.lon[best])
+        offsets = haversine_km(lats, lons, nearest_lat, nearest_lon)
+        along = self.cumulative_km[best] + best_t * self.segment_km[best]
+        return offsets, along
+
+
 def detect_waypoints_from_polyline(polyline_points, from_city, to_city):
     """Detect cities along route polyline. Returns: [{city_id, city_name, distance_from_start_km}]"""
     PROXIMITY_KM = 2.0
-    cities = CityList.objects.exclude(id__in=[from_city.id, to_city.id])
-    matched_cities = {}
+    projector = PolylineProjector(polyline_points)
+    cities = CityList.objects.exclude(id__in=[from_city.id, to_city.id]).only('id', 'city', 'waypoints')
+    
+    # Flatten every city waypoint into parallel arrays
+    city_index, lats, lons = [], [], []
+    city_list = list(cities)
+    for idx, city in enumerate(city_list):
+        for waypoint in city.waypoints or []:
+            city_index.append(idx)
+            lats.append(float(waypoint['lat']))
+            lons.append(float(waypoint['lon']))
     
-    for city in cities:
-        best_distance = None
-        
-        for waypoint in city.waypoints:
-            point = (float(waypoint['lat']), float(waypoint['lon']))
-            if is_point_near_polyline(point, polyline_points, PROXIMITY_KM):
-                distance = calculate_distance_along_route(polyline_points, point)
-                
-                # Keep earliest waypoint on route for this city
-                if best_distance is None or distance < best_distance:
-                    best_distance = distance
-                    matched_cities[city.id] = {
-                        'city_id': city.id,
-                        'city_name': city.city,
-                        'distance_from_start_km': distance
-                    }
+    if not lats:
+        return []
+    
+    city_index = np.asarray(city_index)
+    lats, lons = np.asarray(lats), np.asarray(lons)
+    candidates = projector.bbox_mask(lats, lons, PROXIMITY_KM)
+    offsets, along = projector.project(lats[candidates], lons[candidates])
+    
+    matched_cities = {}
+    for idx, offset, distance in zip(city_index[candidates], offsets, along):
+        if offset > PROXIMITY_KM:
+            continue
+        city = city_list[idx]
+        # Keep earliest waypoint on route for this city
+        if city.id not in matched_cities or distance < matched_cities[city.id]['distance_from_start_km']:
+            matched_cities[city.id] = {
+                'city_id': city.id,
+                'city_name': city.city,
+                'distance_from_start_km': float(distance)
+            }
     
     waypoints = list(matched_cities.values())
     waypoints.sort(key=lambda x: x['distance_from_start_km'])
@@ -79,11 +181,8 @@ def detect_waypoints_from_polyline(polyline_points, from_city, to_city):
 
 def is_point_near_polyline(point, polyline_points, threshold=1.2):
     """Check if point is within threshold km of polyline"""
-    shapely_point = Point(point[1], point[0])  # Point(lon, lat)
-    line = LineString([(p[1], p[0]) for p in polyline_points])  # LineString expects (lon, lat)
-    nearest = line.interpolate(line.project(shapely_point))
-    nearest_tuple = (nearest.y, nearest.x)  # Convert back to (lat, lon) for geodesic
-    return geodesic(nearest_tuple, point).kilometers <= threshold
+    offsets, _ = PolylineProjector(polyline_points).project([point[0]], [point[1]])
+    return bool(offsets[0] <= threshold)
 
 
 def calculate_distance_along_route(polyline_points, point):
@@ -91,33 +190,5 @@ def calculate_distance_along_route(polyline_points, point):
     if len(polyline_points) < 2:
         return 0
     
-    line = LineString([(p[1], p[0]) for p in polyline_points])
-    shapely_point = Point(point[1], point[0])
-    
-    # Find the projection distance along the line (in the line's units)
-    projection_distance = line.project(shapely_point)
-    
-    # Calculate actual distance in km by walking the polyline
-    cumulative_distance = 0
-    cumulative_line_distance = 0
-    
-    for i in range(len(polyline_points) - 1):
-        p1 = polyline_points[i]
-        p2 = polyline_points[i + 1]
-        
-        # Calculate segment length in both coordinate units and km
-        segment_line = LineString([(p1[1], p1[0]), (p2[1], p2[0])])
-        segment_line_length = segment_line.length
-        segment_km = geodesic(p1, p2).kilometers
-        
-        # Check if projection falls within this segment
-        if cumulative_line_distance + segment_line_length >= projection_distance:
-            # Interpolate within this segment
-            ratio = (projection_distance - cumulative_line_distance) / segment_line_length if segment_line_length > 0 else 0
-            cumulative_distance += segment_km * ratio
-            return cumulative_distance
-        
-        cumulative_distance += segment_km
-        cumulative_line_distance += segment_line_length
-    
-    return cumulative_distance
+    _, along = PolylineProjector(polyline_points).project([point[0]], [point[1]])
+    return float(along[0])
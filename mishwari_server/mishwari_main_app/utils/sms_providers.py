@@ -0,0 +1,175 @@
+"""SMS/OTP delivery providers behind one interface, sharing a pooled HTTP session"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class SMSDeliveryError(Exception):
+    """Raised when a provider did not accept a message"""
+
+
+class SMSRecipientRejectedError(SMSDeliveryError):
+    """Raised when a provider refused the recipient, e.g. an invalid or unroutable number"""
+
+
+class SMSProvider(ABC):
+    """
+    One way of delivering an OTP code, or free text, to a phone number
+
+    send() and send_text() return the provider's message id, or raise
+    SMSDeliveryError; SMSRecipientRejectedError when a 4xx answer says the
+    recipient, not the provider, is at fault. Subclasses must implement
+    configured() and send_text(); providers that can only send approved
+    templates set supports_text = False. Every provider posts through one
+    process-wide session with connect and read timeouts of SMS_PROVIDER_TIMEOUT.
+    """
+
+    name = None
+    supports_text = True
+    DEFAULT_TIMEOUT = (3.05, 5)
+    # 4xx answers that point at our credentials or quota rather than the recipient
+    PROVIDER_FAULT_STATUSES = (401, 403, 429)
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def session(cls):
+        with SMSProvider._session_lock:
+            if SMSProvider._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                SMSProvider._session = session
+        return SMSProvider._session
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'SMS_PROVIDER_TIMEOUT', self.DEFAULT_TIMEOUT)
+
+    @abstractmethod
+    def configured(self):
+        """Return True if the provider's credentials are set"""
+
+    def send(self, phone_number, otp_code):
+        return self.send_text(phone_number, self._text(otp_code))
+
+    @abstractmethod
+    def send_text(self, phone_number, text):
+        """Send free `text`; returns the provider's message id"""
+
+    def _post(self, url, **kwargs):
+        try:
+            response = self.session().post(url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise SMSDeliveryError(f'{self.name}: {e}') from e
+        if 400 <= response.status_code < 500 and response.status_code not in self.PROVIDER_FAULT_STATUSES:
+            raise SMSRecipientRejectedError(f'{self.name}: HTTP {response.status_code} {response.text[:200]}')
+        if not 200 <= response.status_code < 300:
+            raise SMSDeliveryError(f'{self.name}: HTTP {response.status_code} {response.text[:200]}')
+        return response
+
+    @staticmethod
+    def _json(response):
+        # The message is already accepted; an odd body must not trigger a resend elsewhere
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _international(phone_number):
+        return phone_number if phone_number.startswith('+') else '+' + phone_number
+
+    @staticmethod
+    def _text(otp_code):
+        return f"Your OTP code is {otp_code}"
+
+
+class InfobipProvider(SMSProvider):
+    name = 'infobip'
+
+    def configured(self):
+        return bool(os.getenv('INFOBIP_API_KEY') and os.getenv('INFOBIP_BASE_URL'))
+
+    def send_text(self, phone_number, text):
+        base_url = os.getenv('INFOBIP_BASE_URL')
+        if not base_url.startswith('http'):
+            base_url = 'https://' + base_url
+        response = self._post(
+            f"{base_url}/sms/2/text/advanced",
+            headers={"Authorization": f"App {os.getenv('INFOBIP_API_KEY')}"},
+            json={
+                "messages": [{
+                    "from": os.getenv('INFOBIP_SENDER', 'InfoSMS'),
+                    "destinations": [{"to": self._international(phone_number)}],
+                    "text": text
+                }]
+            }
+        )
+        return (self._json(response).get('messages') or [{}])[0].get('messageId')
+
+
+class TwilioProvider(SMSProvider):
+    """Twilio Programmable Messaging over its REST API"""
+
+    name = 'twilio'
+    DEFAULT_API_URL = 'https://api.twilio.com'
+
+    def configured(self):
+        return all(os.getenv(name) for name in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER'))
+
+    def send_text(self, phone_number, text):
+        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+        api_url = os.getenv('TWILIO_API_URL', self.DEFAULT_API_URL)
+        response = self._post(
+            f"{api_url}/2010-04-01/Accounts/{account_sid}/Messages.json",
+            auth=(account_sid, os.getenv('TWILIO_AUTH_TOKEN')),
+            data={
+                'From': os.getenv('TWILIO_PHONE_NUMBER'),
+                'To': self._international(phone_number),
+                'Body': text
+            }
+        )
+        return self._json(response).get('sid')
+
+
+class WhatsAppProvider(SMSProvider):
+    """WhatsApp Cloud API with the approved `mishwari_login` template"""
+
+    name = 'whatsapp'
+    supports_text = False
+    DEFAULT_API_URL = 'https://graph.facebook.com/v20.0/392655450602043/messages'
+
+    def configured(self):
+        return bool(os.getenv('WHATSAPP_SECRET_KEY'))
+
+    def send(self, phone_number, otp_code):
+        response = self._post(
+            os.getenv('WHATSAPP_API_URL', self.DEFAULT_API_URL),
+            headers={"Authorization": f"Bearer {os.getenv('WHATSAPP_SECRET_KEY')}"},
+            json={
+                "messaging_product": "whatsapp",
+                "to": phone_number,
+                "type": "template",
+                "template": {
+                    "name": "mishwari_login",
+                    "language": {"code": "ar"},
+                    "components": [
+                        {"type": "body", "parameters": [{"type": "text", "text": otp_code}]},
+                        {"type": "button", "sub_type": "url", "index": "0", "parameters": [{"type": "text", "text": otp_code}]}
+                    ]
+                }
+            }
+        )
+        return (self._json(response).get('messages') or [{}])[0].get('id')
+
+    def send_text(self, phone_number, text):
+        raise SMSDeliveryError(f'{self.name}: only approved templates can be sent')
+
+
+PROVIDERS = {provider.name: provider for provider in (InfobipProvider, TwilioProvider, WhatsAppProvider)}
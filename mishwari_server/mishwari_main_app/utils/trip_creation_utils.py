@@ -1,8 +1,9 @@
 from django.db import transaction
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from ..models import Trip, TripStop, Seat, CityList
-from .route_utils import calculate_distance_along_route
+from ..models import Trip, TripStop, Seat, CityList, TripSegmentInventory
+from .route_utils import PolylineProjector
+from ..services.trip_index_service import TripIndexService
 import polyline as polyline_lib
 
 
@@ -19,27 +20,7 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
     price_per_km = (total_price / Decimal(str(total_distance_km))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if total_distance_km > 0 else Decimal('0.00')
     
     # Get polyline for distance calculations
-    polyline_points = polyline_lib.decode(selected_route['overview_polyline']['points'])
-    
-    # Create Trip
-    route_name = selected_route.get('summary') or f"{cached_data['from_city']['name']} - {cached_data['to_city']['name']}"
-    trip = Trip.objects.create(
-        operator=operator,
-        bus=bus,
-        driver=driver,
-        from_city_id=cached_data['from_city']['id'],
-        to_city_id=cached_data['to_city']['id'],
-        journey_date=trip_data['journey_date'],
-        planned_polyline=selected_route['overview_polyline']['points'],
-        planned_route_name=route_name,
-        trip_type=trip_data.get('trip_type', 'scheduled'),
-        planned_departure=trip_data.get('planned_departure') or None,
-        departure_window_start=trip_data.get('departure_window_start') or None,
-        departure_window_end=trip_data.get('departure_window_end') or None,
-        price_per_km=price_per_km,
-        total_distance_km=total_distance_km,
-        status='draft'
-    )
+    polyline_points = selected_route.get('decoded_polyline') or polyline_lib.decode(selected_route['overview_polyline']['points'])
     
     # Build list of all stop IDs
     all_stop_ids = [cached_data['from_city']['id']] + selected_waypoint_ids + [cached_data['to_city']['id']]
@@ -47,6 +28,14 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
     # Fetch all city objects
     all_cities_dict = CityList.objects.in_bulk(all_stop_ids)
     
+    # Project every intermediate stop onto the route in one pass
+    waypoint_cities = [all_cities_dict[city_id] for city_id in selected_waypoint_ids if city_id in all_cities_dict]
+    _, waypoint_distances = PolylineProjector(polyline_points).project(
+        [float(city.latitude) for city in waypoint_cities],
+        [float(city.longitude) for city in waypoint_cities]
+    )
+    distance_by_city = {city.id: float(distance) for city, distance in zip(waypoint_cities, waypoint_distances)}
+    
     # Calculate distance for each stop
     stops_data = []
     for city_id in all_stop_ids:
@@ -59,8 +48,7 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
         elif city.id == cached_data['to_city']['id']:
             distance = total_distance_km
         else:
-            point = (float(city.latitude), float(city.longitude))
-            distance = calculate_distance_along_route(polyline_points, point)
+            distance = distance_by_city[city.id]
         
         stops_data.append({'city': city, 'distance': distance})
     
@@ -75,15 +63,37 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
         except ValueError:
             try:
                 departure_time = datetime.combine(
-                    trip.journey_date,
+                    trip_data['journey_date'],
                     datetime.strptime(departure_str, '%H:%M:%S').time()
                 )
             except ValueError:
-                departure_time = datetime.combine(trip.journey_date, datetime.min.time())
+                departure_time = datetime.combine(trip_data['journey_date'], datetime.min.time())
     else:
-        departure_time = datetime.combine(trip.journey_date, datetime.min.time())
+        departure_time = datetime.combine(trip_data['journey_date'], datetime.min.time())
+    
+    # Create Trip
+    route_name = selected_route.get('summary') or f"{cached_data['from_city']['name']} - {cached_data['to_city']['name']}"
+    trip = Trip.objects.create(
+        operator=operator,
+        bus=bus,
+        driver=driver,
+        from_city_id=cached_data['from_city']['id'],
+        to_city_id=cached_data['to_city']['id'],
+        journey_date=trip_data['journey_date'],
+        planned_polyline=selected_route['overview_polyline']['points'],
+        planned_route_name=route_name,
+        trip_type=trip_data.get('trip_type', 'scheduled'),
+        planned_departure=trip_data.get('planned_departure') or None,
+        departure_window_start=trip_data.get('departure_window_start') or None,
+        departure_window_end=trip_data.get('departure_window_end') or None,
+        price_per_km=price_per_km,
+        total_distance_km=total_distance_km,
+        status='draft',
+        seat_matrix={f"{i}-{i+1}": bus.capacity for i in range(len(sorted_stops) - 1)}
+    )
     
-    # Create TripStops
+    # Build TripStops in memory
+    stops = []
     for i, stop_info in enumerate(sorted_stops):
         city = stop_info['city']
         distance = stop_info['distance']
@@ -99,7 +109,7 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
         # Estimate duration (60 km/h average)
         duration_seconds = int((distance / 60) * 3600) if distance > 0 else 0
         
-        TripStop.objects.create(
+        stops.append(TripStop(
             trip=trip,
             city=city,
             sequence=i,
@@ -107,17 +117,33 @@ def create_trip_from_cached_route(operator, bus, driver, cached_data, selected_r
             price_from_start=price,
             planned_arrival=departure_time + timedelta(seconds=duration_seconds),
             planned_departure=departure_time + timedelta(seconds=duration_seconds + 300)
-        )
-    
-    # Initialize seat matrix
-    trip.initialize_seat_matrix(len(sorted_stops))
+        ))
     
-    # Create seats
-    for seat_num in range(1, bus.capacity + 1):
-        Seat.objects.create(
-            trip=trip,
-            seat_number=str(seat_num),
-            available_segments=[f"{i}-{i+1}" for i in range(len(sorted_stops) - 1)]
-        )
+    seat_numbers = [str(seat_num) for seat_num in range(1, bus.capacity + 1)]
+    materialize_trip_inventory(trip, stops, seat_numbers)
     
     return trip
+
+
+def materialize_trip_inventory(trip, stops, seat_numbers):
+    """
+    Persist a new trip's stops, seats and segment inventory in bulk and index its city pairs
+    
+    bulk_create skips TripStop signals, so the search index is rebuilt
+    once here instead of once per stop.
+    
+    Args:
+        trip: Saved Trip object with seat_matrix already set
+        stops: Unsaved TripStop objects ordered by sequence
+        seat_numbers: Seat numbers to create for every segment
+    """
+    TripStop.objects.bulk_create(stops)
+    
+    segments = [f"{i}-{i+1}" for i in range(len(stops) - 1)]
+    Seat.objects.bulk_create([
+        Seat(trip=trip, seat_number=seat_number, available_segments=segments)
+        for seat_number in seat_numbers
+    ])
+    
+    TripSegmentInventory.objects.bulk_create(TripSegmentInventory.build_for_trip(trip))
+    TripIndexService().rebuild_trip(trip, stops)
@@ -7,6 +7,7 @@ from .booking_views import BookingViewSet, BookingTripsViewSet, PassengersViewSe
 from .route_views import RouteViewSet, TripsViewSet
 from .review_views import TripReviewViewSet
 from .auth_views import MobileLoginView, ProfileView, whatsapp_webhook
+from .sitemap_views import sitemap_index, sitemap_section
 from .operator_views import (
     OperatorFleetViewSet, OperatorTripViewSet, PhysicalBookingViewSet,
     DriverManagementViewSet, UpgradeRequestViewSet
@@ -20,4 +21,5 @@ __all__ = [
     'MobileLoginView', 'ProfileView', 'whatsapp_webhook',
     'OperatorFleetViewSet', 'OperatorTripViewSet', 'PhysicalBookingViewSet',
     'DriverManagementViewSet', 'UpgradeRequestViewSet',
+    'sitemap_index', 'sitemap_section',
 ]
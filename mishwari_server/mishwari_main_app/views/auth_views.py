@@ -3,6 +3,7 @@ from rest_framework import status
 from rest_framework import viewsets,status
 from rest_framework.views import APIView
 import os
+import logging
 
 
 from django.utils.crypto import get_random_string
@@ -19,18 +20,17 @@ from rest_framework.generics import get_object_or_404
 from django.contrib.auth.models import User
 from ..serializers import  ProfileCompletionSerializer, ProfileSerializer
 import random
-import requests
 from django.http import JsonResponse
 from django.views import View
 from rest_framework.decorators import action
 from django.core.cache import cache
 
-from ..models import Profile, BusOperator, Driver, OTPAttempt, DriverInvitation
-from datetime import timedelta
-from twilio.rest import Client
+from ..models import Profile, BusOperator, Driver, DriverInvitation
 from ..services.google_identity_proxy import GoogleIdentityProxyService 
+from ..services.otp_rate_limit_service import OTPRateLimitService
+from ..services.sms_dispatch_service import SMSDispatchService
 
-
+logger = logging.getLogger(__name__)
 
 
 class MobileLoginView(viewsets.ViewSet):
@@ -46,15 +46,15 @@ class MobileLoginView(viewsets.ViewSet):
         recaptcha_token = request.data.get('recaptcha_token')
         use_firebase = request.data.get('use_firebase', True)
         
-        # Check rate limiting with OTPAttempt
-        attempt, _ = OTPAttempt.objects.get_or_create(mobile_number=mobile_number)
-        if attempt.blocked_until and timezone.now() < attempt.blocked_until:
-            return Response({'error': 'Too many requests'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
-        
-        if attempt.attempt_count >= 50:
-            attempt.blocked_until = timezone.now() + timedelta(minutes=30)
-            attempt.save()
-            return Response({'error': 'Too many requests'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        # Per-number and per-IP limits live in the cache; only persistent blocks reach the DB
+        rate_limiter = OTPRateLimitService()
+        retry_after = rate_limiter.check(mobile_number, rate_limiter.client_ip(request))
+        if retry_after:
+            return Response(
+                {'error': 'Too many requests', 'retry_after': retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(retry_after)}
+            )
         
         # Check if user has password (only operator_admin should have password)
         requires_password = False
@@ -72,12 +72,9 @@ class MobileLoginView(viewsets.ViewSet):
         # Try Firebase proxy first if recaptcha token provided
         if use_firebase and recaptcha_token:
             print(f'[OTP REQUEST] Attempting Firebase proxy for {mobile_number}')
-            firebase_result = GoogleIdentityProxyService.send_otp(mobile_number, recaptcha_token)
+            firebase_result = SMSDispatchService().send_firebase_otp(mobile_number, recaptcha_token)
             
             if firebase_result['success']:
-                attempt.attempt_count += 1
-                attempt.save()
-                
                 # Store session_info in cache for verification
                 cache.set(f'firebase_session_{mobile_number}', firebase_result['session_info'], timeout=300)
                 
@@ -94,144 +91,25 @@ class MobileLoginView(viewsets.ViewSet):
         # Fallback to SMS
         otp_code = get_random_string(length=6, allowed_chars='0123456789')
         cache.set(f'otp_{mobile_number}', otp_code, timeout=60)
-        attempt.attempt_count += 1
-        attempt.save()
         
-        print(f'[OTP REQUEST] Sending SMS OTP {otp_code} to {mobile_number}')
-        result = self.send_otp_via_infobip(mobile_number, otp_code)
-        
-        if result['status'] == 'success':
+        logger.info('[OTP REQUEST] Queueing SMS OTP to %s', mobile_number)
+        # Delivery and provider failover run on the SMS worker pool, not in this request
+        if SMSDispatchService().send_otp(mobile_number, otp_code):
             return Response({
                 'message': 'OTP sent successfully via SMS',
                 'method': 'sms',
                 'requires_password': requires_password
             }, status=status.HTTP_200_OK)
         else:
-            print(f"SMS error: {result['message']}")
+            logger.error('[OTP REQUEST] No SMS provider configured; OTP for %s not sent', mobile_number)
+            cache.delete(f'otp_{mobile_number}')
             return Response({
-                'message': f"OTP: {otp_code} (SMS failed: {result['message']})",
+                'error': 'Could not send OTP, please try again later',
                 'method': 'sms',
                 'requires_password': requires_password
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
 
-    def send_otp_via_twilio(self, phone_number, otp_code):
-        try:
-            account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-            auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-            twilio_phone_number = os.getenv('TWILIO_PHONE_NUMBER')
-
-            print(f"Twilio config check - SID: {bool(account_sid)}, Token: {bool(auth_token)}, Phone: {bool(twilio_phone_number)}")
-
-            if not all([account_sid, auth_token, twilio_phone_number]):
-                return {"status": "error", "message": "Twilio credentials not configured"}
-
-            if not phone_number.startswith('+'):
-                phone_number = '+' + phone_number
-
-            print(f"Sending to: {phone_number}")
-            client = Client(account_sid, auth_token)
-            message = client.messages.create(
-                body=f"Your OTP code is {otp_code}",
-                from_=twilio_phone_number,
-                to=phone_number
-            )
-            print(f"Message sent successfully: {message.sid}")
-            return {"status": "success", "sid": message.sid}
-        except Exception as e:
-            print(f"Twilio exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {"status": "error", "message": str(e)}
-
-    def send_otp_via_infobip(self, phone_number, otp_code):
-        try:
-            api_key = os.getenv('INFOBIP_API_KEY')
-            base_url = os.getenv('INFOBIP_BASE_URL')
-            sender = os.getenv('INFOBIP_SENDER', 'InfoSMS')
-
-            if not all([api_key, base_url]):
-                return {"status": "error", "message": "Infobip credentials not configured"}
-
-            if not base_url.startswith('http'):
-                base_url = 'https://' + base_url
-
-            if not phone_number.startswith('+'):
-                phone_number = '+' + phone_number
-
-            url = f"{base_url}/sms/2/text/advanced"
-            headers = {
-                "Authorization": f"App {api_key}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "messages": [{
-                    "from": sender,
-                    "destinations": [{"to": phone_number}],
-                    "text": f"Your OTP code is {otp_code}"
-                }]
-            }
-
-            response = requests.post(url, json=payload, headers=headers)
-            print(f"Infobip response status: {response.status_code}")
-            print(f"Infobip response: {response.text}")
-            if response.status_code == 200:
-                return {"status": "success", "response": response.json()}
-            else:
-                return {"status": "error", "message": response.text}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
-        
-    def send_whatsapp_message(self, phone_number, otp_code):
-        # Failed due to Facebook aprroval delay
-        url = "https://graph.facebook.com/v20.0/392655450602043/messages"
-        WHATSAPP_SECRET_KEY = os.getenv('WHATSAPP_SECRET_KEY')
-        print("tokrn",WHATSAPP_SECRET_KEY)
-        headers = {
-            # 60 days permanent for Husni
-            "Authorization": f"Bearer {WHATSAPP_SECRET_KEY}",
-
-            "Content-Type": "application/json"
-        }
-        data = {
-        "messaging_product": "whatsapp",
-        "to": phone_number,
-        "type": "template",
-        # "text": {
-        #     "body": "Test message",
-        # }
-        "template": {
-            "name": "mishwari_login",  # Replace with your actual template name
-            "language": {"code": "ar"},  # Replace with the appropriate language code
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": otp_code  # The OTP code variable
-                        }
-                    ]
-                },
-                {
-                    "type": "button",
-                    "sub_type": "url",
-                    "index": "0",
-                    "parameters": [
-                    {
-                        "type": "text",
-                        "text": otp_code
-                    }
-                    ]
-                }
-            ]
-        }
-    }
-        response = requests.post(url, json=data, headers=headers)
-        print(response.json())
-        return response
-    
-
     @action(detail=False, methods=['post'], url_path='check-password-required')
     def check_password_required(self, request):
         """Check if password is required for login without generating OTP"""
@@ -367,13 +245,7 @@ class MobileLoginView(viewsets.ViewSet):
             else:
                 cache.delete(f'firebase_session_{mobile_number}')
             
-            try:
-                attempt = OTPAttempt.objects.get(mobile_number=mobile_number)
-                attempt.attempt_count = 0
-                attempt.blocked_until = None
-                attempt.save()
-            except OTPAttempt.DoesNotExist:
-                pass
+            OTPRateLimitService().reset(mobile_number)
             
             tokens = self.get_tokens_for_user(user)
             return Response({
@@ -3,6 +3,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.conf import settings
 from django.db import transaction
+from datetime import datetime, timezone as dt_timezone
 
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -11,15 +12,38 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 
+import logging
 import stripe
 
-from ..serializers import BookingSerializer, BookingTripSerializer, PassengerSerializer
+from ..serializers import (
+    BookingSerializer, BookingTripSerializer, PassengerSerializer,
+    BookingListSerializer, BookingTripSnapshotSerializer
+)
+from ..pagination import BookingCursorPagination, PassengerCursorPagination
 from ..models import Booking, Passenger, Driver
-from ..services import BookingService
-from ..services.booking_service import BookingAlreadyCancelledError
+from ..services import BookingService, SeatHoldService, SeatHoldError
+from ..services.booking_service import BookingAlreadyCancelledError, InsufficientSeatsError
 from ..payment_gateways.stripe_payment_gateway import StripePaymentGateway
 from ..payment_gateways.wallet_payment_gateway import WalletPaymentGateway
 
+logger = logging.getLogger(__name__)
+
+
+def booking_list_response(request, queryset, view=None):
+    """
+    Compact cursor-paginated booking list
+
+    Rows reference their trip by ID; each distinct trip on the page is
+    serialized once under `trips`.
+    """
+    paginator = BookingCursorPagination()
+    bookings = paginator.paginate_queryset(BookingListSerializer.setup_eager_loading(queryset), request, view=view)
+    trips = {booking.trip_id: booking.trip for booking in bookings if booking.trip_id}
+
+    response = paginator.get_paginated_response(BookingListSerializer(bookings, many=True).data)
+    response.data['trips'] = BookingTripSnapshotSerializer(trips.values(), many=True).data
+    return response
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
@@ -48,6 +72,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         return Booking.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        return booking_list_response(request, self.filter_queryset(self.get_queryset()), view=self)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -64,6 +91,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         else:
             raise ValidationError('Unsupported payment method')
 
+        if payment_method == 'stripe':
+            return self._create_stripe_checkout(request, serializer, gateway)
+
         try:
             with transaction.atomic():
                 booking_data = serializer.validated_data
@@ -81,11 +111,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                 booking.created_by = request.user
                 booking.save()
                 
-                if payment_method == 'stripe':
-                    payment_url = gateway.initiate_payment(booking_details)
-                    headers = self.get_success_headers(serializer.data)
-                    return Response({'payment_url': payment_url, 'booking_id': booking.id}, status=status.HTTP_202_ACCEPTED, headers=headers)
-                elif payment_method == 'wallet':
+                if payment_method == 'wallet':
                     gateway.initiate_payment(booking_details)
                     booking.status = 'active'
                     booking.is_paid = True
@@ -105,6 +131,45 @@ class BookingViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _create_stripe_checkout(self, request, serializer, gateway):
+        """Hold the seats and start a Stripe checkout; the booking is created by the webhook"""
+        data = serializer.validated_data
+        # Stripe keeps a checkout open for at least MIN_SESSION_SECONDS; the seats stay held as long
+        default_ttl = SeatHoldService().ttl
+        hold_service = SeatHoldService(ttl=max(default_ttl, gateway.MIN_SESSION_SECONDS))
+        try:
+            hold = hold_service.place_hold(
+                trip=data['trip'],
+                from_stop=data['from_stop'],
+                to_stop=data['to_stop'],
+                user=request.user,
+                passengers_data=request.data.get('passengers', []),
+                total_fare=data.get('total_fare', 0),
+                contact_name=data.get('contact_name'),
+                contact_phone=data.get('contact_phone'),
+                contact_email=data.get('contact_email')
+            )
+        except (InsufficientSeatsError, SeatHoldError) as e:
+            raise ValidationError(str(e))
+
+        try:
+            payment_url = gateway.initiate_payment({
+                'user': request.user,
+                'trip': data['trip'],
+                'amount': data.get('total_fare', 0),
+                'hold_id': hold['id'],
+                'expires_at': hold['expires_at']
+            })
+        except Exception:
+            hold_service.release(hold['id'], hold['trip_id'])
+            return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'payment_url': payment_url,
+            'hold_id': hold['id'],
+            'hold_expires_at': datetime.fromtimestamp(hold['expires_at'], tz=dt_timezone.utc)
+        }, status=status.HTTP_202_ACCEPTED)
+
     @action(detail=True, methods=['post'], url_path='cancel')
     def cancel_booking(self, request, pk=None):
         from ..utils.operator_utils import get_operator_for_user
@@ -202,6 +267,7 @@ class BookingTripsViewSet(viewsets.ModelViewSet):
 
 class PassengersViewSet(viewsets.ModelViewSet):
     serializer_class = PassengerSerializer
+    pagination_class = PassengerCursorPagination
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -239,8 +305,8 @@ class PassengersViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
         data = serializer.data
         
         user_profile = request.user.profile
@@ -248,7 +314,7 @@ class PassengersViewSet(viewsets.ModelViewSet):
             if passenger.get('name') == user_profile.full_name:
                 passenger['is_checked'] = True
         
-        return Response(data)
+        return self.get_paginated_response(data)
 
     @action(detail=False, methods=['post'], url_path='bulk-update-checked')
     def bulk_update_checked(self, request):
@@ -286,12 +352,34 @@ def stripe_webhook(request):
 
     if event['type'] == 'checkout.session.completed':
         session = event['data']['object']
-        handle_successful_payment(session)
+        if handle_successful_payment(session) is False:
+            # Nothing was booked or refunded; Stripe retries the event
+            return JsonResponse({'error': 'payment not settled'}, status=500)
+    elif event['type'] == 'checkout.session.expired':
+        hold_id = event['data']['object'].get('metadata', {}).get('hold_id')
+        if hold_id:
+            SeatHoldService().release(hold_id)
 
     return JsonResponse({'status': 'success'}, status=200)
 
 
 def handle_successful_payment(session):
+    """Book a paid checkout; returns False if the payment is neither booked nor refunded"""
+    hold_id = session['metadata'].get('hold_id')
+    if hold_id:
+        hold_service = SeatHoldService()
+        try:
+            hold_service.convert(hold_id)
+        except InsufficientSeatsError as e:
+            logger.error(f'[SEAT_HOLD] Paid hold {hold_id} could not be booked, refunding: {e}')
+            try:
+                StripePaymentGateway.refund(session['payment_intent'], metadata={'hold_id': hold_id})
+            except stripe.error.StripeError:
+                logger.exception(f'[SEAT_HOLD] Refund for hold {hold_id} failed; needs manual refund')
+                return False
+            hold_service.mark_refunded(hold_id)
+        return
+
     try:
         booking_id = session['metadata']['booking_id']
         booking = Booking.objects.get(id=int(booking_id))
@@ -304,6 +392,7 @@ def handle_successful_payment(session):
 
 __all__ = [
     'BookingViewSet',
+    'booking_list_response',
     'BookingTripsViewSet',
     'PassengersViewSet',
     'stripe_webhook',
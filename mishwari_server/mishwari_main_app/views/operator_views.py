@@ -18,11 +18,14 @@ from ..utils.route_utils import (
     cache_route_session, 
     get_cached_route_session,
     clear_route_session,
-    get_google_maps_client,
     detect_waypoints_from_polyline
 )
 from ..utils.trip_creation_utils import create_trip_from_cached_route
+from ..services.route_catalogue_service import RouteCatalogueService
+from ..services.schedule_service import TripScheduleService
 from ..utils.operator_utils import get_operator_for_user
+from .booking_views import booking_list_response
+from ..pagination import TripCursorPagination, InvitationCursorPagination
 import polyline
 
 
@@ -120,6 +123,7 @@ class OperatorFleetViewSet(viewsets.ModelViewSet):
 class OperatorTripViewSet(viewsets.ModelViewSet):
     """Operator trip management with flexible/scheduled support"""
     serializer_class = TripsSerializer
+    pagination_class = TripCursorPagination
     permission_classes = [IsAuthenticated, IsOperatorOrAdmin]
     authentication_classes = [JWTAuthentication]
     
@@ -130,7 +134,7 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         operator = get_operator_for_user(self.request.user)
-        queryset = Trip.objects.filter(operator=operator)
+        queryset = TripsSerializer.setup_eager_loading(Trip.objects.filter(operator=operator))
         
         # Invited drivers only see trips assigned to them
         if self.request.user.profile.role == 'invited_driver':
@@ -211,6 +215,30 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'], url_path='make-recurring')
+    def make_recurring(self, request, pk=None):
+        """Repeat this trip's route on a weekly schedule. POST /operator/trips/{id}/make-recurring/"""
+        trip = self.get_object()
+        service = TripScheduleService()
+        
+        try:
+            horizon_days = int(request.data.get('horizon_days', 14))
+            schedule = service.create_from_trip(
+                trip,
+                weekdays=request.data.get('weekdays', []),
+                departure_times=request.data.get('departure_times', []),
+                horizon_days=horizon_days,
+                auto_publish=bool(request.data.get('auto_publish', False))
+            )
+        except (ValidationError, ValueError, TypeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        created = service.generate(schedule)
+        return Response({
+            'schedule_id': schedule.id,
+            'trips_created': len(created)
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['post'])
     def depart_now(self, request, pk=None):
         """Trigger departure - activate published trips"""
@@ -226,6 +254,7 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
         trip.status = 'active'
         trip.save()
         
+        # Queued; the outbox worker fans the notice out to the passengers
         notification_count = send_departure_notification(trip.id)
         
         return Response({
@@ -255,13 +284,7 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            gmaps = get_google_maps_client()
-            routes = gmaps.directions(
-                f"{from_city.latitude},{from_city.longitude}",
-                f"{to_city.latitude},{to_city.longitude}",
-                mode='driving',
-                alternatives=True
-            )
+            routes = RouteCatalogueService().get_routes(from_city, to_city, alternatives=True)
             
             if not routes:
                 return Response(
@@ -323,7 +346,7 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        polyline_points = polyline.decode(selected_route['overview_polyline']['points'])
+        polyline_points = selected_route.get('decoded_polyline') or polyline.decode(selected_route['overview_polyline']['points'])
         
         from_city = CityList.objects.get(id=cached_data['from_city']['id'])
         to_city = CityList.objects.get(id=cached_data['to_city']['id'])
@@ -345,9 +368,7 @@ class OperatorTripViewSet(viewsets.ModelViewSet):
     def bookings(self, request, pk=None):
         """Get bookings for a specific trip"""
         trip = self.get_object()
-        bookings = Booking.objects.filter(trip=trip).order_by('-booking_time')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data)
+        return booking_list_response(request, Booking.objects.filter(trip=trip), view=self)
     
     @action(detail=True, methods=['post'], url_path='set-actual-resources')
     def set_actual_resources(self, request, pk=None):
@@ -480,6 +501,9 @@ class PhysicalBookingViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Booking.objects.filter(booking_source='physical', created_by=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        return booking_list_response(request, self.get_queryset(), view=self)
+    
     def create(self, request):
         """Create physical booking"""
         trip_id = request.data.get('trip')
@@ -600,9 +624,10 @@ class DriverManagementViewSet(viewsets.ModelViewSet):
     def list_invitations(self, request):
         """List all invitations sent by operator"""
         operator = get_operator_for_user(request.user)
-        invitations = DriverInvitation.objects.filter(operator=operator)
+        paginator = InvitationCursorPagination()
+        invitations = paginator.paginate_queryset(DriverInvitation.objects.filter(operator=operator), request, view=self)
         
-        return Response([{
+        return paginator.get_paginated_response([{
             'id': inv.id,
             'mobile_number': inv.mobile_number,
             'invite_code': inv.invite_code,
@@ -17,6 +17,7 @@ from geopy.distance import geodesic
 from ..serializers import TripsSerializer
 from ..models import Trip, CityList
 from ..utils.cache_keys import CacheKeys
+from ..services.route_catalogue_service import RouteCatalogueService
 
 
 class RouteViewSet(viewsets.ViewSet):
@@ -44,8 +45,8 @@ class RouteViewSet(viewsets.ViewSet):
         if not startCoords and not endCoords:
             return Response({'message': 'provide start and end'}, status=status.HTTP_400_BAD_REQUEST)
         
-        gmaps = googlemaps.Client(key=self.api_key)
-        all_routes = gmaps.directions(startCoords, endCoords, mode='driving', alternatives=True, region='ye')
+        client = googlemaps.Client(key=self.api_key) if self.api_key else None
+        all_routes = RouteCatalogueService(client=client).get_routes(start, end, alternatives=True)
 
         cache.set(CacheKeys.route_session(user_id), all_routes, timeout=3600)
 
@@ -220,7 +221,7 @@ class TripsViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def get_queryset(self):
-        return Trip.objects.filter(driver__user=self.request.user.id)
+        return TripsSerializer.setup_eager_loading(Trip.objects.filter(driver__user=self.request.user.id))
 
 
 __all__ = ['RouteViewSet', 'TripsViewSet']
@@ -0,0 +1,14 @@
+"""Sitemap views - serve the pre-rendered sitemap index and files"""
+from django.http import HttpResponse, Http404
+from ..services.sitemap_service import SitemapService
+
+
+def sitemap_index(request):
+    return HttpResponse(SitemapService().index_xml(), content_type='application/xml')
+
+
+def sitemap_section(request, section, page):
+    xml = SitemapService().page_xml(section, page)
+    if xml is None:
+        raise Http404("No such sitemap page")
+    return HttpResponse(xml, content_type='application/xml')
@@ -9,6 +9,24 @@ from rest_framework.decorators import action
 
 from ..serializers import TripsSerializer, TripStopSerializer, CitiesSerializer
 from ..models import Trip, TripStop, CityList
+from ..pagination import TripCursorPagination, CityCursorPagination
+from ..services.trip_search_service import TripSearchService
+from ..services.city_locator_service import CityLocatorService
+from ..services.city_picker_service import CityPickerService
+from ..services.search_cache_service import SearchCacheService
+from ..services.recent_trips_service import RecentTripsService
+
+
+def cached_search_response(namespace, params, tags, build_response):
+    """Serve a public GET response from the search cache; only 200 responses are stored"""
+    built = []
+    
+    def compute():
+        built.append(build_response())
+        return built[0].data, built[0].status_code == status.HTTP_200_OK
+    
+    data = SearchCacheService().get_or_compute(namespace, params, tags, compute)
+    return built[0] if built else Response(data, status=status.HTTP_200_OK)
 
 
 class TripStopView(viewsets.ModelViewSet):
@@ -47,299 +65,123 @@ class TripSearchView(viewsets.ViewSet):
     @action(detail=False, methods=['get'], url_path='recent')
     def recent_trips(self, request):
         """Get recently created published trips for homepage"""
-        from django.utils import timezone
-        
-        today = timezone.now().date()
-        trips = Trip.objects.filter(
-            status='published',
-            journey_date__gte=today
-        ).select_related('from_city', 'to_city', 'operator', 'bus', 'driver').order_by('-created_at')[:8]
-        
-        results = []
-        for trip in trips:
-            first_stop = trip.stops.order_by('sequence').first()
-            last_stop = trip.stops.order_by('-sequence').first()
-            
-            # Calculate price from first to last stop
-            price = last_stop.price_from_start if last_stop else 0
-            
-            results.append({
-                'id': trip.id,
-                'from_city': {'name': trip.from_city.city},
-                'to_city': {'name': trip.to_city.city},
-                'journey_date': trip.journey_date,
-                'departure_time': first_stop.planned_departure if first_stop else trip.planned_departure,
-                'price': price,
-                'available_seats': trip.get_min_available_seats(),
-                'operator': {'name': trip.operator.name},
-                'planned_route_name': trip.planned_route_name
-            })
+        results = [{
+            'id': trip['id'],
+            'from_city': {'name': trip['from_city']},
+            'to_city': {'name': trip['to_city']},
+            'journey_date': trip['journey_date'],
+            'departure_time': trip['departure_time'],
+            'price': trip['price'],
+            'available_seats': trip['available_seats'],
+            'operator': {'name': trip['operator']},
+            'planned_route_name': trip['planned_route_name']
+        } for trip in RecentTripsService().upcoming(8)]
         
         return Response(results, status=status.HTTP_200_OK)
     
     def list(self, request):
+        from django.utils import timezone
+        
+        params = {
+            'from': request.query_params.get('pickup') or request.query_params.get('from_city') or request.query_params.get('from'),
+            'to': request.query_params.get('destination') or request.query_params.get('to_city') or request.query_params.get('to'),
+            'date': request.query_params.get('date'),
+            'user_lat': self._round_coordinate(request.query_params.get('user_lat')),
+            'user_lon': self._round_coordinate(request.query_params.get('user_lon')),
+            'today': timezone.now().date(),
+        }
+        tags = self._search_tags(params)
+        if not tags:
+            return self._search(request)
+        return cached_search_response('trips', params, tags, lambda: self._search(request))
+    
+    def _search_tags(self, params):
+        """Search-cache tags matching the branch _search takes for these parameters"""
+        from_city, to_city, date_str = params['from'], params['to'], params['date']
+        if from_city and to_city:
+            return [SearchCacheService.route_tag(from_city, to_city, date_str)]
+        if date_str:
+            return []
+        if to_city:
+            return [SearchCacheService.to_tag(to_city)]
+        if from_city:
+            return [SearchCacheService.from_tag(from_city)]
+        return []
+    
+    @staticmethod
+    def _round_coordinate(value):
+        # ~100 m cells: nearby users share an entry, distances stay within 0.1 km
+        try:
+            return round(float(value), 3) if value is not None else None
+        except ValueError:
+            return value
+    
+    def _search(self, request):
+        from django.utils import timezone
+        
         from_city = request.query_params.get('pickup') or request.query_params.get('from_city') or request.query_params.get('from')
         to_city = request.query_params.get('destination') or request.query_params.get('to_city') or request.query_params.get('to')
         date_str = request.query_params.get('date', None)
         user_lat = request.query_params.get('user_lat', None)  # NEW: User GPS latitude
         user_lon = request.query_params.get('user_lon', None)  # NEW: User GPS longitude
+        
+        search_service = TripSearchService()
+        today = timezone.now().date()
 
         # CASE 2: User has GPS + searching for destination - Find nearest city and show trips FROM there TO destination
         # CHECK THIS FIRST before CASE 1!
         if to_city and user_lat and user_lon and not from_city and not date_str:
-            from django.utils import timezone
-            from geopy.distance import geodesic
-            
             try:
                 to_city_obj = CityList.objects.get(city=to_city)
                 user_lat_f = float(user_lat)
                 user_lon_f = float(user_lon)
             except (CityList.DoesNotExist, ValueError):
                 return Response({'error': 'Invalid parameters'}, status=status.HTTP_400_BAD_REQUEST)
+            if not (-90 <= user_lat_f <= 90 and -180 <= user_lon_f <= 180):
+                return Response({'error': 'Invalid coordinates'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Find nearest city to user using geodesic distance
-            all_cities = CityList.objects.all()
-            
-            nearest_city = None
-            min_distance = float('inf')
-            
-            for city in all_cities:
-                if not city.latitude or not city.longitude:
-                    continue
-                    
-                distance_km = geodesic((user_lat_f, user_lon_f), (city.latitude, city.longitude)).kilometers
-                
-                if distance_km < min_distance:
-                    min_distance = distance_km
-                    nearest_city = city
-            
-            print(f"DEBUG: Nearest city found: {nearest_city.city if nearest_city else 'None'}, Distance: {min_distance}km")
-            
-            if not nearest_city:
-                # Fallback to showing all trips to destination
-                return self.list(request._request if hasattr(request, '_request') else request)
-            
-            # Now search for trips FROM nearest_city TO to_city
-            today = timezone.now().date()
-            
-            trips_with_from = TripStop.objects.filter(
-                city=nearest_city,
-                trip__journey_date__gte=today,
-                trip__status='published'
-            ).values_list('trip_id', flat=True)
-            
-            trips_with_to = TripStop.objects.filter(
-                city=to_city_obj,
-                trip__journey_date__gte=today,
-                trip__status='published'
-            ).values_list('trip_id', flat=True)
-            
-            matching_trip_ids = set(trips_with_from) & set(trips_with_to)
+            # Find nearest city to user from the in-memory city grid
+            nearest_city, min_distance = CityLocatorService().nearest_city(user_lat_f, user_lon_f)
             
             results = []
-            for trip_id in matching_trip_ids:
-                trip = Trip.objects.select_related('bus', 'driver', 'operator').get(id=trip_id)
-                
-                from_stop = trip.stops.filter(city=nearest_city).first()
-                to_stop = trip.stops.filter(city=to_city_obj).first()
-                
-                print(f"DEBUG Trip {trip_id}: from_stop city={from_stop.city.city if from_stop else 'None'}, to_stop city={to_stop.city.city if to_stop else 'None'}")
-                
-                if not from_stop or not to_stop or from_stop.sequence >= to_stop.sequence:
-                    continue
-                
-                segments = [f"{i}-{i+1}" for i in range(from_stop.sequence, to_stop.sequence)]
-                available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else 0
-                fare = to_stop.price_from_start - from_stop.price_from_start
-                
-                results.append({
-                    'id': trip.id,
-                    'trip_id': trip.id,
-                    'from_stop_id': from_stop.id,
-                    'to_stop_id': to_stop.id,
-                    'from_city': nearest_city.city,
-                    'to_city': to_city,
-                    'journey_date': trip.journey_date,
-                    'departure_time': from_stop.planned_departure,
-                    'arrival_time': to_stop.planned_arrival,
-                    'available_seats': available_seats,
-                    'fare': fare,
-                    'price': fare,
-                    'user_distance_km': round(min_distance, 1),  # NEW: Show distance to pickup
-                    'bus': {'id': trip.bus.id, 'bus_number': trip.bus.bus_number, 'bus_type': trip.bus.bus_type, 'capacity': trip.bus.capacity, 'has_wifi': trip.bus.has_wifi, 'has_ac': trip.bus.has_ac, 'has_usb_charging': trip.bus.has_usb_charging} if trip.bus else None,
-                    'driver': {'id': trip.driver.id, 'd_name': trip.driver.profile.full_name, 'driver_rating': float(trip.driver.driver_rating), 'operator': {'id': trip.driver.operator.id, 'name': trip.driver.operator.name}} if trip.driver else None,
-                    'operator': {'id': trip.operator.id, 'name': trip.operator.name, 'avg_rating': float(trip.operator.avg_rating), 'total_reviews': trip.operator.total_reviews},
-                    'trip_type': trip.trip_type,
-                    'status': trip.status,
-                    'planned_route_name': trip.planned_route_name
-                })
+            if nearest_city:
+                # Now search for trips FROM nearest_city TO to_city
+                results = search_service.search_route(
+                    nearest_city, to_city_obj, date_from=today,
+                    user_distance_km=round(min_distance, 1)  # NEW: Show distance to pickup
+                )
             
-            if len(results) >= 50:
-                return Response(results[:50], status=status.HTTP_200_OK)
+            if len(results) >= search_service.MAX_RESULTS:
+                return Response(results[:search_service.MAX_RESULTS], status=status.HTTP_200_OK)
             
             # FALLBACK STEP 2: If no results from nearest city, show ANY trips to destination
             if not results:
-                # Get trips where to_city is ANY stop (not first stop)
-                trips_via_city = TripStop.objects.filter(
-                    city=to_city_obj,
-                    trip__journey_date__gte=today,
-                    trip__status='published'
-                ).exclude(
-                    sequence=0
-                ).select_related('trip', 'trip__operator', 'trip__bus', 'trip__driver').order_by('trip__journey_date')[:100]
-                
-                for stop in trips_via_city:
-                    trip = stop.trip
-                    first_stop = trip.stops.order_by('sequence').first()
-                    
-                    if not first_stop:
-                        continue
-                    
-                    segments = [f"{i}-{i+1}" for i in range(0, stop.sequence)]
-                    available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else trip.get_min_available_seats()
-                    
-                    results.append({
-                        'id': trip.id,
-                        'trip_id': trip.id,
-                        'from_stop_id': first_stop.id,
-                        'to_stop_id': stop.id,
-                        'from_city': first_stop.city.city,
-                        'to_city': to_city,
-                        'journey_date': trip.journey_date,
-                        'departure_time': first_stop.planned_departure,
-                        'arrival_time': stop.planned_arrival,
-                        'available_seats': available_seats,
-                        'fare': stop.price_from_start,
-                        'price': stop.price_from_start,
-                        'bus': {'id': trip.bus.id, 'bus_number': trip.bus.bus_number, 'bus_type': trip.bus.bus_type, 'capacity': trip.bus.capacity, 'has_wifi': trip.bus.has_wifi, 'has_ac': trip.bus.has_ac, 'has_usb_charging': trip.bus.has_usb_charging} if trip.bus else None,
-                        'driver': {'id': trip.driver.id, 'd_name': trip.driver.profile.full_name, 'driver_rating': float(trip.driver.driver_rating), 'operator': {'id': trip.driver.operator.id, 'name': trip.driver.operator.name}} if trip.driver else None,
-                        'operator': {'id': trip.operator.id, 'name': trip.operator.name, 'avg_rating': float(trip.operator.avg_rating), 'total_reviews': trip.operator.total_reviews},
-                        'trip_type': trip.trip_type,
-                        'status': trip.status,
-                        'planned_route_name': trip.planned_route_name
-                    })
-                    
-                    if len(results) >= 50:
-                        break
+                results = search_service.search_to_city(to_city_obj, today)
             
             return Response(results, status=status.HTTP_200_OK)
         
         # CASE 1: Single city search (SEO/Google) - Show trips TO that city (ANY stop, not just final)
         if to_city and not from_city and not date_str:
-            from django.utils import timezone
             try:
                 to_city_obj = CityList.objects.get(city=to_city)
             except CityList.DoesNotExist:
                 return Response({'error': 'Invalid city'}, status=status.HTTP_400_BAD_REQUEST)
             
-            today = timezone.now().date()
-            
-            # Get trips where to_city is ANY stop (not first stop)
-            trips_via_city = TripStop.objects.filter(
-                city=to_city_obj,
-                trip__journey_date__gte=today,
-                trip__status='published'
-            ).exclude(
-                sequence=0
-            ).select_related('trip', 'trip__operator', 'trip__bus', 'trip__driver').order_by('trip__journey_date')[:100]
-            
-            results = []
-            for stop in trips_via_city:
-                trip = stop.trip
-                first_stop = trip.stops.order_by('sequence').first()
-                
-                if not first_stop:
-                    continue
-                
-                segments = [f"{i}-{i+1}" for i in range(0, stop.sequence)]
-                available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else trip.get_min_available_seats()
-                
-                results.append({
-                    'id': trip.id,
-                    'trip_id': trip.id,
-                    'from_stop_id': first_stop.id,
-                    'to_stop_id': stop.id,
-                    'from_city': first_stop.city.city,
-                    'to_city': to_city,
-                    'journey_date': trip.journey_date,
-                    'departure_time': first_stop.planned_departure,
-                    'arrival_time': stop.planned_arrival,
-                    'available_seats': available_seats,
-                    'fare': stop.price_from_start,
-                    'price': stop.price_from_start,
-                    'bus': {'id': trip.bus.id, 'bus_number': trip.bus.bus_number, 'bus_type': trip.bus.bus_type, 'capacity': trip.bus.capacity, 'has_wifi': trip.bus.has_wifi, 'has_ac': trip.bus.has_ac, 'has_usb_charging': trip.bus.has_usb_charging} if trip.bus else None,
-                    'driver': {'id': trip.driver.id, 'd_name': trip.driver.profile.full_name, 'driver_rating': float(trip.driver.driver_rating), 'operator': {'id': trip.driver.operator.id, 'name': trip.driver.operator.name}} if trip.driver else None,
-                    'operator': {'id': trip.operator.id, 'name': trip.operator.name, 'avg_rating': float(trip.operator.avg_rating), 'total_reviews': trip.operator.total_reviews},
-                    'trip_type': trip.trip_type,
-                    'status': trip.status,
-                    'planned_route_name': trip.planned_route_name
-                })
-                
-                if len(results) >= 50:
-                    break
-            
+            results = search_service.search_to_city(to_city_obj, today)
             return Response(results, status=status.HTTP_200_OK)
         
         # CASE 1.5: Single FROM city search - Show trips FROM that city (ANY stop, not just first)
         if from_city and not to_city and not date_str:
-            from django.utils import timezone
             try:
                 from_city_obj = CityList.objects.get(city=from_city)
             except CityList.DoesNotExist:
                 return Response({'error': 'Invalid city'}, status=status.HTTP_400_BAD_REQUEST)
             
-            today = timezone.now().date()
-            
-            # Get trips where from_city is ANY stop (not last stop)
-            trips_via_city = TripStop.objects.filter(
-                city=from_city_obj,
-                trip__journey_date__gte=today,
-                trip__status='published'
-            ).select_related('trip', 'trip__operator', 'trip__bus', 'trip__driver').order_by('trip__journey_date')[:100]
-            
-            results = []
-            for stop in trips_via_city:
-                trip = stop.trip
-                last_stop = trip.stops.order_by('-sequence').first()
-                
-                # Skip if from_city is the last stop
-                if not last_stop or stop.sequence >= last_stop.sequence:
-                    continue
-                
-                segments = [f"{i}-{i+1}" for i in range(stop.sequence, last_stop.sequence)]
-                available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else trip.get_min_available_seats()
-                fare = last_stop.price_from_start - stop.price_from_start
-                
-                results.append({
-                    'id': trip.id,
-                    'trip_id': trip.id,
-                    'from_stop_id': stop.id,
-                    'to_stop_id': last_stop.id,
-                    'from_city': from_city,
-                    'to_city': last_stop.city.city,
-                    'journey_date': trip.journey_date,
-                    'departure_time': stop.planned_departure,
-                    'arrival_time': last_stop.planned_arrival,
-                    'available_seats': available_seats,
-                    'fare': fare,
-                    'price': fare,
-                    'bus': {'id': trip.bus.id, 'bus_number': trip.bus.bus_number, 'bus_type': trip.bus.bus_type, 'capacity': trip.bus.capacity, 'has_wifi': trip.bus.has_wifi, 'has_ac': trip.bus.has_ac, 'has_usb_charging': trip.bus.has_usb_charging} if trip.bus else None,
-                    'driver': {'id': trip.driver.id, 'd_name': trip.driver.profile.full_name, 'driver_rating': float(trip.driver.driver_rating), 'operator': {'id': trip.driver.operator.id, 'name': trip.driver.operator.name}} if trip.driver else None,
-                    'operator': {'id': trip.operator.id, 'name': trip.operator.name, 'avg_rating': float(trip.operator.avg_rating), 'total_reviews': trip.operator.total_reviews},
-                    'trip_type': trip.trip_type,
-                    'status': trip.status,
-                    'planned_route_name': trip.planned_route_name
-                })
-                
-                if len(results) >= 50:
-                    break
-            
+            results = search_service.search_from_city(from_city_obj, today)
             return Response(results, status=status.HTTP_200_OK)
         
         # CASE 3: Full route search (with or without date)
         if from_city and to_city:
-            from django.utils import timezone
-            
             try:
                 from_city_obj = CityList.objects.get(city=from_city)
                 to_city_obj = CityList.objects.get(city=to_city)
@@ -347,69 +189,14 @@ class TripSearchView(viewsets.ViewSet):
             except (ValueError, CityList.DoesNotExist):
                 return Response({'error': 'Invalid date or city'}, status=status.HTTP_400_BAD_REQUEST)
             
-            today = timezone.now().date()
-            
-            # Build query filters
-            trip_filters = {'trip__status': 'published'}
-            if filter_date:
-                trip_filters['trip__journey_date'] = filter_date
-            else:
-                trip_filters['trip__journey_date__gte'] = today
-            
-            trips_with_from = TripStop.objects.filter(
-                city=from_city_obj,
-                **trip_filters
-            ).values_list('trip_id', flat=True)
-            
-            trips_with_to = TripStop.objects.filter(
-                city=to_city_obj,
-                **trip_filters
-            ).values_list('trip_id', flat=True)
-            
-            matching_trip_ids = set(trips_with_from) & set(trips_with_to)
-            
-            results = []
-            for trip_id in matching_trip_ids:
-                trip = Trip.objects.select_related('bus', 'driver', 'operator').get(id=trip_id)
-                
-                from_stop = trip.stops.filter(city=from_city_obj).first()
-                to_stop = trip.stops.filter(city=to_city_obj).first()
-                
-                if not from_stop or not to_stop or from_stop.sequence >= to_stop.sequence:
-                    continue
-                
-                segments = [f"{i}-{i+1}" for i in range(from_stop.sequence, to_stop.sequence)]
-                available_seats = min([trip.seat_matrix.get(seg, 0) for seg in segments]) if segments else 0
-                fare = to_stop.price_from_start - from_stop.price_from_start
-                
-                results.append({
-                    'id': trip.id,
-                    'trip_id': trip.id,
-                    'from_stop_id': from_stop.id,
-                    'to_stop_id': to_stop.id,
-                    'from_city': from_city,
-                    'to_city': to_city,
-                    'journey_date': trip.journey_date,
-                    'departure_time': from_stop.planned_departure,
-                    'arrival_time': to_stop.planned_arrival,
-                    'available_seats': available_seats,
-                    'fare': fare,
-                    'price': fare,
-                    'bus': {'id': trip.bus.id, 'bus_number': trip.bus.bus_number, 'bus_type': trip.bus.bus_type, 'capacity': trip.bus.capacity, 'has_wifi': trip.bus.has_wifi, 'has_ac': trip.bus.has_ac, 'has_usb_charging': trip.bus.has_usb_charging} if trip.bus else None,
-                    'driver': {'id': trip.driver.id, 'd_name': trip.driver.profile.full_name, 'driver_rating': float(trip.driver.driver_rating), 'operator': {'id': trip.driver.operator.id, 'name': trip.driver.operator.name}} if trip.driver else None,
-                    'operator': {'id': trip.operator.id, 'name': trip.operator.name, 'avg_rating': float(trip.operator.avg_rating), 'total_reviews': trip.operator.total_reviews},
-                    'trip_type': trip.trip_type,
-                    'status': trip.status,
-                    'planned_route_name': trip.planned_route_name
-                })
-            
+            results = search_service.search_route(from_city_obj, to_city_obj, journey_date=filter_date, date_from=today)
             return Response(results, status=status.HTTP_200_OK)
         
         # CASE 4: Missing required parameters
         return Response({'error': 'Invalid search parameters'}, status=status.HTTP_400_BAD_REQUEST)
     
     def retrieve(self, request, pk=None):
-        trip = get_object_or_404(Trip.objects.filter(status='published'), pk=pk)
+        trip = get_object_or_404(TripsSerializer.setup_eager_loading(Trip.objects.filter(status='published')), pk=pk)
         serializer = TripsSerializer(trip)
         return Response(serializer.data)
     
@@ -420,12 +207,20 @@ class TripSearchView(viewsets.ViewSet):
 class CitiesView(viewsets.ModelViewSet):
     queryset = CityList.objects.all()
     serializer_class = CitiesSerializer
+    pagination_class = CityCursorPagination
 
     def get_permissions(self):
         if self.request.method in ['GET']:
             return [AllowAny()]
         return [IsAdminUser()]
     
+    def list(self, request, *args, **kwargs):
+        params = {key: request.query_params.get(key) for key in ('cursor', 'page_size')}
+        return cached_search_response(
+            'cities', params, [SearchCacheService.CITIES_TAG],
+            lambda: super(CitiesView, self).list(request, *args, **kwargs)
+        )
+    
     @action(detail=False, methods=['get'], url_path='departure-cities', permission_classes=[AllowAny], authentication_classes=[])
     def departure_cities(self, request):
         date_str = request.query_params.get('date')
@@ -437,22 +232,7 @@ class CitiesView(viewsets.ModelViewSet):
         except ValueError:
             return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
         
-        trips = Trip.objects.filter(journey_date=filter_date, status='published')
-        valid_departure_cities = {}
-        
-        for trip in trips:
-            stops = trip.stops.order_by('sequence')
-            max_sequence = stops.last().sequence if stops.exists() else -1
-            
-            for stop in stops.exclude(sequence=max_sequence):
-                city_id = stop.city.id
-                city_name = stop.city.city
-                if city_id not in valid_departure_cities:
-                    valid_departure_cities[city_id] = {'id': city_id, 'city': city_name, 'trip_count': 0}
-                valid_departure_cities[city_id]['trip_count'] += 1
-        
-        result = sorted(valid_departure_cities.values(), key=lambda x: x['city'])
-        return Response(result, status=status.HTTP_200_OK)
+        return Response(CityPickerService().departure_cities(filter_date), status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'], url_path='destination-cities', permission_classes=[AllowAny], authentication_classes=[])
     def destination_cities(self, request):
@@ -468,38 +248,14 @@ class CitiesView(viewsets.ModelViewSet):
         except (ValueError, CityList.DoesNotExist):
             return Response({'error': 'Invalid date or city'}, status=status.HTTP_400_BAD_REQUEST)
         
-        trips_with_from_city = TripStop.objects.filter(
-            city=from_city_obj,
-            trip__journey_date=filter_date,
-            trip__status='published'
-        ).values_list('trip_id', flat=True)
-        
-        from_city_sequences = {}
-        for trip_id in trips_with_from_city:
-            from_stop = TripStop.objects.filter(trip_id=trip_id, city=from_city_obj).first()
-            if from_stop:
-                from_city_sequences[trip_id] = from_stop.sequence
-        
-        valid_destinations = set()
-        for trip_id, from_seq in from_city_sequences.items():
-            dest_stops = TripStop.objects.filter(trip_id=trip_id, sequence__gt=from_seq).exclude(city=from_city_obj)
-            for stop in dest_stops:
-                valid_destinations.add((stop.city.id, stop.city.city))
-        
-        result = []
-        for city_id, city_name in valid_destinations:
-            trip_count = sum(1 for trip_id, from_seq in from_city_sequences.items()
-                           if TripStop.objects.filter(trip_id=trip_id, city_id=city_id, sequence__gt=from_seq).exists())
-            result.append({'id': city_id, 'city': city_name, 'trip_count': trip_count})
-        
-        result.sort(key=lambda x: x['city'])
-        return Response(result, status=status.HTTP_200_OK)
+        return Response(CityPickerService().destination_cities(from_city_obj, filter_date), status=status.HTTP_200_OK)
 
 
 class DriverTripView(viewsets.ModelViewSet):
     serializer_class = TripsSerializer
+    pagination_class = TripCursorPagination
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
     def get_queryset(self):
-        return Trip.objects.filter(driver__user=self.request.user.id)
+        return TripsSerializer.setup_eager_loading(Trip.objects.filter(driver__user=self.request.user.id))
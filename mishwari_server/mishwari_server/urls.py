@@ -2,18 +2,12 @@ from django.urls import path, include
 from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from mishwari_main_app.sitemaps import TripSitemap, CitySitemap
 from mishwari_main_app.feeds import LatestTripsFeed
-
-sitemaps = {
-    'trips': TripSitemap,
-    'cities': CitySitemap,
-}
+from mishwari_main_app.views import sitemap_index, sitemap_section
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -21,6 +15,7 @@ urlpatterns = [
     path('api/', include("wallet.urls")),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='sitemap_index'),
+    path('sitemap-<str:section>-<int:page>.xml', sitemap_section, name='sitemap_section'),
     path('feeds/latest-trips/', LatestTripsFeed(), name='latest_trips_feed'),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
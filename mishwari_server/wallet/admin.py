@@ -1,7 +1,26 @@
 from django.contrib import admin
 from .models import Wallet, WalletTransaction
 
-admin.site.register(Wallet)
+@admin.register(Wallet)
+class WalletAdmin(admin.ModelAdmin):
+    list_display = ['user', 'balance']
+    search_fields = ['user__username']
+    # Balances only move through WalletLedger postings
+    readonly_fields = ['balance']
 
-admin.site.register(WalletTransaction)
 
+@admin.register(WalletTransaction)
+class WalletTransactionAdmin(admin.ModelAdmin):
+    """Ledger entries are append-only, so the admin only reads them"""
+    list_display = ['journal_id', 'account', 'wallet', 'transaction_type', 'amount', 'balance_after', 'timestamp']
+    list_filter = ['account', 'transaction_type']
+    search_fields = ['journal_id', 'reference_id', 'idempotency_key', 'wallet__user__username']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,19 @@
+"""Management command to reconcile wallet balances against the ledger"""
+from django.core.management.base import BaseCommand, CommandError
+from wallet.services import WalletLedger
+
+
+class Command(BaseCommand):
+    help = 'Check every wallet balance against its ledger entries and every journal for balance (run hourly)'
+
+    def handle(self, *args, **options):
+        result = WalletLedger().verify()
+        for wallet_id, balance, ledger in result['drifted']:
+            self.stderr.write(f'Wallet {wallet_id}: balance {balance} != ledger {ledger}')
+        for journal_id in result['unbalanced']:
+            self.stderr.write(f'Journal {journal_id} does not balance')
+        if result['drifted'] or result['unbalanced']:
+            raise CommandError(
+                f"{len(result['drifted'])} wallets drifted, {len(result['unbalanced'])} journals unbalanced"
+            )
+        self.stdout.write(self.style.SUCCESS('All wallets reconcile with the ledger'))
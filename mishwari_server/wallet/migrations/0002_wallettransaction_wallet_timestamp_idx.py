@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', '-timestamp'], name='wallet_wall_wallet__e3374e_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+import uuid
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    """Give legacy entries a journal and platform leg, then open each wallet's ledger at its stored balance"""
+    Wallet = apps.get_model('wallet', 'Wallet')
+    WalletTransaction = apps.get_model('wallet', 'WalletTransaction')
+
+    contras = []
+    for entry in WalletTransaction.objects.filter(journal_id=None).exclude(wallet=None).iterator():
+        entry.journal_id = uuid.uuid4()
+        entry.save(update_fields=['journal_id'])
+        contras.append(WalletTransaction(
+            account='funding' if entry.transaction_type == 'credit' else 'revenue',
+            transaction_type='debit' if entry.transaction_type == 'credit' else 'credit',
+            journal_id=entry.journal_id, amount=entry.amount, title=entry.title,
+            description=entry.description, reference_id=entry.reference_id
+        ))
+    WalletTransaction.objects.bulk_create(contras, batch_size=500)
+
+    openings = []
+    for wallet in Wallet.objects.iterator():
+        ledger = Decimal('0')
+        for transaction_type, amount in wallet.wallet_transactions.values_list('transaction_type', 'amount'):
+            ledger += amount if transaction_type == 'credit' else -amount
+        difference = wallet.balance - ledger
+        if not difference:
+            continue
+        journal_id = uuid.uuid4()
+        wallet_side, platform_side = ('credit', 'debit') if difference > 0 else ('debit', 'credit')
+        common = {'journal_id': journal_id, 'amount': abs(difference), 'title': 'opening balance', 'reference_id': 'migration'}
+        openings.append(WalletTransaction(wallet=wallet, account='wallet', transaction_type=wallet_side, balance_after=wallet.balance, **common))
+        openings.append(WalletTransaction(account='adjustment', transaction_type=platform_side, **common))
+    WalletTransaction.objects.bulk_create(openings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_wallettransaction_wallet_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='account',
+            field=models.CharField(choices=[('wallet', 'Customer wallet'), ('funding', 'External funding'), ('revenue', 'Trip revenue'), ('adjustment', 'Adjustment')], default='wallet', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='journal_id',
+            field=models.UUIDField(db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='wallet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='wallet_transactions', to='wallet.wallet'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('wallet', 'idempotency_key'), name='unique_wallet_idempotency_key'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
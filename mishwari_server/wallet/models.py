@@ -4,6 +4,12 @@ from django.contrib.auth.models import User
 
 
 class Wallet(models.Model):
+    """
+    A customer's wallet; `balance` is materialized from its ledger entries
+
+    Only WalletLedger changes the balance, with conditional UPDATEs, so it
+    always equals the sum of the wallet's entries; verify_wallets checks it.
+    """
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     # currency = models.CharField(max_digits=10, decimal_places=2)
@@ -13,20 +19,55 @@ class Wallet(models.Model):
     
 
 class WalletTransaction(models.Model):
+    """
+    One leg of a double-entry ledger posting; rows are append-only
+
+    Every posting writes a wallet leg and an opposite leg on a platform
+    account (funding, revenue, adjustment) under the same journal_id, so
+    each journal's credits equal its debits. Platform legs have no wallet
+    and no materialized balance, so postings never contend on a shared row.
+    """
     TRANSACTION_TYPE = (
         ('credit', 'credit'),
         ('debit', 'debit'),
     )
 
-    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="wallet_transactions")
+    ACCOUNT_CHOICES = (
+        ('wallet', 'Customer wallet'),
+        ('funding', 'External funding'),
+        ('revenue', 'Trip revenue'),
+        ('adjustment', 'Adjustment'),
+    )
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="wallet_transactions", null=True, blank=True)
+    account = models.CharField(max_length=20, choices=ACCOUNT_CHOICES, default='wallet')
+    journal_id = models.UUIDField(db_index=True, null=True)
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     title = models.CharField(max_length=16, null=False, blank=False, default='unknown')
     description = models.TextField(blank=True, max_length=150)
     reference_id = models.CharField(max_length=32, default='unknown')
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['wallet', '-timestamp']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wallet', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_wallet_idempotency_key'
+            ),
+        ]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger entries are append-only; post a reversing entry instead')
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.wallet.user.username} {self.transaction_type} of {self.amount} on {self.timestamp}"
\ No newline at end of file
+        owner = self.wallet.user.username if self.wallet_id else self.account
+        return f"{owner} {self.transaction_type} of {self.amount} on {self.timestamp}"
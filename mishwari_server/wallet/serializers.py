@@ -5,9 +5,10 @@ class WalletSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wallet
         fields = ['id', 'user', 'balance']
+        read_only_fields = ['user', 'balance']
 
 
 class WalletTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = WalletTransaction
-        fields = ['id', 'title', 'description', 'reference_id','wallet','transaction_type', 'amount', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'title', 'description', 'reference_id','wallet','transaction_type', 'amount', 'balance_after', 'timestamp']
\ No newline at end of file
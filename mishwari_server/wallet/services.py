@@ -0,0 +1,182 @@
+"""Wallet ledger - double-entry postings against materialized wallet balances"""
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from mishwari_main_app.utils.cache_keys import CacheKeys
+from .models import Wallet, WalletTransaction
+
+
+class InsufficientFundsError(Exception):
+    """Raised when a debit would take a wallet below zero"""
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different posting"""
+
+
+SIGNED_AMOUNT = Case(
+    When(transaction_type='credit', then=F('amount')),
+    default=-F('amount'),
+    output_field=DecimalField(max_digits=12, decimal_places=2)
+)
+SIGNED_WALLET_AMOUNT = Case(
+    When(wallet_transactions__transaction_type='credit', then=F('wallet_transactions__amount')),
+    When(wallet_transactions__transaction_type='debit', then=-F('wallet_transactions__amount')),
+    output_field=DecimalField(max_digits=12, decimal_places=2)
+)
+
+
+class WalletLedger:
+    """
+    Posts money into and out of wallets as balanced journal entries
+
+    A posting changes the wallet row with one conditional UPDATE
+    (`balance >= amount` for debits), so concurrent payments serialize on
+    that wallet's row only and can never overdraw it, then appends the
+    wallet leg and its platform leg. A posting with an idempotency key
+    that was already used returns the original entry instead of moving
+    money twice. Balances are cached for WALLET_BALANCE_CACHE_TTL seconds
+    and dropped when a posting commits; verify() reconciles every balance
+    against its ledger.
+    """
+
+    DEFAULT_CACHE_TTL = 60
+
+    def __init__(self):
+        self.cache_ttl = getattr(settings, 'WALLET_BALANCE_CACHE_TTL', self.DEFAULT_CACHE_TTL)
+
+    def credit(self, wallet, amount, account='funding', title='top up', description='',
+               reference_id='unknown', idempotency_key=None):
+        """Add funds taken from `account`; returns the wallet's ledger entry"""
+        return self._post(wallet, 'credit', amount, account, title, description, reference_id, idempotency_key)
+
+    def debit(self, wallet, amount, account='revenue', title='payment', description='',
+              reference_id='unknown', idempotency_key=None):
+        """Take funds into `account`; raises InsufficientFundsError rather than overdraw"""
+        return self._post(wallet, 'debit', amount, account, title, description, reference_id, idempotency_key)
+
+    @staticmethod
+    def parse_amount(value):
+        """Return `value` as a positive two-place Decimal, or raise ValueError"""
+        try:
+            amount = Decimal(str(value))
+        except (InvalidOperation, TypeError):
+            raise ValueError('Amount must be a number')
+        if not amount.is_finite() or amount <= 0:
+            raise ValueError('Amount must be greater than 0')
+        if amount != amount.quantize(Decimal('0.01')):
+            raise ValueError('Amount has more than two decimal places')
+        return amount
+
+    @staticmethod
+    def check_idempotency_key(key):
+        """Raise ValueError if `key` does not fit the ledger's idempotency_key column"""
+        max_length = WalletTransaction._meta.get_field('idempotency_key').max_length
+        if key and len(key) > max_length:
+            raise ValueError(f'Idempotency key must be at most {max_length} characters')
+
+    def _post(self, wallet, transaction_type, amount, account, title, description, reference_id, idempotency_key):
+        amount = self.parse_amount(amount)
+        self.check_idempotency_key(idempotency_key)
+        if idempotency_key:
+            existing = self._replay(wallet, idempotency_key, transaction_type, amount)
+            if existing:
+                return existing
+
+        try:
+            with transaction.atomic():
+                wallets = Wallet.objects.filter(id=wallet.id)
+                if transaction_type == 'debit':
+                    updated = wallets.filter(balance__gte=amount).update(balance=F('balance') - amount)
+                else:
+                    updated = wallets.update(balance=F('balance') + amount)
+                if not updated:
+                    raise InsufficientFundsError(f'Wallet {wallet.id} cannot cover {amount}')
+
+                # The UPDATE holds the row lock, so this is exactly the balance it left
+                balance = wallets.values_list('balance', flat=True).get()
+                journal_id = uuid.uuid4()
+                common = {
+                    'journal_id': journal_id, 'amount': amount, 'title': title[:16],
+                    'description': description, 'reference_id': str(reference_id)[:32],
+                }
+                entry = WalletTransaction(
+                    wallet_id=wallet.id, account='wallet', transaction_type=transaction_type,
+                    balance_after=balance, idempotency_key=idempotency_key, **common
+                )
+                contra = WalletTransaction(
+                    account=account, transaction_type='debit' if transaction_type == 'credit' else 'credit', **common
+                )
+                WalletTransaction.objects.bulk_create([entry, contra])
+        except IntegrityError:
+            # A concurrent request with the same key won; ours rolled back entirely
+            existing = idempotency_key and self._replay(wallet, idempotency_key, transaction_type, amount)
+            if not existing:
+                raise
+            return existing
+
+        wallet.balance = balance
+        user_id = wallet.user_id
+        transaction.on_commit(lambda: cache.delete(CacheKeys.wallet_balance(user_id)))
+        return entry
+
+    @staticmethod
+    def _replay(wallet, idempotency_key, transaction_type, amount):
+        entry = WalletTransaction.objects.filter(wallet_id=wallet.id, idempotency_key=idempotency_key).first()
+        if entry and (entry.transaction_type, entry.amount) != (transaction_type, amount):
+            raise IdempotencyConflictError(f'Idempotency key {idempotency_key!r} was used for a different posting')
+        return entry
+
+    def wallet_for(self, user):
+        """
+        Return the user's wallet as last cached; for display only
+
+        Postings always go through the conditional UPDATE, never through a
+        cached balance. Raises Wallet.DoesNotExist if the user has none.
+        """
+        key = CacheKeys.wallet_balance(user.id)
+        cached = cache.get(key)
+        if cached is None:
+            cached = Wallet.objects.filter(user=user).values_list('id', 'balance').get()
+            cache.set(key, cached, self.cache_ttl)
+        wallet_id, balance = cached
+        return Wallet(id=wallet_id, user_id=user.id, balance=balance)
+
+    def verify(self):
+        """
+        Reconcile materialized balances and journals against the ledger
+
+        Returns a dict with `drifted` wallets (id, balance, ledger sum) and
+        `unbalanced` journal ids. Cached balances of drifted wallets are
+        dropped so readers see the stored value until it is repaired.
+        """
+        drifted = list(
+            Wallet.objects.annotate(
+                ledger=Coalesce(
+                    Sum(SIGNED_WALLET_AMOUNT),
+                    Value(Decimal('0')),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+            .exclude(balance=F('ledger'))
+            .values_list('id', 'user_id', 'balance', 'ledger')
+        )
+        for _, user_id, _, _ in drifted:
+            cache.delete(CacheKeys.wallet_balance(user_id))
+
+        unbalanced = list(
+            WalletTransaction.objects.exclude(journal_id=None)
+            .values('journal_id')
+            .annotate(net=Sum(SIGNED_AMOUNT))
+            .exclude(net=0)
+            .values_list('journal_id', flat=True)
+        )
+        return {
+            'drifted': [(wallet_id, balance, ledger) for wallet_id, _, balance, ledger in drifted],
+            'unbalanced': unbalanced,
+        }
+
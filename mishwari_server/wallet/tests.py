@@ -1,3 +1,204 @@
-from django.test import TestCase
+"""Tests for the wallet ledger"""
 
-# Create your tests here.
+import random
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from mishwari_main_app.payment_gateways.wallet_payment_gateway import WalletPaymentGateway
+from .models import Wallet, WalletTransaction
+from .services import WalletLedger, InsufficientFundsError, IdempotencyConflictError
+
+
+def ledger_sum(wallet):
+    total = Decimal('0')
+    for transaction_type, amount in wallet.wallet_transactions.values_list('transaction_type', 'amount'):
+        total += amount if transaction_type == 'credit' else -amount
+    return total
+
+
+class WalletLedgerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('walletuser')
+        self.wallet = Wallet.objects.create(user=self.user)
+        self.ledger = WalletLedger()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_postings_are_balanced_journals(self):
+        self.ledger.credit(self.wallet, '100.00')
+        entry = self.ledger.debit(self.wallet, Decimal('30.50'), reference_id=7)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('69.50'))
+        self.assertEqual((entry.balance_after, entry.reference_id), (Decimal('69.50'), '7'))
+        legs = WalletTransaction.objects.filter(journal_id=entry.journal_id)
+        self.assertEqual(
+            sorted(legs.values_list('account', 'transaction_type')),
+            [('revenue', 'credit'), ('wallet', 'debit')]
+        )
+        self.assertEqual(self.ledger.verify(), {'drifted': [], 'unbalanced': []})
+
+    def test_debit_never_overdraws(self):
+        self.ledger.credit(self.wallet, 10)
+        with self.assertRaises(InsufficientFundsError):
+            self.ledger.debit(self.wallet, '10.01')
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('10.00'))
+        self.assertEqual(self.wallet.wallet_transactions.count(), 1)
+
+    def test_rejects_invalid_amounts(self):
+        for amount in (0, -5, 'abc', '1.005', 'NaN', None):
+            with self.assertRaises(ValueError):
+                self.ledger.credit(self.wallet, amount)
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_idempotency_key_posts_once(self):
+        self.ledger.credit(self.wallet, 50)
+        first = self.ledger.debit(self.wallet, 20, idempotency_key='booking:1')
+        again = self.ledger.debit(self.wallet, '20.00', idempotency_key='booking:1')
+
+        self.assertEqual(first.id, again.id)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('30.00'))
+        with self.assertRaises(IdempotencyConflictError):
+            self.ledger.debit(self.wallet, 25, idempotency_key='booking:1')
+
+    def test_entries_are_append_only(self):
+        entry = self.ledger.credit(self.wallet, 5)
+        entry.amount = Decimal('500')
+        with self.assertRaises(ValueError):
+            entry.save()
+
+    def test_cached_balance_is_dropped_on_commit(self):
+        self.ledger.credit(self.wallet, 5)
+        self.assertEqual(self.ledger.wallet_for(self.user).balance, Decimal('5.00'))
+        with self.assertNumQueries(0):
+            self.ledger.wallet_for(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ledger.credit(self.wallet, 5)
+        self.assertEqual(self.ledger.wallet_for(self.user).balance, Decimal('10.00'))
+
+    def test_verify_reports_drift(self):
+        self.ledger.credit(self.wallet, 5)
+        Wallet.objects.filter(id=self.wallet.id).update(balance=Decimal('8.00'))
+
+        self.assertEqual(self.ledger.verify()['drifted'], [(self.wallet.id, Decimal('8.00'), Decimal('5.00'))])
+        with self.assertRaises(CommandError):
+            call_command('verify_wallets', stdout=StringIO(), stderr=StringIO())
+
+    def test_gateway_debits_booking_once(self):
+        self.ledger.credit(self.wallet, 100)
+        details = {'user': self.user, 'trip': None, 'amount': Decimal('40.00'), 'booking_id': 12}
+        gateway = WalletPaymentGateway()
+        gateway.initiate_payment(details)
+        gateway.initiate_payment(details)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('60.00'))
+
+        with self.assertRaises(ValidationError):
+            gateway.initiate_payment({**details, 'amount': Decimal('60.01'), 'booking_id': 13})
+
+
+class WalletViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('walletviewuser')
+        self.wallet = Wallet.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_add_and_deduct_funds(self):
+        url = f'/api/wallet/balance/{self.wallet.id}/'
+        response = self.client.post(url + 'add-funds/', {'amount': '25.00'}, format='json', HTTP_IDEMPOTENCY_KEY='top-up-1')
+        self.assertEqual((response.status_code, response.data['balance']), (200, '25.00'))
+        self.client.post(url + 'add-funds/', {'amount': '25.00'}, format='json', HTTP_IDEMPOTENCY_KEY='top-up-1')
+
+        response = self.client.post(url + 'wallet-deduct-funds/', {'amount': '30'}, format='json')
+        self.assertEqual((response.status_code, response.data['message']), (400, 'Insufficient funds'))
+        response = self.client.post(url + 'add-funds/', {'amount': 'lots'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('25.00'))
+
+    def test_wallet_cannot_be_edited_or_deleted(self):
+        # Only list and the posting actions are routed
+        url = f'/api/wallet/balance/{self.wallet.id}/'
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.client.patch(url, {'balance': '1000'}, format='json').status_code, 404)
+        self.assertTrue(Wallet.objects.filter(id=self.wallet.id).exists())
+
+    def test_rejects_oversized_idempotency_key(self):
+        response = self.client.post(
+            f'/api/wallet/balance/{self.wallet.id}/add-funds/', {'amount': '5'}, format='json', HTTP_IDEMPOTENCY_KEY='k' * 65
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_cannot_post_to_another_users_wallet(self):
+        other = Wallet.objects.create(user=User.objects.create_user('otherwalletuser'))
+        response = self.client.post(f'/api/wallet/balance/{other.id}/add-funds/', {'amount': '5'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConcurrentWalletDebitTest(TransactionTestCase):
+    BALANCE = Decimal('100.00')
+    AMOUNT = Decimal('7.00')
+    WORKERS = 30
+
+    def setUp(self):
+        cache.clear()
+        self.wallet = Wallet.objects.create(user=User.objects.create_user('stressuser'))
+        WalletLedger().credit(self.wallet, self.BALANCE)
+
+    def tearDown(self):
+        cache.clear()
+
+    def pay(self, index, outcomes):
+        try:
+            for _ in range(200):
+                try:
+                    WalletLedger().debit(self.wallet, self.AMOUNT, idempotency_key=f'booking:{index % 20}')
+                    outcomes.append('paid')
+                    return
+                except InsufficientFundsError:
+                    outcomes.append('declined')
+                    return
+                except OperationalError:
+                    # SQLite allows one writer at a time; back off and retry
+                    time.sleep(random.uniform(0.001, 0.01))
+            outcomes.append('gave up')
+        finally:
+            connection.close()
+
+    def test_parallel_debits_never_overdraw(self):
+        outcomes = []
+        threads = [threading.Thread(target=self.pay, args=(index, outcomes)) for index in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertNotIn('gave up', outcomes)
+        self.wallet.refresh_from_db()
+        debits = self.wallet.wallet_transactions.filter(transaction_type='debit')
+        # 20 distinct keys, of which only 14 fit in the balance
+        self.assertEqual(debits.count(), int(self.BALANCE // self.AMOUNT))
+        self.assertEqual(self.wallet.balance, self.BALANCE - debits.count() * self.AMOUNT)
+        self.assertEqual(self.wallet.balance, ledger_sum(self.wallet))
+        self.assertEqual(WalletLedger().verify(), {'drifted': [], 'unbalanced': []})
@@ -1,68 +1,82 @@
 import time
-from rest_framework import viewsets , status
+from django.http import Http404
+from rest_framework import mixins, viewsets , status
 from rest_framework.response import Response
 from .models import Wallet, WalletTransaction
 from .serializers import WalletTransactionSerializer, WalletSerializer
+from .services import WalletLedger, InsufficientFundsError, IdempotencyConflictError
 from django.contrib.auth.models import User
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny,IsAdminUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.generics import get_object_or_404
+from mishwari_main_app.pagination import BaseCursorPagination
 
 
 
 
-class WalletView(viewsets.ModelViewSet):
+class WalletView(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Balance and the two posting actions; wallets are never edited or deleted through the API"""
     # queryset = Wallet.objects.all()
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]    
     serializer_class = WalletSerializer
+
+    def get_queryset(self):
+        return Wallet.objects.filter(user=self.request.user)
     
     def list(self, request, *args, **kwargs):
-        wallet = get_object_or_404(Wallet, user=self.request.user)
+        try:
+            wallet = WalletLedger().wallet_for(request.user)
+        except Wallet.DoesNotExist:
+            raise Http404
         serializer = self.get_serializer(wallet)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['POST'], url_path='add-funds')
     def add_funds(self, request, pk=None):
-        wallet = self.get_object()
-        amount = request.data.get('amount',0)
-        if amount <= 0: # could allow 0 amount for free trips
-            return Response({'message': 'Amount must be greater than 0'}, status=status.HTTP_400_BAD_REQUEST)
-        wallet.balance += amount
-        wallet.save()
-
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type='credit', # WalletTransaction.TYPE_ADD_FUNDS
-            amount=amount
-        )
-        return Response({'message': 'Funds added successfully'}, status=status.HTTP_200_OK)
+        return self._post(request, 'credit', 'Funds added successfully')
     
     @action(detail=True, methods=['POST'], url_path='wallet-deduct-funds')
     def deduct_funds(self, request, pk=None):
-        print("Deduct Called")
+        return self._post(request, 'debit', 'Funds deducted successfully')
+
+    def _post(self, request, transaction_type, message):
+        """Post to the ledger; retries carrying the same Idempotency-Key are answered without moving money again"""
         wallet = self.get_object()
-        amount = request.data.get('amount',0)
-        if amount <= 0:
-            return Response({'message': 'Amount must be greater than 0'}, status=status.HTTP_400_BAD_REQUEST)
-        if wallet.balance < amount:
-            return Response({'message': 'Insufficient funds'}, status=status.HTTP_400_BAD_REQUEST)
-        wallet.balance -= amount
-        wallet.save()
+        ledger = WalletLedger()
+        try:
+            amount = ledger.parse_amount(request.data.get('amount', 0))
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type='debit', #WalletTransaction.TYPE_DEDUCT_FUNDS
-            amount=amount
+        idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+        try:
+            ledger.check_idempotency_key(idempotency_key)
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        post = ledger.credit if transaction_type == 'credit' else ledger.debit
+        try:
+            entry = post(wallet, amount, idempotency_key=idempotency_key)
+        except InsufficientFundsError:
+            return Response({'message': 'Insufficient funds'}, status=status.HTTP_400_BAD_REQUEST)
+        except IdempotencyConflictError as e:
+            return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(
+            {'message': message, 'transaction': entry.id, 'balance': str(entry.balance_after)},
+            status=status.HTTP_200_OK
         )
-        return Response({'message': 'Funds deducted successfully'}, status=status.HTTP_200_OK)
-    
     
-class WalletTransactionView(viewsets.ModelViewSet):
     
+class WalletTransactionCursorPagination(BaseCursorPagination):
+    """Newest transactions first"""
+    ordering = ('-timestamp', '-id')
+
+
+class WalletTransactionView(viewsets.ReadOnlyModelViewSet):
+    """The ledger is append-only; entries are only written through WalletLedger"""
     # queryset = WalletTransaction.objects.all()
     serializer_class = WalletTransactionSerializer
+    pagination_class = WalletTransactionCursorPagination
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 